@@ -0,0 +1,92 @@
+-- =====================================================
+-- MIGRATION: Atomic point / bottle count functions
+-- บวกแต้ม + บันทึกประวัติ + นับขวด ใน transaction เดียว (1 RPC ต่อคำขอ)
+-- แทนการอ่านค่าแล้วเขียน value+1 ซึ่งทำให้ค่าหายเมื่อหลายเครื่องส่งพร้อมกัน
+-- =====================================================
+
+-- บวกแต้มผู้ใช้
+-- p_entries: [{ "item_type": "plastic", "points": 3 }, ...] (1 แถวต่อชิ้น)
+-- p_machine_id = NULL จะไม่นับขวด
+-- ถ้า p_idempotency_key เคยใช้แล้ว จะไม่บวกซ้ำ และคืน { duplicate: true }
+-- คืนค่า: { duplicate: boolean, data: แถว user_points }
+CREATE OR REPLACE FUNCTION credit_points(
+  p_user_id UUID,
+  p_entries JSONB,
+  p_machine_id TEXT DEFAULT NULL,
+  p_glass INT DEFAULT 0,
+  p_plastic INT DEFAULT 0,
+  p_can INT DEFAULT 0,
+  p_idempotency_key TEXT DEFAULT NULL
+) RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_total INT;
+  v_row user_points;
+BEGIN
+  SELECT COALESCE(SUM((e->>'points')::INT), 0) INTO v_total
+  FROM jsonb_array_elements(p_entries) AS e;
+
+  IF v_total <= 0 THEN
+    RAISE EXCEPTION 'Invalid points value';
+  END IF;
+
+  -- จอง idempotency key (ถ้ามีอยู่แล้วแปลว่าเคยบวกแต้มไปแล้ว)
+  IF p_idempotency_key IS NOT NULL THEN
+    INSERT INTO point_requests (idempotency_key, user_id, points)
+    VALUES (p_idempotency_key, p_user_id, v_total)
+    ON CONFLICT (idempotency_key) DO NOTHING;
+
+    IF NOT FOUND THEN
+      RETURN jsonb_build_object('duplicate', true, 'data', NULL);
+    END IF;
+  END IF;
+
+  UPDATE user_points
+  SET points = points + v_total,
+      updated_at = NOW()
+  WHERE user_id = p_user_id
+  RETURNING * INTO v_row;
+
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'User points not found for %', p_user_id;
+  END IF;
+
+  INSERT INTO point_history (user_id, points, item_type, created_at)
+  SELECT p_user_id, (e->>'points')::INT, e->>'item_type', NOW()
+  FROM jsonb_array_elements(p_entries) AS e;
+
+  IF p_machine_id IS NOT NULL AND (p_glass <> 0 OR p_plastic <> 0 OR p_can <> 0) THEN
+    UPDATE machine_status
+    SET glass_count = COALESCE(glass_count, 0) + p_glass,
+        plastic_count = COALESCE(plastic_count, 0) + p_plastic,
+        can_count = COALESCE(can_count, 0) + p_can,
+        updated_at = NOW()
+    WHERE machine_id = p_machine_id;
+  END IF;
+
+  RETURN jsonb_build_object('duplicate', false, 'data', to_jsonb(v_row));
+END;
+$$;
+
+-- เพิ่มจำนวนขวดแบบ atomic (ใช้กับ POST /api/bottleCounts increment)
+CREATE OR REPLACE FUNCTION increment_bottle_counts(
+  p_machine_id TEXT,
+  p_glass INT DEFAULT 0,
+  p_plastic INT DEFAULT 0,
+  p_can INT DEFAULT 0
+) RETURNS machine_status
+LANGUAGE sql
+AS $$
+  UPDATE machine_status
+  SET glass_count = COALESCE(glass_count, 0) + p_glass,
+      plastic_count = COALESCE(plastic_count, 0) + p_plastic,
+      can_count = COALESCE(can_count, 0) + p_can,
+      updated_at = NOW()
+  WHERE machine_id = p_machine_id
+  RETURNING *;
+$$;
+
+-- เรียกได้เฉพาะ service role (API routes)
+REVOKE EXECUTE ON FUNCTION credit_points(UUID, JSONB, TEXT, INT, INT, INT, TEXT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION increment_bottle_counts(TEXT, INT, INT, INT) FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,92 @@
+-- =====================================================
+-- MIGRATION: Per-device machine_status rows
+-- แต่ละเครื่องส่ง machine_id (DEVICE_ID) มาเอง -> นับขวดในแถวของตัวเอง
+-- ไม่แย่ง lock แถว 'main' แถวเดียว / ดูรวมทั้ง fleet ได้จาก machine_fleet_totals
+-- ต้องรันหลัง MIGRATION_ATOMIC_POINTS.sql
+-- =====================================================
+
+-- เครื่องใหม่ที่ยังไม่มีแถว: สร้างแถวให้อัตโนมัติ (upsert แทน UPDATE)
+CREATE OR REPLACE FUNCTION increment_bottle_counts(
+  p_machine_id TEXT,
+  p_glass INT DEFAULT 0,
+  p_plastic INT DEFAULT 0,
+  p_can INT DEFAULT 0
+) RETURNS machine_status
+LANGUAGE sql
+AS $$
+  INSERT INTO machine_status (machine_id, glass_count, plastic_count, can_count, updated_at)
+  VALUES (p_machine_id, p_glass, p_plastic, p_can, NOW())
+  ON CONFLICT (machine_id) DO UPDATE
+  SET glass_count = COALESCE(machine_status.glass_count, 0) + EXCLUDED.glass_count,
+      plastic_count = COALESCE(machine_status.plastic_count, 0) + EXCLUDED.plastic_count,
+      can_count = COALESCE(machine_status.can_count, 0) + EXCLUDED.can_count,
+      updated_at = NOW()
+  RETURNING *;
+$$;
+
+CREATE OR REPLACE FUNCTION credit_points(
+  p_user_id UUID,
+  p_entries JSONB,
+  p_machine_id TEXT DEFAULT NULL,
+  p_glass INT DEFAULT 0,
+  p_plastic INT DEFAULT 0,
+  p_can INT DEFAULT 0,
+  p_idempotency_key TEXT DEFAULT NULL
+) RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_total INT;
+  v_row user_points;
+BEGIN
+  SELECT COALESCE(SUM((e->>'points')::INT), 0) INTO v_total
+  FROM jsonb_array_elements(p_entries) AS e;
+
+  IF v_total <= 0 THEN
+    RAISE EXCEPTION 'Invalid points value';
+  END IF;
+
+  IF p_idempotency_key IS NOT NULL THEN
+    INSERT INTO point_requests (idempotency_key, user_id, points)
+    VALUES (p_idempotency_key, p_user_id, v_total)
+    ON CONFLICT (idempotency_key) DO NOTHING;
+
+    IF NOT FOUND THEN
+      RETURN jsonb_build_object('duplicate', true, 'data', NULL);
+    END IF;
+  END IF;
+
+  UPDATE user_points
+  SET points = points + v_total,
+      updated_at = NOW()
+  WHERE user_id = p_user_id
+  RETURNING * INTO v_row;
+
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'User points not found for %', p_user_id;
+  END IF;
+
+  INSERT INTO point_history (user_id, points, item_type, created_at)
+  SELECT p_user_id, (e->>'points')::INT, e->>'item_type', NOW()
+  FROM jsonb_array_elements(p_entries) AS e;
+
+  IF p_machine_id IS NOT NULL AND (p_glass <> 0 OR p_plastic <> 0 OR p_can <> 0) THEN
+    PERFORM increment_bottle_counts(p_machine_id, p_glass, p_plastic, p_can);
+  END IF;
+
+  RETURN jsonb_build_object('duplicate', false, 'data', to_jsonb(v_row));
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION credit_points(UUID, JSONB, TEXT, INT, INT, INT, TEXT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION increment_bottle_counts(TEXT, INT, INT, INT) FROM PUBLIC, anon, authenticated;
+
+-- ยอดรวมทั้ง fleet (GET /api/bottleCounts ที่ไม่ระบุ machine_id)
+CREATE OR REPLACE VIEW machine_fleet_totals AS
+SELECT
+  COUNT(*) AS machines,
+  COALESCE(SUM(glass_count), 0)::INT AS glass_count,
+  COALESCE(SUM(plastic_count), 0)::INT AS plastic_count,
+  COALESCE(SUM(can_count), 0)::INT AS can_count,
+  MAX(last_heartbeat) AS last_heartbeat
+FROM machine_status;
@@ -0,0 +1,36 @@
+-- =====================================================
+-- MIGRATION: Machine heartbeat
+-- ค่าที่ kiosk ส่งมาทุกรอบ (/api/heartbeat) -> machine_status + ประวัติ
+-- =====================================================
+
+-- ค่าล่าสุดของแต่ละเครื่อง (cpu_temp / storage_used / status มีอยู่แล้ว)
+ALTER TABLE machine_status
+ADD COLUMN IF NOT EXISTS cpu_temp REAL,
+ADD COLUMN IF NOT EXISTS storage_used REAL,
+ADD COLUMN IF NOT EXISTS cpu_temp_max REAL,
+ADD COLUMN IF NOT EXISTS throttled INTEGER DEFAULT 0,
+ADD COLUMN IF NOT EXISTS inference_ms REAL,
+ADD COLUMN IF NOT EXISTS api_latency_ms INTEGER,
+ADD COLUMN IF NOT EXISTS uptime_s INTEGER;
+
+-- storage_used เดิมเป็น INT แต่ heartbeat ส่งทศนิยม 1 ตำแหน่ง (เช่น 37.4)
+-- ADD COLUMN IF NOT EXISTS ข้างบนไม่เปลี่ยน type ของคอลัมน์ที่มีอยู่แล้ว
+ALTER TABLE machine_status
+ALTER COLUMN storage_used TYPE REAL USING storage_used::REAL;
+
+-- ประวัติ heartbeat (1 แถวต่อรอบ ต่อเครื่อง)
+CREATE TABLE IF NOT EXISTS machine_heartbeats (
+  id BIGSERIAL PRIMARY KEY,
+  machine_id TEXT NOT NULL,
+  payload JSONB NOT NULL,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_machine_heartbeats_machine_created
+  ON machine_heartbeats(machine_id, created_at DESC);
+
+-- ปิด RLS (ใช้ผ่าน service role เท่านั้น)
+ALTER TABLE machine_heartbeats DISABLE ROW LEVEL SECURITY;
+
+-- (optional) ล้างประวัติที่เก่ากว่า 14 วัน
+-- DELETE FROM machine_heartbeats WHERE created_at < NOW() - INTERVAL '14 days';
@@ -0,0 +1,11 @@
+-- =====================================================
+-- MIGRATION: point_history composite index
+-- ประวัติของผู้ใช้เรียงใหม่ -> เก่า อ่านจาก index ตรงๆ (ไม่ต้อง sort ทุก request)
+-- และรองรับ keyset pagination ด้วย cursor (created_at, id) ใน /api/getHistory
+-- =====================================================
+
+CREATE INDEX IF NOT EXISTS idx_point_history_user_created
+  ON point_history(user_id, created_at DESC, id DESC);
+
+-- index เดิม (user_id อย่างเดียว) ซ้ำกับ prefix ของ index ใหม่
+DROP INDEX IF EXISTS idx_point_history_user_id;
@@ -0,0 +1,21 @@
+-- =====================================================
+-- MIGRATION: point_requests Table
+-- กันการบวกแต้มซ้ำเมื่อเครื่องส่งรายการเดิมซ้ำ (retry จาก outbox)
+-- =====================================================
+
+-- เก็บ idempotency key ของทุกคำขอเพิ่มแต้มที่สำเร็จแล้ว
+CREATE TABLE IF NOT EXISTS point_requests (
+  idempotency_key TEXT PRIMARY KEY,
+  user_id UUID REFERENCES users(id) ON DELETE CASCADE,
+  points INT NOT NULL,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Index สำหรับล้างข้อมูลเก่า
+CREATE INDEX IF NOT EXISTS idx_point_requests_created_at ON point_requests(created_at);
+
+-- ปิด RLS (ใช้ผ่าน service role เท่านั้น)
+ALTER TABLE point_requests DISABLE ROW LEVEL SECURITY;
+
+-- (optional) ล้าง key ที่เก่ากว่า 30 วัน
+-- DELETE FROM point_requests WHERE created_at < NOW() - INTERVAL '30 days';
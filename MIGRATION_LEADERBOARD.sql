@@ -0,0 +1,113 @@
+-- =====================================================
+-- MIGRATION: leaderboard_scores + get_leaderboard()
+-- แต้มที่ได้ต่อช่วงเวลา (ทั้งหมด / เดือนนี้ / สัปดาห์นี้) อัพเดทโดย trigger
+-- ทุกครั้งที่บันทึก point_history - หน้า leaderboard อ่าน index เดียว ไม่ต้อง sort ทั้งตาราง
+-- ต้องรันหลัง MIGRATION_POINTS_SUMMARY.sql
+-- =====================================================
+
+-- period: 'all' (period_start = 1970-01-01), 'month', 'week' (เวลาไทย)
+CREATE TABLE IF NOT EXISTS leaderboard_scores (
+  period TEXT NOT NULL CHECK (period IN ('all', 'month', 'week')),
+  period_start DATE NOT NULL,
+  user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  points BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  PRIMARY KEY (period, period_start, user_id)
+);
+
+-- อ่าน top N ของช่วงเวลาหนึ่ง = index scan อย่างเดียว
+CREATE INDEX IF NOT EXISTS idx_leaderboard_rank
+  ON leaderboard_scores(period, period_start, points DESC, user_id);
+
+-- เปิด RLS แบบไม่มี policy: anon / authenticated อ่านเขียนตรงไม่ได้
+-- เขียนได้จาก trigger (SECURITY DEFINER) เท่านั้น, อ่านผ่าน get_leaderboard()
+ALTER TABLE leaderboard_scores ENABLE ROW LEVEL SECURITY;
+REVOKE INSERT, UPDATE, DELETE ON leaderboard_scores FROM anon, authenticated;
+
+-- วันเริ่มต้นของช่วงเวลา (ตามเวลาไทย)
+CREATE OR REPLACE FUNCTION leaderboard_period_start(p_period TEXT, p_at TIMESTAMP WITH TIME ZONE DEFAULT NOW())
+RETURNS DATE
+LANGUAGE sql STABLE
+AS $$
+  SELECT CASE p_period
+    WHEN 'month' THEN date_trunc('month', p_at AT TIME ZONE 'Asia/Bangkok')::DATE
+    WHEN 'week' THEN date_trunc('week', p_at AT TIME ZONE 'Asia/Bangkok')::DATE
+    ELSE DATE '1970-01-01'
+  END;
+$$;
+
+-- บวกแต้มที่ได้ (เฉพาะแต้มบวก) เข้าทุกช่วงเวลา - 1 ครั้งต่อ statement
+CREATE OR REPLACE FUNCTION leaderboard_on_history_insert()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  INSERT INTO leaderboard_scores AS l (period, period_start, user_id, points, updated_at)
+  SELECT p.period, leaderboard_period_start(p.period, n.created_at), n.user_id, SUM(n.points), NOW()
+  FROM new_rows n
+  CROSS JOIN (VALUES ('all'), ('month'), ('week')) AS p(period)
+  WHERE n.points > 0 AND n.user_id IS NOT NULL
+  GROUP BY 1, 2, 3
+  ON CONFLICT (period, period_start, user_id) DO UPDATE
+  SET points = l.points + EXCLUDED.points,
+      updated_at = NOW();
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_leaderboard_history_insert ON point_history;
+CREATE TRIGGER trg_leaderboard_history_insert
+AFTER INSERT ON point_history
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION leaderboard_on_history_insert();
+
+-- เติมค่าจากประวัติที่มีอยู่ (รันซ้ำได้ - คำนวณใหม่ทั้งหมด)
+INSERT INTO leaderboard_scores AS l (period, period_start, user_id, points, updated_at)
+SELECT p.period, leaderboard_period_start(p.period, h.created_at), h.user_id, SUM(h.points), NOW()
+FROM point_history h
+CROSS JOIN (VALUES ('all'), ('month'), ('week')) AS p(period)
+WHERE h.points > 0 AND h.user_id IS NOT NULL
+  AND (p.period = 'all' OR h.created_at >= NOW() - INTERVAL '1 month')
+GROUP BY 1, 2, 3
+ON CONFLICT (period, period_start, user_id) DO UPDATE
+SET points = EXCLUDED.points,
+    updated_at = NOW();
+
+-- top N ของช่วงเวลาปัจจุบัน (join users แค่ N แถว)
+-- เบอร์โทรถูกปิดบางส่วน (อ่านได้จาก anon)
+CREATE OR REPLACE FUNCTION get_leaderboard(p_period TEXT DEFAULT 'all', p_limit INT DEFAULT 10)
+RETURNS TABLE (
+  rank BIGINT,
+  user_id UUID,
+  username TEXT,
+  phone TEXT,
+  points BIGINT
+)
+LANGUAGE sql STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  SELECT
+    ROW_NUMBER() OVER (ORDER BY l.points DESC, l.user_id) AS rank,
+    l.user_id,
+    u.username,
+    left(u.phone, 3) || '****' || right(u.phone, 3) AS phone,
+    l.points
+  FROM (
+    SELECT s.user_id, s.points
+    FROM leaderboard_scores s
+    WHERE s.period = p_period
+      AND s.period_start = leaderboard_period_start(p_period)
+    ORDER BY s.points DESC, s.user_id
+    LIMIT LEAST(GREATEST(p_limit, 1), 100)
+  ) l
+  JOIN users u ON u.id = l.user_id
+  ORDER BY l.points DESC, l.user_id;
+$$;
+
+GRANT EXECUTE ON FUNCTION get_leaderboard(TEXT, INT) TO anon, authenticated;
+
+-- (optional) ล้างช่วงเวลาที่ผ่านไปนานแล้ว
+-- DELETE FROM leaderboard_scores WHERE period <> 'all' AND period_start < NOW() - INTERVAL '6 months';
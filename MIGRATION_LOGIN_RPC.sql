@@ -0,0 +1,23 @@
+-- =====================================================
+-- MIGRATION: Single-query kiosk login
+-- ผู้ใช้ + แต้ม ใน query เดียว (idx_users_phone + PK ของ user_points)
+-- ใช้โดย POST /api/loginPhone แทน getUserByPhone + getUserPoints (2 round trip)
+-- =====================================================
+
+-- คืนค่า: { user: แถว users, points: int } หรือ NULL ถ้าไม่พบเบอร์
+CREATE OR REPLACE FUNCTION login_by_phone(p_phone TEXT)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT jsonb_build_object(
+    'user', to_jsonb(u),
+    'points', COALESCE(p.points, 0)
+  )
+  FROM users u
+  LEFT JOIN user_points p ON p.user_id = u.id
+  WHERE u.phone = p_phone;
+$$;
+
+-- เรียกได้เฉพาะ service role (API routes) - ไม่ให้ไล่เดาเบอร์จาก client
+REVOKE EXECUTE ON FUNCTION login_by_phone(TEXT) FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,161 @@
+-- =====================================================
+-- MIGRATION: points_summary + get_points_stats()
+-- สถิติแต้มรวม (dashboard / หน้าแรก) แบบ O(1) ไม่ต้องดึง user_points ทุกแถว
+-- trigger บน user_points / point_history อัพเดทยอดรวมทุกครั้งที่บวกแต้ม
+-- =====================================================
+
+-- ยอดรวมแบ่งเป็น 16 slot (เลือกตาม user_id) - บวกแต้มพร้อมกันหลายเครื่อง
+-- จะไม่แย่ง lock แถวเดียวกัน; get_points_stats() รวม 16 แถว
+CREATE TABLE IF NOT EXISTS points_summary (
+  slot SMALLINT PRIMARY KEY,
+  total_points BIGINT NOT NULL DEFAULT 0,
+  user_count INTEGER NOT NULL DEFAULT 0,
+  item_count BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- เปิด RLS แบบไม่มี policy: anon / authenticated อ่านเขียนตรงไม่ได้
+-- เขียนได้จาก trigger (SECURITY DEFINER) เท่านั้น, อ่านผ่าน get_points_stats()
+ALTER TABLE points_summary ENABLE ROW LEVEL SECURITY;
+REVOKE INSERT, UPDATE, DELETE ON points_summary FROM anon, authenticated;
+
+INSERT INTO points_summary (slot)
+SELECT generate_series(0, 15)
+ON CONFLICT (slot) DO NOTHING;
+
+-- max / min ใช้ index (ไม่ต้อง scan ทั้งตาราง)
+CREATE INDEX IF NOT EXISTS idx_user_points_points ON user_points(points);
+
+CREATE OR REPLACE FUNCTION points_summary_slot(p_user_id UUID)
+RETURNS SMALLINT
+LANGUAGE sql IMMUTABLE
+AS $$
+  SELECT (abs(hashtext(p_user_id::TEXT)) % 16)::SMALLINT;
+$$;
+
+-- user_points: ยอดแต้มรวม + จำนวนผู้ใช้
+CREATE OR REPLACE FUNCTION points_summary_on_user_points()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    UPDATE points_summary
+    SET total_points = total_points + COALESCE(NEW.points, 0),
+        user_count = user_count + 1,
+        updated_at = NOW()
+    WHERE slot = points_summary_slot(NEW.user_id);
+  ELSIF TG_OP = 'DELETE' THEN
+    UPDATE points_summary
+    SET total_points = total_points - COALESCE(OLD.points, 0),
+        user_count = user_count - 1,
+        updated_at = NOW()
+    WHERE slot = points_summary_slot(OLD.user_id);
+  ELSIF NEW.points IS DISTINCT FROM OLD.points THEN
+    UPDATE points_summary
+    SET total_points = total_points + COALESCE(NEW.points, 0) - COALESCE(OLD.points, 0),
+        updated_at = NOW()
+    WHERE slot = points_summary_slot(NEW.user_id);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_points_summary_user_points ON user_points;
+CREATE TRIGGER trg_points_summary_user_points
+AFTER INSERT OR UPDATE OF points OR DELETE ON user_points
+FOR EACH ROW EXECUTE FUNCTION points_summary_on_user_points();
+
+-- point_history: จำนวนชิ้นที่รีไซเคิล (นับทั้ง statement - batch 1 ครั้ง = UPDATE 1 ครั้ง)
+CREATE OR REPLACE FUNCTION points_summary_on_history_insert()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  UPDATE points_summary s
+  SET item_count = s.item_count + n.items,
+      updated_at = NOW()
+  FROM (
+    SELECT points_summary_slot(user_id) AS slot, COUNT(*) AS items
+    FROM new_rows
+    GROUP BY 1
+  ) n
+  WHERE s.slot = n.slot;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION points_summary_on_history_delete()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  UPDATE points_summary s
+  SET item_count = s.item_count - o.items,
+      updated_at = NOW()
+  FROM (
+    SELECT points_summary_slot(user_id) AS slot, COUNT(*) AS items
+    FROM old_rows
+    GROUP BY 1
+  ) o
+  WHERE s.slot = o.slot;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_points_summary_history_insert ON point_history;
+CREATE TRIGGER trg_points_summary_history_insert
+AFTER INSERT ON point_history
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION points_summary_on_history_insert();
+
+DROP TRIGGER IF EXISTS trg_points_summary_history_delete ON point_history;
+CREATE TRIGGER trg_points_summary_history_delete
+AFTER DELETE ON point_history
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION points_summary_on_history_delete();
+
+-- เติมค่าเริ่มต้นจากข้อมูลที่มีอยู่ (รันซ้ำได้)
+UPDATE points_summary s
+SET total_points = COALESCE(p.total_points, 0),
+    user_count = COALESCE(p.user_count, 0),
+    item_count = COALESCE(h.item_count, 0),
+    updated_at = NOW()
+FROM generate_series(0, 15) AS g(slot)
+LEFT JOIN (
+  SELECT points_summary_slot(user_id) AS slot, SUM(points) AS total_points, COUNT(*) AS user_count
+  FROM user_points GROUP BY 1
+) p ON p.slot = g.slot
+LEFT JOIN (
+  SELECT points_summary_slot(user_id) AS slot, COUNT(*) AS item_count
+  FROM point_history GROUP BY 1
+) h ON h.slot = g.slot
+WHERE s.slot = g.slot;
+
+-- สถิติรวม: { total_points, user_count, average_points, max_points, min_points, item_count }
+CREATE OR REPLACE FUNCTION get_points_stats()
+RETURNS JSONB
+LANGUAGE sql STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  SELECT jsonb_build_object(
+    'total_points', COALESCE(SUM(total_points), 0),
+    'user_count', COALESCE(SUM(user_count), 0),
+    'average_points', CASE WHEN SUM(user_count) > 0
+      THEN FLOOR(SUM(total_points)::NUMERIC / SUM(user_count)) ELSE 0 END,
+    'max_points', COALESCE((SELECT MAX(points) FROM user_points), 0),
+    'min_points', COALESCE((SELECT MIN(points) FROM user_points), 0),
+    'item_count', COALESCE(SUM(item_count), 0)
+  )
+  FROM points_summary;
+$$;
+
+-- อ่านได้จากหน้าแรก (anon) - คืนแค่ตัวเลขรวม
+GRANT EXECUTE ON FUNCTION get_points_stats() TO anon, authenticated;
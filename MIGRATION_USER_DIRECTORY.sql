@@ -0,0 +1,7 @@
+-- =====================================================
+-- MIGRATION: Index สำหรับ sync รายชื่อผู้ใช้ลงเครื่อง kiosk
+-- ใช้กับ GET /api/userDirectory (เรียงตาม updated_at, user_id)
+-- =====================================================
+
+CREATE INDEX IF NOT EXISTS idx_user_points_updated_at
+  ON user_points(updated_at, user_id);
@@ -1,40 +1,31 @@
 import { NextRequest, NextResponse } from 'next/server'
-import { addPoints, supabaseAdmin } from '@/lib/supabase'
-
-// Default pricing
-const DEFAULT_PRICING = {
-  glass: { points: 5 },
-  plastic: { points: 3 },
-  can: { points: 4 },
-}
-
-/**
- * ดึงค่า pricing จาก database
- */
-async function getPricing() {
-  try {
-    const { data } = await supabaseAdmin
-      .from('machine_settings')
-      .select('value')
-      .eq('key', 'pricing')
-      .single()
-    
-    return data?.value || DEFAULT_PRICING
-  } catch {
-    return DEFAULT_PRICING
-  }
-}
+import {
+  creditPoints,
+  DEFAULT_PRICING,
+  getBottleType,
+  getPricing,
+  HAS_SERVICE_KEY,
+  normalizeMachineId,
+  SERVICE_KEY_MISSING
+} from '@/lib/supabase'
 
 /**
  * POST /api/addPoint
  * เพิ่มคะแนนให้ผู้ใช้ พร้อมบันทึกประวัติการรีไซเคิล
- * Request: { user_id: string, points?: number, label?: string }
+ * Request: { user_id: string, points?: number, label?: string, idempotency_key?: string, machine_id?: string }
  * - ถ้าส่ง label มา จะใช้ค่าจาก pricing config
  * - ถ้าส่ง points มา จะใช้ค่านั้นตรงๆ
+ * - ถ้าส่ง idempotency_key ซ้ำ จะตอบสำเร็จโดยไม่บวกแต้มซ้ำ (duplicate: true)
+ * - machine_id = DEVICE_ID ของเครื่อง (นับขวดในแถวของเครื่องนั้น, ไม่ส่ง = 'main')
+ * - ไม่ได้ตั้ง SUPABASE_SERVICE_ROLE_KEY ตอบ 503
  */
 export async function POST(req: NextRequest) {
+  if (!HAS_SERVICE_KEY) {
+    return NextResponse.json({ error: SERVICE_KEY_MISSING }, { status: 503 })
+  }
+
   try {
-    const { user_id, points: inputPoints, label } = await req.json()
+    const { user_id, points: inputPoints, label, idempotency_key, machine_id } = await req.json()
 
     if (!user_id) {
       return NextResponse.json(
@@ -43,22 +34,24 @@ export async function POST(req: NextRequest) {
       )
     }
 
-    // ดึง pricing จาก database
-    const pricing = await getPricing()
+    const machineId = normalizeMachineId(machine_id)
+    if (!machineId) {
+      return NextResponse.json(
+        { error: 'Invalid machine_id' },
+        { status: 400 }
+      )
+    }
+
+    // ดึง pricing (cache ใน process - ไม่ query ทุกชิ้น)
+    const pricing = await getPricing().catch(() => DEFAULT_PRICING)
     
     // คำนวณ points
     let pointsToAdd = inputPoints
-    
+    const bottleType = label ? getBottleType(label) : null
+
     // ถ้ามี label ให้ใช้ค่าจาก pricing
-    if (label) {
-      const labelLower = label.toLowerCase()
-      if (labelLower.includes('glass')) {
-        pointsToAdd = pricing.glass?.points || DEFAULT_PRICING.glass.points
-      } else if (labelLower.includes('plastic')) {
-        pointsToAdd = pricing.plastic?.points || DEFAULT_PRICING.plastic.points
-      } else if (labelLower.includes('can') || labelLower.includes('aluminum')) {
-        pointsToAdd = pricing.can?.points || DEFAULT_PRICING.can.points
-      }
+    if (bottleType) {
+      pointsToAdd = pricing[bottleType]?.points || DEFAULT_PRICING[bottleType].points
     }
 
     if (!pointsToAdd || pointsToAdd <= 0) {
@@ -68,45 +61,33 @@ export async function POST(req: NextRequest) {
       )
     }
 
-    // ส่ง label เพื่อบันทึกลง point_history
-    const result = await addPoints(user_id, pointsToAdd, label || null)
+    const bottleDeltas: { glass?: number; plastic?: number; can?: number } = {}
+    if (bottleType) {
+      bottleDeltas[bottleType] = 1
+    }
 
-    // เพิ่มจำนวนขวดใน machine_status ตามประเภท
-    if (label) {
-      const labelLower = label.toLowerCase()
-      let columnToUpdate = ''
-      
-      if (labelLower.includes('glass')) {
-        columnToUpdate = 'glass_count'
-      } else if (labelLower.includes('plastic')) {
-        columnToUpdate = 'plastic_count'
-      } else if (labelLower.includes('can') || labelLower.includes('aluminum')) {
-        columnToUpdate = 'can_count'
-      }
-      
-      if (columnToUpdate) {
-        // ดึงค่าปัจจุบัน
-        const { data: current } = await supabaseAdmin
-          .from('machine_status')
-          .select('glass_count, plastic_count, can_count')
-          .eq('machine_id', 'main')
-          .single()
-        
-        const counts = current as { glass_count?: number; plastic_count?: number; can_count?: number } | null
-        let currentCount = 0
-        if (columnToUpdate === 'glass_count') currentCount = counts?.glass_count || 0
-        else if (columnToUpdate === 'plastic_count') currentCount = counts?.plastic_count || 0
-        else if (columnToUpdate === 'can_count') currentCount = counts?.can_count || 0
-        
-        // อัปเดตเพิ่ม 1
-        await supabaseAdmin
-          .from('machine_status')
-          .update({ 
-            [columnToUpdate]: currentCount + 1,
-            updated_at: new Date().toISOString()
-          })
-          .eq('machine_id', 'main')
+    // จอง idempotency key + บวกแต้ม + บันทึกประวัติ + นับขวด ใน RPC เดียว (atomic)
+    const { duplicate, data: result } = await creditPoints(
+      user_id,
+      [{ item_type: label || null, points: pointsToAdd }],
+      {
+        machine_id: machineId,
+        bottles: bottleDeltas,
+        idempotency_key
       }
+    )
+
+    // key นี้เคยบวกแต้มไปแล้ว
+    if (duplicate) {
+      return NextResponse.json(
+        {
+          success: true,
+          duplicate: true,
+          message: `Request ${idempotency_key} already processed`,
+          pricing_used: { label, points: pointsToAdd }
+        },
+        { status: 200 }
+      )
     }
 
     return NextResponse.json(
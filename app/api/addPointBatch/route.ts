@@ -0,0 +1,131 @@
+import { NextRequest, NextResponse } from 'next/server'
+import {
+  creditPoints,
+  getBottleType,
+  getPricing,
+  HAS_SERVICE_KEY,
+  normalizeMachineId,
+  SERVICE_KEY_MISSING
+} from '@/lib/supabase'
+
+// จำนวนชิ้นสูงสุดต่อ 1 request
+const MAX_ITEMS = 200
+
+interface BatchItem {
+  label: string
+  count: number
+}
+
+/**
+ * POST /api/addPointBatch
+ * เพิ่มคะแนนหลายชิ้นในครั้งเดียว (ทั้ง session) พร้อมบันทึกประวัติ
+ * Request: { user_id: string, items: { label: string, count: number }[], idempotency_key?: string, machine_id?: string }
+ * - คิดแต้มจาก pricing config ต่อ label (ดึง pricing ครั้งเดียวต่อ request)
+ * - ถ้าส่ง idempotency_key ซ้ำ จะตอบสำเร็จโดยไม่บวกแต้มซ้ำ (duplicate: true)
+ * Response: { success, data, total_points, items: { label, count, points }[] }
+ * - ไม่ได้ตั้ง SUPABASE_SERVICE_ROLE_KEY ตอบ 503
+ */
+export async function POST(req: NextRequest) {
+  if (!HAS_SERVICE_KEY) {
+    return NextResponse.json({ error: SERVICE_KEY_MISSING }, { status: 503 })
+  }
+
+  try {
+    const { user_id, items, idempotency_key, machine_id } = await req.json()
+
+    if (!user_id) {
+      return NextResponse.json(
+        { error: 'user_id is required' },
+        { status: 400 }
+      )
+    }
+
+    if (!Array.isArray(items) || items.length === 0) {
+      return NextResponse.json(
+        { error: 'items must be a non-empty array' },
+        { status: 400 }
+      )
+    }
+
+    const machineId = normalizeMachineId(machine_id)
+    if (!machineId) {
+      return NextResponse.json(
+        { error: 'Invalid machine_id' },
+        { status: 400 }
+      )
+    }
+
+    // ดึง pricing จาก database ครั้งเดียว
+    const pricing = await getPricing()
+
+    const entries: { item_type: string; points: number }[] = []
+    const bottleDeltas: { glass?: number; plastic?: number; can?: number } = {}
+    const pricingUsed: { label: string; count: number; points: number }[] = []
+
+    for (const item of items as BatchItem[]) {
+      const count = Number(item?.count)
+      const type = item?.label ? getBottleType(item.label) : null
+      const points = type ? pricing[type]?.points : 0
+
+      if (!type || !Number.isInteger(count) || count <= 0 || !points || points <= 0) {
+        return NextResponse.json(
+          { error: `Invalid item: ${JSON.stringify(item)}` },
+          { status: 400 }
+        )
+      }
+
+      for (let i = 0; i < count; i++) {
+        entries.push({ item_type: item.label, points })
+      }
+      bottleDeltas[type] = (bottleDeltas[type] || 0) + count
+      pricingUsed.push({ label: item.label, count, points })
+    }
+
+    if (entries.length > MAX_ITEMS) {
+      return NextResponse.json(
+        { error: `Too many items (max ${MAX_ITEMS})` },
+        { status: 400 }
+      )
+    }
+
+    const totalPoints = entries.reduce((sum, entry) => sum + entry.points, 0)
+
+    // จอง idempotency key + บวกแต้ม + บันทึกประวัติ + นับขวด ใน RPC เดียว (atomic)
+    const { duplicate, data: result } = await creditPoints(user_id, entries, {
+      machine_id: machineId,
+      bottles: bottleDeltas,
+      idempotency_key
+    })
+
+    // key นี้เคยบวกแต้มไปแล้ว
+    if (duplicate) {
+      return NextResponse.json(
+        {
+          success: true,
+          duplicate: true,
+          message: `Request ${idempotency_key} already processed`,
+          total_points: totalPoints,
+          items: pricingUsed
+        },
+        { status: 200 }
+      )
+    }
+
+    return NextResponse.json(
+      {
+        success: true,
+        data: result,
+        message: `Added ${totalPoints} points to user ${user_id}`,
+        total_points: totalPoints,
+        items: pricingUsed
+      },
+      { status: 200 }
+    )
+  } catch (error) {
+    console.error('Add points batch error:', error)
+    return NextResponse.json(
+      { error: 'Internal server error' },
+      { status: 500 }
+    )
+  }
+}
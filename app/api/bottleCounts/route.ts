@@ -1,15 +1,40 @@
 import { NextRequest, NextResponse } from 'next/server'
-import { supabaseAdmin, getBottleCounts } from '@/lib/supabase'
+import {
+  supabaseAdmin,
+  getBottleCounts,
+  getFleetBottleCounts,
+  HAS_SERVICE_KEY,
+  incrementBottleCounts,
+  normalizeMachineId,
+  SERVICE_KEY_MISSING
+} from '@/lib/supabase'
 
 // GET - ดึงจำนวนขวดแต่ละประเภทจาก machine_status
-export async function GET() {
+// ?machine_id=xxx = เครื่องเดียว, ไม่ระบุ = รวมทุกเครื่อง (มี machines เพิ่ม)
+export async function GET(request: NextRequest) {
   try {
-    const counts = await getBottleCounts('main')
+    const param = request.nextUrl.searchParams.get('machine_id')
+    if (param) {
+      const machineId = normalizeMachineId(param)
+      if (!machineId) {
+        return NextResponse.json({ error: 'Invalid machine_id' }, { status: 400 })
+      }
+      const counts = await getBottleCounts(machineId)
+      return NextResponse.json({
+        success: true,
+        machine_id: machineId,
+        counts,
+        total: counts.total
+      })
+    }
+
+    const { machines, ...counts } = await getFleetBottleCounts()
 
     return NextResponse.json({
       success: true,
       counts,
-      total: counts.total
+      total: counts.total,
+      machines
     })
   } catch (err) {
     console.error('Error:', err)
@@ -18,14 +43,20 @@ export async function GET() {
 }
 
 // POST - รีเซ็ตจำนวนขวด หรือเพิ่มจำนวน
+// machine_id = เครื่องที่ทำ (increment ไม่ระบุ = 'main', reset_all ไม่ระบุ = ทุกเครื่อง)
 export async function POST(request: NextRequest) {
   try {
     const body = await request.json()
-    const { action, bottle_type } = body
+    const { action, bottle_type, machine_id } = body
+
+    const machineId = normalizeMachineId(machine_id)
+    if (!machineId) {
+      return NextResponse.json({ error: 'Invalid machine_id' }, { status: 400 })
+    }
 
     if (action === 'reset_all') {
-      // รีเซ็ตจำนวนขวดทั้งหมด
-      const { error } = await supabaseAdmin
+      // รีเซ็ตจำนวนขวดทั้งหมด (ของเครื่องที่ระบุ หรือทุกเครื่อง)
+      let query = supabaseAdmin
         .from('machine_status')
         .update({ 
           glass_count: 0,
@@ -35,7 +66,8 @@ export async function POST(request: NextRequest) {
           storage_used: 0,
           updated_at: new Date().toISOString()
         })
-        .eq('machine_id', 'main')
+      query = machine_id ? query.eq('machine_id', machineId) : query.not('machine_id', 'is', null)
+      const { error } = await query
 
       if (error) {
         console.error('Error resetting bottle counts:', error)
@@ -46,50 +78,32 @@ export async function POST(request: NextRequest) {
       await supabaseAdmin.from('activity_logs').insert({
         user_id: null,
         action: 'bottle_reset',
-        details: 'Reset all bottle counts'
+        details: machine_id ? `Reset bottle counts (${machineId})` : 'Reset all bottle counts'
       })
 
       return NextResponse.json({ success: true, message: 'Reset all bottle counts successfully' })
     }
 
     if (action === 'increment' && bottle_type) {
-      // เพิ่มจำนวนขวดตามประเภท
-      const columnMap: Record<string, string> = {
-        glass: 'glass_count',
-        plastic: 'plastic_count',
-        can: 'can_count'
+      // increment_bottle_counts เรียกได้เฉพาะ service role
+      if (!HAS_SERVICE_KEY) {
+        return NextResponse.json({ error: SERVICE_KEY_MISSING }, { status: 503 })
       }
-      
-      const column = columnMap[bottle_type.toLowerCase()]
-      if (!column) {
+
+      // เพิ่มจำนวนขวดตามประเภท (atomic บน database)
+      const type = bottle_type.toLowerCase() as 'glass' | 'plastic' | 'can'
+      if (!['glass', 'plastic', 'can'].includes(type)) {
         return NextResponse.json({ error: 'Invalid bottle type' }, { status: 400 })
       }
 
-      // ดึงค่าปัจจุบัน
-      const { data: current } = await supabaseAdmin
-        .from('machine_status')
-        .select('glass_count, plastic_count, can_count')
-        .eq('machine_id', 'main')
-        .single()
+      const deltas: { glass?: number; plastic?: number; can?: number } = {}
+      deltas[type] = 1
 
-      const counts = current as { glass_count?: number; plastic_count?: number; can_count?: number } | null
-      let currentCount = 0
-      if (column === 'glass_count') currentCount = counts?.glass_count || 0
-      else if (column === 'plastic_count') currentCount = counts?.plastic_count || 0
-      else if (column === 'can_count') currentCount = counts?.can_count || 0
-      
-      // อัปเดตเพิ่ม 1
-      const { error } = await supabaseAdmin
-        .from('machine_status')
-        .update({ 
-          [column]: currentCount + 1,
-          updated_at: new Date().toISOString()
-        })
-        .eq('machine_id', 'main')
-
-      if (error) {
+      try {
+        await incrementBottleCounts(machineId, deltas)
+      } catch (error: any) {
         console.error('Error incrementing bottle count:', error)
-        return NextResponse.json({ error: error.message }, { status: 500 })
+        return NextResponse.json({ error: error?.message || 'Increment failed' }, { status: 500 })
       }
 
       return NextResponse.json({ success: true, message: `Incremented ${bottle_type} count` })
@@ -1,14 +1,26 @@
 import { NextRequest, NextResponse } from 'next/server'
-import { supabase } from '@/lib/supabase'
+import { getHistoryPage, parseKeysetCursor } from '@/lib/supabase'
+import { verifySessionToken } from '@/lib/session'
+
+const DEFAULT_LIMIT = 20
+const MAX_LIMIT = 100
 
 /**
- * GET /api/getHistory?user_id=<uuid>
- * ดึงประวัติการรีไซเคิลของผู้ใช้
+ * GET /api/getHistory?user_id=<uuid>&cursor=<created_at|id>&limit=<n>
+ * ดึงประวัติการรีไซเคิลของผู้ใช้ (ใหม่ -> เก่า) ทีละหน้า
+ * - ไม่ส่ง cursor = หน้าแรก (ล่าสุด), ส่ง cursor จาก response ก่อนหน้าเพื่อดึงหน้าถัดไป
+ * - ต้องส่ง Authorization: Bearer <session_token> จาก /api/loginPhone ของ user_id นี้ (ไม่มี/ไม่ตรง ตอบ 401)
+ * Response: { history, count, cursor, has_more }
  */
 export async function GET(req: NextRequest) {
   try {
     const { searchParams } = new URL(req.url)
     const user_id = searchParams.get('user_id')
+    const cursor = searchParams.get('cursor')
+    const limit = Math.min(
+      Math.max(Number(searchParams.get('limit')) || DEFAULT_LIMIT, 1),
+      MAX_LIMIT
+    )
 
     if (!user_id) {
       return NextResponse.json(
@@ -17,23 +29,30 @@ export async function GET(req: NextRequest) {
       )
     }
 
-    const { data, error } = await supabase
-      .from('point_history')
-      .select('*')
-      .eq('user_id', user_id)
-      .order('created_at', { ascending: false })
-      .limit(20)
+    const token = (req.headers.get('authorization') || '').replace(/^Bearer\s+/i, '')
+    if (verifySessionToken(token) !== user_id) {
+      return NextResponse.json(
+        { error: 'Invalid session' },
+        { status: 401 }
+      )
+    }
 
-    if (error) {
-      console.error('Get history error:', error)
+    if (cursor && !parseKeysetCursor(cursor)) {
       return NextResponse.json(
-        { error: error.message },
-        { status: 500 }
+        { error: 'Invalid cursor' },
+        { status: 400 }
       )
     }
 
+    const page = await getHistoryPage(user_id, { cursor, limit })
+
     return NextResponse.json(
-      { history: data, count: data?.length || 0 },
+      {
+        history: page.history,
+        count: page.history.length,
+        cursor: page.cursor,
+        has_more: page.has_more
+      },
       { status: 200 }
     )
   } catch (error) {
@@ -0,0 +1,60 @@
+import { NextRequest, NextResponse } from 'next/server'
+import {
+  HAS_SERVICE_KEY,
+  normalizeMachineId,
+  recordHeartbeat,
+  SERVICE_KEY_MISSING
+} from '@/lib/supabase'
+import { isKioskRequest } from '@/lib/session'
+
+/**
+ * POST /api/heartbeat
+ * รับสถานะเครื่องที่สรุปมาแล้ว 1 ครั้งต่อรอบ (HeartbeatAgent ใน raspberry_pi_app)
+ * Request: { machine_id?, status, cpu_temp, cpu_temp_max, throttled, storage_used,
+ *            inference_ms_avg, inference_ms_p95, bins: { glass, plastic, can }, ... }
+ * Response: { success: true }
+ * - เฉพาะตู้เท่านั้น: ต้องส่ง header X-Kiosk-Key (KIOSK_API_KEY)
+ * - ไม่ได้ตั้ง SUPABASE_SERVICE_ROLE_KEY ตอบ 503
+ */
+export async function POST(req: NextRequest) {
+  if (!HAS_SERVICE_KEY) {
+    return NextResponse.json({ error: SERVICE_KEY_MISSING }, { status: 503 })
+  }
+
+  try {
+    if (!isKioskRequest(req.headers)) {
+      return NextResponse.json(
+        { error: 'Unauthorized' },
+        { status: 401 }
+      )
+    }
+
+    const body = await req.json()
+
+    if (!body || typeof body !== 'object' || Array.isArray(body)) {
+      return NextResponse.json(
+        { error: 'Invalid heartbeat' },
+        { status: 400 }
+      )
+    }
+
+    const { machine_id, ...heartbeat } = body
+    const machineId = normalizeMachineId(machine_id)
+    if (!machineId) {
+      return NextResponse.json(
+        { error: 'Invalid machine_id' },
+        { status: 400 }
+      )
+    }
+
+    await recordHeartbeat(machineId, heartbeat)
+
+    return NextResponse.json({ success: true }, { status: 200 })
+  } catch (error) {
+    console.error('Heartbeat error:', error)
+    return NextResponse.json(
+      { error: 'Internal server error' },
+      { status: 500 }
+    )
+  }
+}
@@ -0,0 +1,44 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { getLeaderboard, LeaderboardPeriod } from '@/lib/supabase'
+
+const PERIODS: LeaderboardPeriod[] = ['all', 'month', 'week']
+const MAX_LIMIT = 100
+
+/**
+ * GET /api/leaderboard?period=all|month|week&limit=10
+ * อันดับผู้ใช้ตามแต้มที่ได้ในช่วงเวลาปัจจุบัน (อ่านจาก leaderboard_scores)
+ * Response: { success, period, leaderboard: { rank, user_id, username, phone, points }[] }
+ * - cache ที่ CDN 30 วินาที (ทุกหน้าจอ/kiosk ใช้ผลเดียวกัน)
+ */
+export async function GET(req: NextRequest) {
+  try {
+    const params = req.nextUrl.searchParams
+    const period = (params.get('period') || 'all') as LeaderboardPeriod
+    const limit = Math.min(Math.max(Number(params.get('limit')) || 10, 1), MAX_LIMIT)
+
+    if (!PERIODS.includes(period)) {
+      return NextResponse.json(
+        { error: 'period must be one of all, month, week' },
+        { status: 400 }
+      )
+    }
+
+    const leaderboard = await getLeaderboard(period, limit)
+
+    return NextResponse.json(
+      { success: true, period, leaderboard },
+      {
+        status: 200,
+        headers: {
+          'Cache-Control': 'public, s-maxage=30, stale-while-revalidate=60'
+        }
+      }
+    )
+  } catch (error) {
+    console.error('Leaderboard error:', error)
+    return NextResponse.json(
+      { error: 'Internal server error' },
+      { status: 500 }
+    )
+  }
+}
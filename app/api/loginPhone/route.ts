@@ -1,15 +1,29 @@
 import { NextRequest, NextResponse } from 'next/server'
-import { getUserByPhone, getUserPoints } from '@/lib/supabase'
+import {
+  getPricingWithVersion,
+  HAS_SERVICE_KEY,
+  loginByPhone,
+  normalizeMachineId,
+  SERVICE_KEY_MISSING
+} from '@/lib/supabase'
+import { createSessionToken } from '@/lib/session'
 
 /**
  * POST /api/loginPhone
- * ค้นหาผู้ใช้จากเบอร์โทรศัพท์
- * Request: { phone: string }
- * Response: { user: object, points: number } หรือ { error: string }
+ * ค้นหาผู้ใช้จากเบอร์โทรศัพท์ (ผู้ใช้ + แต้ม ใน query เดียว)
+ * Request: { phone: string, machine_id?: string }
+ * Response: { user, points, pricing_version, session_token, session_expires_at } หรือ { error: string }
+ * - pricing_version ตรงกับ ETag ของ /api/pricing (ตู้ดึง pricing ใหม่เฉพาะเมื่อไม่ตรง)
+ * - session_token อายุสั้น (HMAC) - null ถ้า server ยังไม่ได้ตั้ง KIOSK_SESSION_SECRET
+ * - ไม่ได้ตั้ง SUPABASE_SERVICE_ROLE_KEY ตอบ 503 (login_by_phone เรียกได้เฉพาะ service role)
  */
 export async function POST(req: NextRequest) {
+  if (!HAS_SERVICE_KEY) {
+    return NextResponse.json({ error: SERVICE_KEY_MISSING }, { status: 503 })
+  }
+
   try {
-    const { phone } = await req.json()
+    const { phone, machine_id } = await req.json()
 
     if (!phone) {
       return NextResponse.json(
@@ -18,19 +32,39 @@ export async function POST(req: NextRequest) {
       )
     }
 
-    const user = await getUserByPhone(phone) as { id: string } | null
+    const machineId = normalizeMachineId(machine_id)
+    if (!machineId) {
+      return NextResponse.json(
+        { error: 'Invalid machine_id' },
+        { status: 400 }
+      )
+    }
+
+    // pricing อ่านจาก cache ใน process - ไม่เพิ่ม query
+    const [login, { version }] = await Promise.all([
+      loginByPhone(phone),
+      getPricingWithVersion()
+    ])
 
-    if (!user) {
+    if (!login) {
       return NextResponse.json(
         { error: 'User not found' },
         { status: 404 }
       )
     }
 
-    // ดึงคะแนนของผู้ใช้
-    const points = await getUserPoints(user.id)
+    const session = createSessionToken(login.user.id, machineId)
 
-    return NextResponse.json({ user, points }, { status: 200 })
+    return NextResponse.json(
+      {
+        user: login.user,
+        points: login.points,
+        pricing_version: version,
+        session_token: session?.token ?? null,
+        session_expires_at: session?.expires_at ?? null
+      },
+      { status: 200 }
+    )
   } catch (error) {
     console.error('Login error:', error)
     return NextResponse.json(
@@ -0,0 +1,85 @@
+import { createHash } from 'crypto'
+import { NextRequest, NextResponse } from 'next/server'
+import { getAllPhones } from '@/lib/supabase'
+import { isKioskRequest } from '@/lib/session'
+
+// อัตรา false positive เป้าหมาย (เบอร์ที่ไม่มีแต่ filter บอกว่า "อาจมี")
+const FALSE_POSITIVE_RATE = 0.01
+const MIN_BITS = 1024
+const MAX_HASHES = 16
+
+/**
+ * สร้าง Bloom filter ของเบอร์โทร
+ * hash ที่ i = (h1 + i * h2) mod m โดย h1, h2 = 4 byte แรก/ถัดไปของ sha256(phone)
+ * (เครื่อง kiosk ต้องคำนวณแบบเดียวกัน - ดู raspberry_pi_app/phone_filter.py)
+ */
+function buildBloomFilter(phones: string[]) {
+  const n = Math.max(phones.length, 1)
+  const rawBits = Math.ceil((-n * Math.log(FALSE_POSITIVE_RATE)) / (Math.LN2 * Math.LN2))
+  const m = Math.max(MIN_BITS, Math.ceil(rawBits / 8) * 8)
+  const k = Math.min(MAX_HASHES, Math.max(1, Math.round((m / n) * Math.LN2)))
+  const bits = new Uint8Array(m / 8)
+
+  for (const phone of phones) {
+    const digest = createHash('sha256').update(phone).digest()
+    const h1 = digest.readUInt32BE(0)
+    const h2 = (digest.readUInt32BE(4) | 1) >>> 0
+    for (let i = 0; i < k; i++) {
+      const index = (h1 + i * h2) % m
+      bits[index >> 3] |= 1 << (index & 7)
+    }
+  }
+
+  return { m, k, bits: Buffer.from(bits).toString('base64') }
+}
+
+/**
+ * GET /api/phoneFilter
+ * Bloom filter ของเบอร์ที่ลงทะเบียนแล้ว สำหรับดาวน์โหลดลงเครื่อง kiosk
+ * - ไม่มีใน filter = ยังไม่ลงทะเบียนแน่นอน (แสดง QR ได้ทันที)
+ * - มีใน filter = อาจลงทะเบียนแล้ว (ต้องถาม /api/loginPhone)
+ * รองรับ If-None-Match (ตอบ 304 ถ้า filter ไม่เปลี่ยน)
+ * - เฉพาะตู้เท่านั้น: ต้องส่ง header X-Kiosk-Key (KIOSK_API_KEY)
+ *   (filter ใช้ตรวจแบบออฟไลน์ได้ว่าเบอร์ไหนลงทะเบียน - ห้ามเปิดสาธารณะ / ห้าม cache ที่ CDN)
+ * Response: { m, k, count, bits (base64), hash: 'sha256' }
+ */
+export async function GET(req: NextRequest) {
+  try {
+    if (!isKioskRequest(req.headers)) {
+      return NextResponse.json(
+        { error: 'Unauthorized' },
+        { status: 401 }
+      )
+    }
+
+    const phones = await getAllPhones()
+    const filter = buildBloomFilter(phones)
+    const etag = `"${createHash('sha1').update(filter.bits).digest('hex')}"`
+
+    const headers = {
+      ETag: etag,
+      'Cache-Control': 'private, no-cache'
+    }
+
+    if (req.headers.get('if-none-match') === etag) {
+      return new NextResponse(null, { status: 304, headers })
+    }
+
+    return NextResponse.json(
+      {
+        m: filter.m,
+        k: filter.k,
+        count: phones.length,
+        bits: filter.bits,
+        hash: 'sha256'
+      },
+      { status: 200, headers }
+    )
+  } catch (error) {
+    console.error('Phone filter error:', error)
+    return NextResponse.json(
+      { error: 'Internal server error' },
+      { status: 500 }
+    )
+  }
+}
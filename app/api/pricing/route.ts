@@ -1,26 +1,33 @@
 import { NextRequest, NextResponse } from 'next/server'
-import { getPricing, supabaseAdmin } from '@/lib/supabase'
-
-// Default pricing config
-const DEFAULT_PRICING = {
-  glass: { points: 5, name: 'ขวดแก้ว', emoji: '🍾' },
-  plastic: { points: 3, name: 'ขวดพลาสติก', emoji: '🥤' },
-  can: { points: 4, name: 'กระป๋อง', emoji: '🥫' },
-  points_per_baht: 100, // 100 แต้ม = 1 บาท
-  min_withdrawal: 100, // ขั้นต่ำถอน 100 แต้ม
-}
+import {
+  DEFAULT_PRICING,
+  getPricingWithVersion,
+  invalidatePricingCache,
+  supabaseAdmin
+} from '@/lib/supabase'
 
 /**
  * GET - ดึงค่า pricing ปัจจุบัน
+ * ส่ง ETag (version ของ pricing) - ถ้า If-None-Match ตรงจะตอบ 304 ไม่มี body
  */
-export async function GET() {
+export async function GET(request: NextRequest) {
   try {
-    const pricing = await getPricing()
+    const { pricing, version } = await getPricingWithVersion()
+    const etag = `"${version}"`
+    const headers = { ETag: etag, 'Cache-Control': 'no-cache' }
 
-    return NextResponse.json({
-      success: true,
-      pricing
-    })
+    if (request.headers.get('if-none-match') === etag) {
+      return new NextResponse(null, { status: 304, headers })
+    }
+
+    return NextResponse.json(
+      {
+        success: true,
+        pricing,
+        version
+      },
+      { headers }
+    )
   } catch (error) {
     console.error('Pricing GET error:', error)
     return NextResponse.json({
@@ -73,6 +80,8 @@ export async function POST(request: NextRequest) {
       )
     }
 
+    invalidatePricingCache()
+
     return NextResponse.json({
       success: true,
       message: 'Pricing updated successfully',
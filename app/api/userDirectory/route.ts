@@ -0,0 +1,95 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { supabaseAdmin, parseKeysetCursor } from '@/lib/supabase'
+import { isKioskRequest } from '@/lib/session'
+
+const DEFAULT_LIMIT = 500
+const MAX_LIMIT = 1000
+
+/**
+ * GET /api/userDirectory?cursor=<updated_at|user_id>&limit=<n>
+ * ดึงรายชื่อผู้ใช้ + แต้มที่เปลี่ยนหลัง cursor (สำหรับ sync ลงเครื่อง kiosk)
+ * - เรียงตาม (updated_at, user_id) ของ user_points
+ * - ไม่ส่ง cursor = ดึงตั้งแต่ต้น
+ * - เฉพาะตู้เท่านั้น: ต้องส่ง header X-Kiosk-Key (KIOSK_API_KEY)
+ * Response: { users: { id, phone, username, points, updated_at }[], cursor, has_more }
+ */
+export async function GET(req: NextRequest) {
+  try {
+    if (!isKioskRequest(req.headers)) {
+      return NextResponse.json(
+        { error: 'Unauthorized' },
+        { status: 401 }
+      )
+    }
+
+    const { searchParams } = new URL(req.url)
+    const cursor = searchParams.get('cursor')
+    const limit = Math.min(
+      Math.max(Number(searchParams.get('limit')) || DEFAULT_LIMIT, 1),
+      MAX_LIMIT
+    )
+
+    let query = supabaseAdmin
+      .from('user_points')
+      .select('user_id, points, updated_at, users (id, phone, username)')
+      .order('updated_at', { ascending: true })
+      .order('user_id', { ascending: true })
+      .limit(limit)
+
+    if (cursor) {
+      const after = parseKeysetCursor(cursor)
+      if (!after) {
+        return NextResponse.json(
+          { error: 'Invalid cursor' },
+          { status: 400 }
+        )
+      }
+      query = query.or(
+        `updated_at.gt."${after.at}",and(updated_at.eq."${after.at}",user_id.gt.${after.id})`
+      )
+    }
+
+    const { data, error } = await query
+
+    if (error) {
+      console.error('User directory error:', error)
+      return NextResponse.json(
+        { error: error.message },
+        { status: 500 }
+      )
+    }
+
+    const rows = (data || []) as unknown as {
+      user_id: string
+      points: number
+      updated_at: string
+      users: { id: string; phone: string; username: string } | null
+    }[]
+
+    const users = rows
+      .filter(row => row.users)
+      .map(row => ({
+        id: row.user_id,
+        phone: row.users!.phone,
+        username: row.users!.username,
+        points: row.points || 0,
+        updated_at: row.updated_at
+      }))
+
+    const last = rows[rows.length - 1]
+    return NextResponse.json(
+      {
+        users,
+        cursor: last ? `${last.updated_at}|${last.user_id}` : cursor,
+        has_more: rows.length === limit
+      },
+      { status: 200 }
+    )
+  } catch (error) {
+    console.error('User directory error:', error)
+    return NextResponse.json(
+      { error: 'Internal server error' },
+      { status: 500 }
+    )
+  }
+}
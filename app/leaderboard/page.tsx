@@ -3,13 +3,13 @@
 import { useEffect, useState } from 'react'
 import { motion } from 'framer-motion'
 import { useUserStore } from '@/store/userStore'
-import { getTopUsers, getTotalPointsStats, getUserPoints } from '@/lib/supabase'
-import { User } from '@/lib/supabase'
+import { getTotalPointsStats, LeaderboardEntry, LeaderboardPeriod } from '@/lib/supabase'
 
-interface UserWithPoints extends User {
-  points: number
-  rank?: number
-}
+const PERIOD_TABS: { value: LeaderboardPeriod; label: string }[] = [
+  { value: 'all', label: 'ทั้งหมด' },
+  { value: 'month', label: 'เดือนนี้' },
+  { value: 'week', label: 'สัปดาห์นี้' }
+]
 
 interface PointsStats {
   totalPoints: number
@@ -22,31 +22,38 @@ interface PointsStats {
 export default function LeaderboardPage() {
   const { user } = useUserStore()
   
-  const [topUsers, setTopUsers] = useState<UserWithPoints[]>([])
+  const [period, setPeriod] = useState<LeaderboardPeriod>('all')
+  const [topUsers, setTopUsers] = useState<LeaderboardEntry[]>([])
   const [stats, setStats] = useState<PointsStats | null>(null)
   const [userRank, setUserRank] = useState(0)
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
-    loadLeaderboard()
+    getTotalPointsStats()
+      .then(setStats)
+      .catch(error => console.error('Error loading points stats:', error))
   }, [])
 
-  const loadLeaderboard = async () => {
+  useEffect(() => {
+    loadLeaderboard(period)
+  }, [period])
+
+  const loadLeaderboard = async (selected: LeaderboardPeriod) => {
     try {
       setLoading(true)
-      const [top, pointsStats] = await Promise.all([
-        getTopUsers(50),
-        getTotalPointsStats()
-      ])
+      // /api/leaderboard ถูก cache ที่ CDN - ไม่ query database ทุกครั้งที่เปิดหน้า
+      const response = await fetch(`/api/leaderboard?period=${selected}&limit=50`)
+      const data = await response.json()
+      if (!response.ok) {
+        throw new Error(data.error || 'Failed to load leaderboard')
+      }
 
-      setTopUsers(top.map((u, index) => ({ ...u, rank: index + 1 })))
-      setStats(pointsStats)
+      const top: LeaderboardEntry[] = data.leaderboard || []
+      setTopUsers(top)
 
       // Get user's rank
       if (user?.id) {
-        const userPoints = await getUserPoints(user.id)
-        const rank = top.findIndex(u => u.id === user.id) + 1
-        setUserRank(rank)
+        setUserRank(top.findIndex(u => u.user_id === user.id) + 1)
       }
     } catch (error) {
       console.error('Error loading leaderboard:', error)
@@ -100,6 +107,23 @@ export default function LeaderboardPage() {
           <p className="text-gray-600">แสดงผู้ใช้ที่มีแต้มสูงสุด</p>
         </motion.div>
 
+        {/* Period Tabs */}
+        <div className="flex justify-center gap-2 mb-8">
+          {PERIOD_TABS.map(tab => (
+            <button
+              key={tab.value}
+              onClick={() => setPeriod(tab.value)}
+              className={`px-4 py-2 rounded-full text-sm font-medium transition-all ${
+                period === tab.value
+                  ? 'bg-gradient-to-r from-emerald-500 to-teal-500 text-white shadow-lg'
+                  : 'bg-white text-gray-600 border border-emerald-100 hover:bg-emerald-50'
+              }`}
+            >
+              {tab.label}
+            </button>
+          ))}
+        </div>
+
         {/* Stats Cards */}
         {stats && (
           <motion.div
@@ -159,10 +183,10 @@ export default function LeaderboardPage() {
           ) : topUsers.length > 0 ? (
             <div className="space-y-2">
               {topUsers.map((topUser, index) => {
-                const isCurrentUser = user?.id === topUser.id
+                const isCurrentUser = user?.id === topUser.user_id
                 return (
                   <motion.div
-                    key={topUser.id}
+                    key={topUser.user_id}
                     initial={{ opacity: 0, x: -20 }}
                     animate={{ opacity: 1, x: 0 }}
                     transition={{ delay: index * 0.03 }}
@@ -35,12 +35,10 @@ export default function Home() {
           .from('users')
           .select('*', { count: 'exact', head: true })
 
-        // รวมแต้มทั้งหมด
-        const { data: pointsData } = await supabase
-          .from('user_points')
-          .select('points')
+        // รวมแต้มทั้งหมด (ยอดรวมจาก get_points_stats - ไม่ต้องดึงทุกแถว)
+        const { data: pointsStats } = await supabase.rpc('get_points_stats')
 
-        const totalPoints = pointsData?.reduce((sum, p) => sum + (p.points || 0), 0) || 0
+        const totalPoints = Number(pointsStats?.total_points) || 0
 
         // นับจำนวนเครื่อง (kiosks)
         const { count: machineCount } = await supabase
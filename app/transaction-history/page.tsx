@@ -4,18 +4,24 @@ import { useEffect, useState } from 'react'
 import { useRouter } from 'next/navigation'
 import { motion } from 'framer-motion'
 import { useUserStore } from '@/store/userStore'
-import { getHistory, getWithdrawals } from '@/lib/supabase'
+import { getHistoryPage, getWithdrawals } from '@/lib/supabase'
 import { PointHistory, Withdrawal } from '@/lib/supabase'
 
 type Transaction = (PointHistory & { type: 'point' }) | (Withdrawal & { type: 'withdrawal' })
 
+const HISTORY_PAGE_SIZE = 50
+
 export default function TransactionHistoryPage() {
   const router = useRouter()
   const { user, isAuthenticated } = useUserStore()
   
-  const [transactions, setTransactions] = useState<Transaction[]>([])
+  const [history, setHistory] = useState<PointHistory[]>([])
+  const [withdrawals, setWithdrawals] = useState<Withdrawal[]>([])
+  const [historyCursor, setHistoryCursor] = useState<string | null>(null)
+  const [hasMoreHistory, setHasMoreHistory] = useState(false)
   const [filter, setFilter] = useState<'all' | 'points' | 'withdrawals'>('all')
   const [loading, setLoading] = useState(false)
+  const [loadingMore, setLoadingMore] = useState(false)
 
   useEffect(() => {
     if (!isAuthenticated || !user?.id) {
@@ -24,43 +30,76 @@ export default function TransactionHistoryPage() {
     }
 
     loadTransactions()
-  }, [isAuthenticated, user, filter])
+  }, [isAuthenticated, user])
 
   const loadTransactions = async () => {
     try {
       if (!user?.id) return
       
       setLoading(true)
-      const [history, withdrawals] = await Promise.all([
-        getHistory(user.id, 100),
+      const [page, withdrawalList] = await Promise.all([
+        getHistoryPage(user.id, { limit: HISTORY_PAGE_SIZE }),
         getWithdrawals(user.id)
       ])
 
-      let combined: Transaction[] = [
-        ...history.map(h => ({ ...h, type: 'point' as const })),
-        ...withdrawals.map(w => ({ ...w, type: 'withdrawal' as const }))
-      ]
+      setHistory(page.history)
+      setHistoryCursor(page.cursor)
+      setHasMoreHistory(page.has_more)
+      setWithdrawals(withdrawalList)
+    } catch (error) {
+      console.error('Error loading transactions:', error)
+    } finally {
+      setLoading(false)
+    }
+  }
 
-      // Filter
-      if (filter === 'points') {
-        combined = combined.filter(t => t.type === 'point')
-      } else if (filter === 'withdrawals') {
-        combined = combined.filter(t => t.type === 'withdrawal')
-      }
+  // ดึงประวัติหน้าถัดไป (เก่ากว่า) ต่อท้าย
+  const loadMoreHistory = async () => {
+    try {
+      if (!user?.id || !historyCursor) return
 
-      // Sort by date
-      combined.sort((a, b) => 
-        new Date(b.created_at).getTime() - new Date(a.created_at).getTime()
-      )
+      setLoadingMore(true)
+      const page = await getHistoryPage(user.id, {
+        cursor: historyCursor,
+        limit: HISTORY_PAGE_SIZE
+      })
 
-      setTransactions(combined)
+      setHistory(prev => [...prev, ...page.history])
+      setHistoryCursor(page.cursor)
+      setHasMoreHistory(page.has_more)
     } catch (error) {
-      console.error('Error loading transactions:', error)
+      console.error('Error loading more history:', error)
     } finally {
-      setLoading(false)
+      setLoadingMore(false)
     }
   }
 
+  // ยังโหลดประวัติไม่ครบ: ซ่อนการถอนที่เก่ากว่าประวัติรายการสุดท้ายที่โหลดมา
+  // (ไม่ให้รายการเก่าแทรกก่อนประวัติที่ยังไม่ได้โหลด)
+  const oldestHistory = hasMoreHistory && history.length > 0
+    ? new Date(history[history.length - 1].created_at).getTime()
+    : null
+
+  const transactions: Transaction[] = [
+    ...(filter !== 'withdrawals'
+      ? history.map(h => ({ ...h, type: 'point' as const }))
+      : []),
+    ...(filter !== 'points'
+      ? withdrawals
+          .filter(w =>
+            filter === 'withdrawals' ||
+            oldestHistory === null ||
+            new Date(w.created_at).getTime() >= oldestHistory
+          )
+          .map(w => ({ ...w, type: 'withdrawal' as const }))
+      : [])
+  ]
+
+  // Sort by date
+  transactions.sort((a, b) => 
+    new Date(b.created_at).getTime() - new Date(a.created_at).getTime()
+  )
+
   const getItemEmoji = (itemType: string) => {
     const emojis: { [key: string]: string } = {
       glass: '🍾',
@@ -223,6 +262,17 @@ export default function TransactionHistoryPage() {
                   </div>
                 </motion.div>
               ))}
+
+              {/* Load more (keyset cursor) */}
+              {filter !== 'withdrawals' && hasMoreHistory && (
+                <button
+                  onClick={loadMoreHistory}
+                  disabled={loadingMore}
+                  className="w-full py-3 rounded-2xl border border-emerald-200 text-emerald-700 font-medium hover:border-emerald-500 disabled:opacity-50 transition-all"
+                >
+                  {loadingMore ? 'กำลังโหลด...' : 'โหลดเพิ่ม'}
+                </button>
+              )}
             </div>
           ) : (
             <div className="text-center py-12">
@@ -5,15 +5,57 @@
 
 import requests
 import json
+import time
+import threading
 import logging
+from collections import OrderedDict
 from typing import Dict, Optional
-from config import ENDPOINT_ADD_POINT, ENDPOINT_GET_POINT, API_TIMEOUT
+from config import (
+    ENDPOINT_ADD_POINT, API_TIMEOUT,
+    USER_CACHE_TTL, USER_CACHE_SIZE, DEVICE_ID,
+)
+from telemetry import telemetry, endpoint_name, vercel_region
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class UserCache:
+    """
+    แคช phone → user แบบ LRU + TTL
+    """
+
+    def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items = OrderedDict()  # phone -> (expires_at, user)
+        self._lock = threading.Lock()
+
+    def get(self, phone: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._items.get(phone)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if time.monotonic() > expires_at:
+                del self._items[phone]
+                return None
+            self._items.move_to_end(phone)
+            return user
+
+    def put(self, phone: str, user: Dict):
+        with self._lock:
+            self._items[phone] = (time.monotonic() + self.ttl, user)
+            self._items.move_to_end(phone)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def invalidate(self, phone: str):
+        with self._lock:
+            self._items.pop(phone, None)
+
+
 class SortingMachineAPIClient:
     """
     Client สำหรับเชื่อมต่อ Sorting Machine API
@@ -28,6 +70,43 @@ class SortingMachineAPIClient:
         self.base_url = base_url
         self.timeout = API_TIMEOUT
         self.session = requests.Session()
+        self.user_cache = UserCache()
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        ส่ง request และบันทึก latency / status / bytes ลง telemetry (Private method)
+        """
+        endpoint = endpoint_name(url)
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            telemetry.record(endpoint, method, None, (time.perf_counter() - start) * 1000,
+                             error=type(e).__name__)
+            raise
+        telemetry.record(
+            endpoint, method, response.status_code, (time.perf_counter() - start) * 1000,
+            bytes_sent=len(response.request.body or b''),
+            bytes_received=len(response.content),
+            region=vercel_region(response.headers),
+        )
+        return response
+
+    def login_user(self, phone: str) -> Optional[Dict]:
+        """
+        ล็อกอินด้วยเบอร์โทร และเก็บผู้ใช้ไว้ในแคช
+        
+        Args:
+            phone (str): เบอร์โทรศัพท์ของผู้ใช้
+            
+        Returns:
+            dict or None: {'user': {...}, 'points': int} หรือ None ถ้าไม่พบผู้ใช้
+        """
+        user_response = self._get_user_by_phone(phone)
+        if not user_response or 'user' not in user_response:
+            return None
+        return user_response
 
     def send_point(self, phone: str, label: str, points: int) -> Dict:
         """
@@ -48,15 +127,13 @@ class SortingMachineAPIClient:
             True
         """
         try:
-            # ขั้นตอนที่ 1: ค้นหาผู้ใช้จากเบอร์โทร
-            logger.info(f'🔍 Fetching user for phone: {phone}')
-            user_response = self._get_user_by_phone(phone)
+            # ขั้นตอนที่ 1: ค้นหาผู้ใช้จากเบอร์โทร (ใช้แคชถ้ามี)
+            user = self._resolve_user(phone)
 
-            if not user_response or 'user' not in user_response:
+            if not user:
                 logger.error(f'❌ User not found for phone: {phone}')
                 return {'success': False, 'error': 'User not found'}
 
-            user = user_response['user']
             user_id = user['id']
 
             # ขั้นตอนที่ 2: ส่งคะแนน
@@ -65,10 +142,11 @@ class SortingMachineAPIClient:
                 'user_id': user_id,
                 'points': points,
                 'label': label,
+                'machine_id': DEVICE_ID,
             }
 
-            response = self.session.post(
-                ENDPOINT_ADD_POINT,
+            response = self._request(
+                'POST', ENDPOINT_ADD_POINT,
                 json=payload,
                 timeout=self.timeout,
             )
@@ -81,6 +159,11 @@ class SortingMachineAPIClient:
             )
             return {'success': True, 'data': result}
 
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 404:
+                self.user_cache.invalidate(phone)
+            logger.error(f'❌ Request error: {str(e)}')
+            return {'success': False, 'error': str(e)}
         except requests.exceptions.RequestException as e:
             logger.error(f'❌ Request error: {str(e)}')
             return {'success': False, 'error': str(e)}
@@ -98,42 +181,45 @@ class SortingMachineAPIClient:
         Returns:
             int or None: จำนวนคะแนน หรือ None ถ้ามีข้อผิดพลาด
         """
-        try:
-            user_response = self._get_user_by_phone(phone)
-
-            if not user_response or 'user' not in user_response:
-                logger.error(f'❌ User not found for phone: {phone}')
-                return None
-
-            user_id = user_response['user']['id']
-            response = self.session.get(
-                ENDPOINT_GET_POINT,
-                params={'user_id': user_id},
-                timeout=self.timeout,
-            )
-
-            response.raise_for_status()
-            data = response.json()
+        # loginPhone คืนแต้มมาด้วยอยู่แล้ว (query เดียว) - ไม่ต้องเรียก getPoint ต่อ
+        user_response = self._get_user_by_phone(phone)
+        if not user_response or 'user' not in user_response:
+            logger.error(f'❌ User not found for phone: {phone}')
+            return None
+        return user_response.get('points', 0)
 
-            return data.get('points', 0)
+    def _resolve_user(self, phone: str) -> Optional[Dict]:
+        """
+        คืนข้อมูลผู้ใช้จากแคช หรือค้นหาจาก API ถ้ายังไม่มี (Private method)
+        """
+        user = self.user_cache.get(phone)
+        if user is not None:
+            return user
 
-        except Exception as e:
-            logger.error(f'❌ Error getting points: {str(e)}')
+        logger.info(f'🔍 Fetching user for phone: {phone}')
+        user_response = self._get_user_by_phone(phone)
+        if not user_response or 'user' not in user_response:
             return None
+        return user_response['user']
 
     def _get_user_by_phone(self, phone: str) -> Optional[Dict]:
         """
-        ค้นหาผู้ใช้จากเบอร์โทรศัพท์ (Private method)
+        ค้นหาผู้ใช้จากเบอร์โทรศัพท์ และอัปเดตแคช (Private method)
         """
         try:
-            response = self.session.post(
-                f'{self.base_url}/api/loginPhone',
-                json={'phone': phone},
+            response = self._request(
+                'POST', f'{self.base_url}/api/loginPhone',
+                json={'phone': phone, 'machine_id': DEVICE_ID},
                 timeout=self.timeout,
             )
 
+            if response.status_code == 404:
+                self.user_cache.invalidate(phone)
             response.raise_for_status()
-            return response.json()
+            data = response.json()
+            if data.get('user'):
+                self.user_cache.put(phone, data['user'])
+            return data
 
         except Exception as e:
             logger.error(f'❌ Error fetching user: {str(e)}')
@@ -155,3 +241,7 @@ if __name__ == '__main__':
     print('\n--- Example 2: Get User Points ---')
     points = client.get_user_points('0812345678')
     print(f'Points: {points}')
+
+    # สถิติการเรียก API
+    print('\n--- API Telemetry ---')
+    print(telemetry.summary())
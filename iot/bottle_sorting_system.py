@@ -212,6 +212,72 @@ def detect_label(frame):
         print(f"[YOLO ERROR] {e}")
         return None
 
+# ============================================================
+# BURST RE-CAPTURE (ตรวจจับไม่ได้ → ถ่ายใหม่ทันที ไม่ต้องรอเปิดฝา)
+# ============================================================
+RECAPTURE_ATTEMPTS = 3
+RECAPTURE_EXPOSURE_STEP = 1
+RECAPTURE_NUDGE_TIME = 0.15
+RECAPTURE_FLUSH_FRAMES = 2
+
+detect_stats = {
+    "total": 0,
+    "first_pass": 0,
+    "recovered": 0,
+    "missed": 0,
+    "recovery_time": 0.0,
+}
+
+def record_detection(label, attempts, elapsed):
+    detect_stats["total"] += 1
+    if label is None:
+        detect_stats["missed"] += 1
+    elif attempts == 0:
+        detect_stats["first_pass"] += 1
+    else:
+        detect_stats["recovered"] += 1
+        detect_stats["recovery_time"] += elapsed
+
+def detection_summary():
+    total = detect_stats["total"] or 1
+    recovered = detect_stats["recovered"] or 1
+    miss_rate = (detect_stats["total"] - detect_stats["first_pass"]) / total
+    avg_ms = detect_stats["recovery_time"] / recovered * 1000
+    return (f"total={detect_stats['total']} recovered={detect_stats['recovered']} "
+            f"missed={detect_stats['missed']} miss_rate={miss_rate:.1%} "
+            f"recovery_avg={avg_ms:.0f}ms")
+
+def nudge_conveyor():
+    conveyor_forward()
+    time.sleep(RECAPTURE_NUDGE_TIME)
+    conveyor_reverse()
+    time.sleep(RECAPTURE_NUDGE_TIME)
+    conveyor_stop()
+
+def recapture_label(cap, attempts=RECAPTURE_ATTEMPTS):
+    """ถ่ายซ้ำโดยเพิ่ม exposure และเขย่าสายพานในรอบสุดท้าย → (label, attempts)"""
+    base_exposure = cap.get(cv2.CAP_PROP_EXPOSURE)
+    try:
+        for attempt in range(1, attempts + 1):
+            if attempt == attempts:
+                nudge_conveyor()
+            else:
+                cap.set(cv2.CAP_PROP_EXPOSURE,
+                        base_exposure + attempt * RECAPTURE_EXPOSURE_STEP)
+
+            for _ in range(RECAPTURE_FLUSH_FRAMES):
+                cap.grab()
+            ret, frame = cap.read()
+            if not ret:
+                return None, attempt
+
+            label = detect_label(frame)
+            if label is not None:
+                return label, attempt
+        return None, attempts
+    finally:
+        cap.set(cv2.CAP_PROP_EXPOSURE, base_exposure)
+
 # ============================================================
 # ROTATE TO SLOT (CAN ใช้ LIMIT_END เป็นตำแหน่ง)
 # ============================================================
@@ -418,7 +484,15 @@ def auto_loop():
             time.sleep(1)
             continue
 
+        started = time.time()
         label = detect_label(frame)
+        attempts = 0
+        if label is None:
+            update_status("🔁 ตรวจจับไม่ได้ - กำลังถ่ายใหม่...")
+            label, attempts = recapture_label(cap)
+        record_detection(label, attempts, time.time() - started)
+        if attempts:
+            print(f"[DETECT] {detection_summary()}")
 
         if label is None:
             update_status("❌ ตรวจจับไม่ได้")
@@ -501,10 +575,11 @@ def login_user():
         messagebox.showerror("Error", "กรุณากรอกเบอร์โทรศัพท์ให้ถูกต้อง")
         return
     
-    # ตรวจสอบว่ามี user อยู่ในระบบหรือไม่
-    points = api_client.get_user_points(phone)
+    # ตรวจสอบว่ามี user อยู่ในระบบหรือไม่ (เก็บผู้ใช้ไว้ในแคชสำหรับส่งแต้มต่อชิ้น)
+    login = api_client.login_user(phone)
     
-    if points is not None:
+    if login is not None:
+        points = login.get('points', 0)
         current_user_phone = phone
         reset_session()
         user_info_label.config(text=f"👤 {phone} | 💰 {points} แต้ม")
@@ -17,6 +17,10 @@ load_dotenv()
 API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:3000')
 API_TIMEOUT = 10  # วินาที
 
+# User cache (phone → user) - ลดการเรียก /api/loginPhone ต่อชิ้น
+USER_CACHE_TTL = 600   # วินาที
+USER_CACHE_SIZE = 256  # จำนวนผู้ใช้สูงสุดในแคช
+
 # Endpoints
 ENDPOINT_ADD_POINT = f'{API_BASE_URL}/api/addPoint'
 ENDPOINT_GET_POINT = f'{API_BASE_URL}/api/getPoint'
@@ -33,6 +37,6 @@ POINTS_CAN = 2
 
 # Logging
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
-LOG_FILE = os.getenv('LOG_FILE', 'sorting_machine.log'
+LOG_FILE = os.getenv('LOG_FILE', 'sorting_machine.log')
 
 print(f'✅ Config loaded: API_BASE_URL={API_BASE_URL}')
@@ -0,0 +1,263 @@
+# ===================================================================
+# Sorting Machine IoT - Fleet Load Simulator
+# จำลองเครื่อง kiosk หลายเครื่องพร้อมกัน (asyncio + httpx)
+# ใช้ประเมินขนาด backend ก่อนเพิ่มจำนวนเครื่อง
+# ===================================================================
+#
+# ตัวอย่าง:
+#   python load_simulator.py --url http://localhost:3000 --kiosks 20 --users 500 --duration 120
+#   python load_simulator.py --phones phones.txt --time-scale 0.1
+#
+# ⚠️ ยิง request จริง (บวกแต้มจริง) - ใช้กับ server ทดสอบเท่านั้น
+
+import argparse
+import asyncio
+import math
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from config import API_BASE_URL, API_TIMEOUT
+
+try:
+    import httpx
+    HAS_HTTPX = True
+except ImportError:
+    httpx = None
+    HAS_HTTPX = False
+
+# สัดส่วนประเภทขวดเริ่มต้น (label ตาม YOLO)
+DEFAULT_MIX = {'plastic': 0.55, 'can': 0.30, 'glass': 0.15}
+
+
+class LoadStats:
+    """เก็บ latency ดิบทุก request (สำหรับ percentile ที่แม่นยำ)"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.sessions = 0
+        self.unregistered = 0
+        self.items = 0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, endpoint: str, latency_ms: float, status: Optional[int], ok: bool):
+        self.latencies[endpoint].append(latency_ms)
+        self.statuses[endpoint][status or 'error'] += 1
+        if not ok:
+            self.errors[endpoint] += 1
+
+    @staticmethod
+    def percentile(values: List[float], q: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[index]
+
+    def report(self) -> str:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        lines = [
+            '',
+            '=' * 78,
+            f'📊 Load test: {elapsed:.1f}s, {self.sessions} session(s), '
+            f'{self.unregistered} unregistered, {self.items} item(s)',
+            '=' * 78,
+            f"{'endpoint':<14}{'reqs':>7} {'req/s':>8} {'err%':>6}"
+            f"{'p50':>8}{'p90':>8}{'p95':>8}{'p99':>8}{'max':>8}  (ms)",
+        ]
+        for endpoint in sorted(self.latencies):
+            values = self.latencies[endpoint]
+            n = len(values)
+            lines.append(
+                f'{endpoint:<14}{n:>7} {n / elapsed:>8.2f} '
+                f'{100 * self.errors[endpoint] / n:>5.1f}%'
+                f'{self.percentile(values, 0.50):>8.0f}'
+                f'{self.percentile(values, 0.90):>8.0f}'
+                f'{self.percentile(values, 0.95):>8.0f}'
+                f'{self.percentile(values, 0.99):>8.0f}'
+                f'{max(values):>8.0f}'
+            )
+        for endpoint in sorted(self.statuses):
+            codes = ', '.join(f'{k}={v}' for k, v in sorted(self.statuses[endpoint].items(), key=str))
+            lines.append(f'   {endpoint} status: {codes}')
+        total = sum(len(v) for v in self.latencies.values())
+        lines.append(f'Total: {total} request(s), {total / elapsed:.2f} req/s')
+        return '\n'.join(lines)
+
+
+class FleetSimulator:
+    """
+    จำลอง N เครื่องที่ทำงานพร้อมกัน แต่ละเครื่องวนรับ session:
+    - ผู้ใช้มาถึงแบบ Poisson (ช่วงห่างแบบ exponential, เฉลี่ย session_gap วินาที)
+    - ผู้ใช้เลือกจาก M คนแบบ Zipf (ขาประจำมาบ่อยกว่า) + สัดส่วนเบอร์ที่ยังไม่ลงทะเบียน
+    - จำนวนชิ้นต่อ session แบบ geometric (เฉลี่ย items_mean) ประเภทตาม mix
+    - แต่ละ session: loginPhone (ได้แต้มมาด้วย) -> addPoint ทีละชิ้น
+    time_scale < 1 ย่อเวลารอทั้งหมด (เช่น 0.1 = เร็วขึ้น 10 เท่า)
+    """
+
+    def __init__(self, base_url: str, kiosks: int, users: int, duration: float,
+                 session_gap: float = 60.0, items_mean: float = 6.0, item_interval: float = 4.0,
+                 mix: Optional[Dict[str, float]] = None, unregistered: float = 0.3,
+                 phones: Optional[List[str]] = None, time_scale: float = 1.0,
+                 seed: Optional[int] = None):
+        self.base_url = base_url.rstrip('/')
+        self.kiosks = kiosks
+        self.duration = duration
+        self.session_gap = session_gap
+        self.items_mean = max(1.0, items_mean)
+        self.item_interval = item_interval
+        self.mix = mix or DEFAULT_MIX
+        self.unregistered = unregistered
+        self.time_scale = time_scale
+        self.random = random.Random(seed)
+        self.phones = phones or [f'08{n:08d}' for n in range(users)]
+        # น้ำหนัก Zipf (s = 1)
+        self.weights = [1 / (rank + 1) for rank in range(len(self.phones))]
+        self.stats = LoadStats()
+
+    # ---------- distributions ----------
+
+    def _think(self, mean: float) -> float:
+        return self.random.expovariate(1 / mean) * self.time_scale if mean > 0 else 0
+
+    def _pick_phone(self) -> str:
+        if self.random.random() < self.unregistered:
+            # เบอร์ที่ไม่อยู่ในรายชื่อ (prefix 06 ไม่ซ้ำกับเบอร์ทดสอบ)
+            return f'06{self.random.randrange(10 ** 8):08d}'
+        return self.random.choices(self.phones, weights=self.weights)[0]
+
+    def _item_count(self) -> int:
+        p = 1 / self.items_mean
+        return max(1, int(math.log(1 - self.random.random()) / math.log(1 - p)) + 1) if p < 1 else 1
+
+    def _pick_label(self) -> str:
+        labels = list(self.mix)
+        return self.random.choices(labels, weights=[self.mix[l] for l in labels])[0]
+
+    # ---------- requests ----------
+
+    async def _call(self, client, endpoint: str, method: str, path: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            self.stats.record(endpoint, (time.perf_counter() - start) * 1000, None, False)
+            return None
+        latency = (time.perf_counter() - start) * 1000
+        # 404 ของ loginPhone = เบอร์ยังไม่ลงทะเบียน (ไม่ใช่ error ของ server)
+        ok = response.status_code < 400 or (endpoint == 'loginPhone' and response.status_code == 404)
+        self.stats.record(endpoint, latency, response.status_code, ok)
+        return response
+
+    async def _session(self, client, machine_id: str):
+        phone = self._pick_phone()
+        response = await self._call(client, 'loginPhone', 'POST', '/api/loginPhone',
+                                    json={'phone': phone, 'machine_id': machine_id})
+        if response is None or response.status_code != 200:
+            if response is not None and response.status_code == 404:
+                self.stats.unregistered += 1
+            return
+
+        user_id = response.json()['user']['id']
+        self.stats.sessions += 1
+        for _ in range(self._item_count()):
+            await asyncio.sleep(self._think(self.item_interval))
+            response = await self._call(client, 'addPoint', 'POST', '/api/addPoint', json={
+                'user_id': user_id,
+                'label': self._pick_label(),
+                'idempotency_key': uuid.uuid4().hex,
+                'machine_id': machine_id,
+            })
+            # นับเฉพาะชิ้นที่ server บันทึกแต้มสำเร็จ
+            if response is not None and 200 <= response.status_code < 300:
+                self.stats.items += 1
+
+    async def _kiosk(self, machine_id: str, deadline: float):
+        # แต่ละเครื่องมี connection ของตัวเองเหมือนเครื่องจริง
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=API_TIMEOUT) as client:
+            # เริ่มไม่พร้อมกัน
+            await asyncio.sleep(self.random.uniform(0, self.session_gap) * self.time_scale)
+            while time.perf_counter() < deadline:
+                try:
+                    await self._session(client, machine_id)
+                except (ValueError, KeyError) as e:
+                    print(f'⚠️ Bad response: {e}')
+                await asyncio.sleep(self._think(self.session_gap))
+
+    async def run(self) -> LoadStats:
+        print(f'🚀 Simulating {self.kiosks} kiosk(s), {len(self.phones)} user(s) '
+              f'for {self.duration:.0f}s against {self.base_url}')
+        self.stats.started = time.perf_counter()
+        deadline = self.stats.started + self.duration
+        # แต่ละเครื่องมี DEVICE_ID ของตัวเอง (แถว machine_status แยกกัน)
+        tasks = [
+            asyncio.create_task(self._kiosk(f'sim-kiosk-{n:03d}', deadline))
+            for n in range(self.kiosks)
+        ]
+        try:
+            # รอ session ที่ค้างจบเองได้ไม่เกิน 1 session
+            await asyncio.wait_for(
+                asyncio.gather(*tasks),
+                timeout=self.duration + self.session_gap * self.time_scale + 60
+            )
+        except asyncio.TimeoutError:
+            for task in tasks:
+                task.cancel()
+        self.stats.finished = time.perf_counter()
+        return self.stats
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """'plastic:0.5,can:0.3,glass:0.2' -> dict"""
+    mix = {}
+    for part in text.split(','):
+        label, _, weight = part.partition(':')
+        mix[label.strip()] = float(weight)
+    return mix
+
+
+def run_simulation(**kwargs) -> LoadStats:
+    """รันการจำลองแบบ sync (ใช้จาก main.py)"""
+    if not HAS_HTTPX:
+        raise RuntimeError('load simulator requires httpx: pip install httpx')
+    stats = asyncio.run(FleetSimulator(**kwargs).run())
+    print(stats.report())
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sorting Machine fleet load simulator')
+    parser.add_argument('--url', default=API_BASE_URL, help='target API base URL')
+    parser.add_argument('--kiosks', type=int, default=10, help='จำนวนเครื่องพร้อมกัน (N)')
+    parser.add_argument('--users', type=int, default=200, help='จำนวนผู้ใช้ทดสอบ (M)')
+    parser.add_argument('--duration', type=float, default=60, help='วินาที')
+    parser.add_argument('--session-gap', type=float, default=60, help='ช่วงห่างเฉลี่ยระหว่าง session ต่อเครื่อง (วินาที)')
+    parser.add_argument('--items-mean', type=float, default=6, help='จำนวนชิ้นเฉลี่ยต่อ session')
+    parser.add_argument('--item-interval', type=float, default=4, help='เวลาเฉลี่ยต่อชิ้น (วินาที)')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help='เช่น plastic:0.55,can:0.3,glass:0.15')
+    parser.add_argument('--unregistered', type=float, default=0.3, help='สัดส่วนเบอร์ที่ยังไม่ลงทะเบียน')
+    parser.add_argument('--phones', help='ไฟล์เบอร์โทรทดสอบ (บรรทัดละเบอร์)')
+    parser.add_argument('--time-scale', type=float, default=1.0, help='ย่อเวลารอ (0.1 = เร็วขึ้น 10 เท่า)')
+    parser.add_argument('--seed', type=int, help='random seed')
+    args = parser.parse_args()
+
+    phones = None
+    if args.phones:
+        with open(args.phones, encoding='utf-8') as f:
+            phones = [line.strip() for line in f if line.strip()]
+
+    run_simulation(
+        base_url=args.url, kiosks=args.kiosks, users=args.users, duration=args.duration,
+        session_gap=args.session_gap, items_mean=args.items_mean,
+        item_interval=args.item_interval, mix=args.mix, unregistered=args.unregistered,
+        phones=phones, time_scale=args.time_scale, seed=args.seed,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,631 @@
+# ===================================================================
+# Sorting Machine IoT - Local Stand-in API Server
+# จำลอง API ของ Next.js (JSON เหมือนกัน) บน SQLite เครื่องเดียว
+# สำหรับ benchmark client / พัฒนาแบบออฟไลน์ ไม่ต้องใช้ Vercel + Supabase
+# ===================================================================
+#
+# ตัวอย่าง:
+#   python local_server.py --port 3000 --seed-users 500
+#   python local_server.py --latency 150 --jitter 50 --failure-rate 0.05 --seed 1
+#   API_BASE_URL=http://localhost:3000 python load_simulator.py --kiosks 20
+#
+# Endpoints: /api/loginPhone, /api/addPoint, /api/addPointBatch, /api/getPoint,
+#            /api/pricing, /api/bottleCounts
+
+import argparse
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# ค่าเดียวกับ DEFAULT_PRICING ใน lib/supabase.ts
+DEFAULT_PRICING = {
+    'glass': {'points': 5, 'name': 'ขวดแก้ว', 'emoji': '🍾'},
+    'plastic': {'points': 3, 'name': 'ขวดพลาสติก', 'emoji': '🥤'},
+    'can': {'points': 4, 'name': 'กระป๋อง', 'emoji': '🥫'},
+    'points_per_baht': 100,
+    'min_withdrawal': 100,
+}
+
+MAX_BATCH_ITEMS = 200
+DEFAULT_MACHINE_ID = 'main'
+MACHINE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_.:-]{1,64}$')
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def is_positive_int(value) -> bool:
+    """จำนวนเต็ม > 0 (JSON true/false เป็น bool ซึ่งเป็น subclass ของ int - ไม่นับ)"""
+    return type(value) is int and value > 0
+
+
+def bottle_type(label: str) -> Optional[str]:
+    """เหมือน getBottleType() ใน lib/supabase.ts"""
+    label = (label or '').lower()
+    if 'glass' in label:
+        return 'glass'
+    if 'plastic' in label:
+        return 'plastic'
+    if 'can' in label or 'aluminum' in label:
+        return 'can'
+    return None
+
+
+class ApiError(Exception):
+    """ตอบ error เป็น JSON { error } พร้อม HTTP status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def machine_id_from(value) -> str:
+    """เหมือน normalizeMachineId() ใน lib/supabase.ts (ไม่ส่งมา = 'main')"""
+    if value is None or value == '':
+        return DEFAULT_MACHINE_ID
+    if not isinstance(value, str) or not MACHINE_ID_PATTERN.match(value):
+        raise ApiError(400, 'Invalid machine_id')
+    return value
+
+
+# ============================================================
+# STORE (SQLite)
+# ============================================================
+class LocalStore:
+    """ตารางเดียวกับ Supabase เท่าที่ endpoint ต้องใช้"""
+
+    def __init__(self, path: str):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        if path != ':memory:':
+            self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS users (
+                id TEXT PRIMARY KEY,
+                phone TEXT UNIQUE NOT NULL,
+                username TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS user_points (
+                id TEXT PRIMARY KEY,
+                user_id TEXT UNIQUE NOT NULL REFERENCES users(id),
+                points INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS point_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                points INTEGER NOT NULL,
+                item_type TEXT,
+                created_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS point_requests (
+                idempotency_key TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                points INTEGER NOT NULL,
+                created_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS machine_status (
+                machine_id TEXT PRIMARY KEY,
+                glass_count INTEGER NOT NULL DEFAULT 0,
+                plastic_count INTEGER NOT NULL DEFAULT 0,
+                can_count INTEGER NOT NULL DEFAULT 0,
+                bottle_count INTEGER NOT NULL DEFAULT 0,
+                storage_used INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT
+            );
+            CREATE TABLE IF NOT EXISTS machine_settings (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                updated_at TEXT
+            );
+        ''')
+        self.conn.execute('INSERT OR IGNORE INTO machine_status (machine_id) VALUES (?)', (DEFAULT_MACHINE_ID,))
+
+    def seed_users(self, count: int):
+        """สร้างผู้ใช้ทดสอบ 08000000000.. (ตรงกับเบอร์ใน load_simulator.py)"""
+        with self.lock:
+            self.conn.execute('BEGIN')
+            for n in range(count):
+                phone = f'08{n:08d}'
+                user_id = str(uuid.uuid5(uuid.NAMESPACE_URL, phone))
+                self.conn.execute(
+                    'INSERT OR IGNORE INTO users (id, phone, username, created_at) VALUES (?, ?, ?, ?)',
+                    (user_id, phone, f'tester{n}', now_iso())
+                )
+                self.conn.execute(
+                    'INSERT OR IGNORE INTO user_points (id, user_id, points, updated_at) VALUES (?, ?, 0, ?)',
+                    (str(uuid.uuid4()), user_id, now_iso())
+                )
+            self.conn.execute('COMMIT')
+
+    # ---------- users / points ----------
+
+    def user_by_phone(self, phone: str) -> Optional[Dict]:
+        with self.lock:
+            row = self.conn.execute('SELECT * FROM users WHERE phone = ?', (phone,)).fetchone()
+        return dict(row) if row else None
+
+    def login(self, phone: str) -> Optional[Dict]:
+        """ผู้ใช้ + แต้ม ใน query เดียว (เหมือน login_by_phone)"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT u.*, COALESCE(p.points, 0) AS _points FROM users u '
+                'LEFT JOIN user_points p ON p.user_id = u.id WHERE u.phone = ?', (phone,)
+            ).fetchone()
+        if not row:
+            return None
+        user = dict(row)
+        return {'user': user, 'points': user.pop('_points')}
+
+    def user_points(self, user_id: str) -> int:
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT points FROM user_points WHERE user_id = ?', (user_id,)
+            ).fetchone()
+        return row['points'] if row else 0
+
+    def credit(self, user_id: str, entries: list, idempotency_key: Optional[str],
+               machine_id: str = DEFAULT_MACHINE_ID) -> Tuple[Optional[Dict], bool]:
+        """
+        บวกแต้ม + ประวัติ + จำนวนขวด ใน transaction เดียว
+        Returns: (แถว user_points, duplicate)
+        """
+        total = sum(points for _, points in entries)
+        stamp = now_iso()
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                if idempotency_key:
+                    try:
+                        self.conn.execute(
+                            'INSERT INTO point_requests (idempotency_key, user_id, points, created_at) '
+                            'VALUES (?, ?, ?, ?)',
+                            (idempotency_key, user_id, total, stamp)
+                        )
+                    except sqlite3.IntegrityError:
+                        self.conn.execute('ROLLBACK')
+                        return None, True
+
+                cursor = self.conn.execute(
+                    'UPDATE user_points SET points = points + ?, updated_at = ? WHERE user_id = ?',
+                    (total, stamp, user_id)
+                )
+                if cursor.rowcount == 0:
+                    raise ApiError(404, 'User points not found')
+
+                self.conn.executemany(
+                    'INSERT INTO point_history (user_id, points, item_type, created_at) VALUES (?, ?, ?, ?)',
+                    [(user_id, points, label, stamp) for label, points in entries]
+                )
+
+                deltas = {'glass': 0, 'plastic': 0, 'can': 0}
+                for label, _ in entries:
+                    kind = bottle_type(label)
+                    if kind:
+                        deltas[kind] += 1
+                self._increment_bottles(machine_id, deltas, stamp)
+
+                row = self.conn.execute(
+                    'SELECT * FROM user_points WHERE user_id = ?', (user_id,)
+                ).fetchone()
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+        return dict(row), False
+
+    # ---------- pricing / bottles ----------
+
+    def pricing(self) -> Dict:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value FROM machine_settings WHERE key = 'pricing'"
+            ).fetchone()
+        return json.loads(row['value']) if row else DEFAULT_PRICING
+
+    def set_pricing(self, pricing: Dict):
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO machine_settings (key, value, updated_at) VALUES ('pricing', ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                (json.dumps(pricing, ensure_ascii=False), now_iso())
+            )
+
+    def _increment_bottles(self, machine_id: str, deltas: Dict[str, int], stamp: str):
+        """upsert แถวของเครื่อง (เหมือน increment_bottle_counts) - ต้องถือ lock อยู่แล้ว"""
+        self.conn.execute(
+            'INSERT INTO machine_status (machine_id, glass_count, plastic_count, can_count, updated_at) '
+            'VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT(machine_id) DO UPDATE SET '
+            'glass_count = glass_count + excluded.glass_count, '
+            'plastic_count = plastic_count + excluded.plastic_count, '
+            'can_count = can_count + excluded.can_count, updated_at = excluded.updated_at',
+            (machine_id, deltas.get('glass', 0), deltas.get('plastic', 0), deltas.get('can', 0), stamp)
+        )
+
+    def increment_bottles(self, machine_id: str, deltas: Dict[str, int]):
+        with self.lock:
+            self._increment_bottles(machine_id, deltas, now_iso())
+
+    def bottle_counts(self, machine_id: Optional[str] = None) -> Dict:
+        """จำนวนขวดของเครื่องเดียว หรือรวมทุกเครื่อง (machine_id=None)"""
+        sql = ('SELECT COUNT(*) AS machines, COALESCE(SUM(glass_count), 0) AS glass, '
+               'COALESCE(SUM(plastic_count), 0) AS plastic, COALESCE(SUM(can_count), 0) AS can '
+               'FROM machine_status')
+        with self.lock:
+            if machine_id is None:
+                row = self.conn.execute(sql).fetchone()
+            else:
+                row = self.conn.execute(sql + ' WHERE machine_id = ?', (machine_id,)).fetchone()
+        counts = {'glass': row['glass'], 'plastic': row['plastic'], 'can': row['can']}
+        counts['total'] = sum(counts.values())
+        if machine_id is None:
+            counts['machines'] = row['machines']
+        return counts
+
+    def reset_bottles(self, machine_id: Optional[str] = None):
+        sql = ('UPDATE machine_status SET glass_count = 0, plastic_count = 0, can_count = 0, '
+               'bottle_count = 0, storage_used = 0, updated_at = ?')
+        with self.lock:
+            if machine_id is None:
+                self.conn.execute(sql, (now_iso(),))
+            else:
+                self.conn.execute(sql + ' WHERE machine_id = ?', (now_iso(), machine_id))
+
+
+def pricing_version(pricing: Dict) -> str:
+    """FNV-1a ของ JSON (แบบเดียวกับ pricingVersion ใน lib/supabase.ts)"""
+    text = json.dumps(pricing, ensure_ascii=False, separators=(',', ':'))
+    value = 0x811c9dc5
+    data = text.encode('utf-16-le')
+    # charCodeAt() = UTF-16 code unit
+    for i in range(0, len(data), 2):
+        value = ((value ^ (data[i] | data[i + 1] << 8)) * 0x01000193) & 0xFFFFFFFF
+    return f'{value:08x}'
+
+
+# ============================================================
+# FAULT INJECTION
+# ============================================================
+class FaultInjector:
+    """
+    หน่วงเวลา/ทำให้ล้มเหลวแบบสุ่ม (กำหนด seed เพื่อให้ผลซ้ำได้)
+    - latency ± jitter ms ทุก request
+    - cold start: request แรกหลัง idle เกิน cold_idle วินาที ช้าเพิ่ม cold_start ms
+    - failure_rate: ตอบ failure_status (เช่น 503)
+    - drop_rate: ปิด connection โดยไม่ตอบ (client เห็นเป็น connection error)
+    """
+
+    def __init__(self, latency: float = 0, jitter: float = 0, failure_rate: float = 0,
+                 failure_status: int = 503, drop_rate: float = 0,
+                 cold_start: float = 0, cold_idle: float = 300, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.drop_rate = drop_rate
+        self.cold_start = cold_start
+        self.cold_idle = cold_idle
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.last_request = 0.0
+
+    def plan(self) -> Tuple[float, Optional[str]]:
+        """(หน่วงกี่วินาที, 'fail' | 'drop' | None)"""
+        with self.lock:
+            now = time.monotonic()
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            if self.cold_start and now - self.last_request > self.cold_idle:
+                delay += self.cold_start
+            self.last_request = now
+            roll = self.random.random()
+        if roll < self.drop_rate:
+            return delay / 1000, 'drop'
+        if roll < self.drop_rate + self.failure_rate:
+            return delay / 1000, 'fail'
+        return delay / 1000, None
+
+
+# ============================================================
+# HTTP HANDLER
+# ============================================================
+class ApiHandler(BaseHTTPRequestHandler):
+    store: LocalStore = None
+    faults: FaultInjector = None
+    quiet = False
+    protocol_version = 'HTTP/1.1'
+
+    # ---------- plumbing ----------
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, body: Optional[Dict] = None, headers: Optional[Dict] = None):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8') if body is not None else b''
+        self.send_response(status)
+        if body is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self) -> bytes:
+        """
+        อ่าน body ให้หมดก่อนตอบทุกกรณี (รวม fault / 404)
+        ไม่งั้น body ที่ค้างใน socket จะถูกอ่านเป็น request ถัดไปของ keep-alive
+        """
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            self.close_connection = True
+            return b''
+        return self.rfile.read(length) if length > 0 else b''
+
+    @staticmethod
+    def _parse_json(raw: bytes) -> Dict:
+        if not raw:
+            return {}
+        try:
+            return json.loads(raw)
+        except ValueError:
+            raise ApiError(400, 'Invalid JSON')
+
+    def _dispatch(self, method: str):
+        url = urlparse(self.path)
+        route = ROUTES.get((method, url.path))
+        raw = self._read_body()
+
+        delay, fault = self.faults.plan()
+        if delay:
+            time.sleep(delay)
+        if fault == 'drop':
+            self.close_connection = True
+            return
+        if fault == 'fail':
+            self._send_json(self.faults.failure_status, {'error': 'Injected failure'})
+            return
+
+        if route is None:
+            self._send_json(404, {'error': 'Not found'})
+            return
+        try:
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            body = self._parse_json(raw) if method == 'POST' else {}
+            route(self, query, body)
+        except ApiError as e:
+            self._send_json(e.status, {'error': e.message})
+        except Exception as e:
+            print(f'❌ {method} {url.path}: {e}')
+            self._send_json(500, {'error': 'Internal server error'})
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    # ---------- routes ----------
+
+    def login_phone(self, query, body):
+        phone = body.get('phone')
+        if not phone:
+            raise ApiError(400, 'Phone number is required')
+        login = self.store.login(phone)
+        if not login:
+            raise ApiError(404, 'User not found')
+        # ไม่ออก session token (ไม่มี secret ในเครื่อง) - เหมือน server ที่ยังไม่ได้ตั้ง secret
+        self._send_json(200, {
+            **login,
+            'pricing_version': pricing_version(self.store.pricing()),
+            'session_token': None,
+            'session_expires_at': None,
+        })
+
+    def get_point(self, query, body):
+        user_id = query.get('user_id')
+        if not user_id:
+            raise ApiError(400, 'user_id is required')
+        self._send_json(200, {'points': self.store.user_points(user_id), 'user_id': user_id})
+
+    def add_point(self, query, body):
+        user_id = body.get('user_id')
+        if not user_id:
+            raise ApiError(400, 'user_id is required')
+        label = body.get('label')
+        if label is not None and not isinstance(label, str):
+            raise ApiError(400, 'Invalid label')
+        points = body.get('points')
+        kind = bottle_type(label) if label else None
+        if kind:
+            points = self.store.pricing().get(kind, {}).get('points') or DEFAULT_PRICING[kind]['points']
+        if not is_positive_int(points):
+            raise ApiError(400, 'Invalid points value')
+
+        key = body.get('idempotency_key')
+        machine_id = machine_id_from(body.get('machine_id'))
+        row, duplicate = self.store.credit(user_id, [(label, points)], key, machine_id)
+        pricing_used = {'label': label, 'points': points}
+        if duplicate:
+            self._send_json(200, {
+                'success': True, 'duplicate': True,
+                'message': f'Request {key} already processed',
+                'pricing_used': pricing_used,
+            })
+            return
+        self._send_json(200, {
+            'success': True, 'data': row,
+            'message': f'Added {points} points to user {user_id}',
+            'pricing_used': pricing_used,
+        })
+
+    def add_point_batch(self, query, body):
+        user_id = body.get('user_id')
+        items = body.get('items')
+        if not user_id:
+            raise ApiError(400, 'user_id is required')
+        if not isinstance(items, list) or not items:
+            raise ApiError(400, 'items must be a non-empty array')
+
+        pricing = self.store.pricing()
+        entries, used = [], []
+        for item in items:
+            if not isinstance(item, dict) or not isinstance(item.get('label'), str):
+                raise ApiError(400, f'Invalid item: {json.dumps(item)}')
+            count = item.get('count')
+            kind = bottle_type(item['label'])
+            points = (pricing.get(kind) or {}).get('points') if kind else 0
+            if not kind or not is_positive_int(count) or not points or points <= 0:
+                raise ApiError(400, f'Invalid item: {json.dumps(item)}')
+            entries.extend([(item['label'], points)] * count)
+            used.append({'label': item['label'], 'count': count, 'points': points})
+        if len(entries) > MAX_BATCH_ITEMS:
+            raise ApiError(400, f'Too many items (max {MAX_BATCH_ITEMS})')
+
+        total = sum(points for _, points in entries)
+        key = body.get('idempotency_key')
+        machine_id = machine_id_from(body.get('machine_id'))
+        row, duplicate = self.store.credit(user_id, entries, key, machine_id)
+        if duplicate:
+            self._send_json(200, {
+                'success': True, 'duplicate': True,
+                'message': f'Request {key} already processed',
+                'total_points': total, 'items': used,
+            })
+            return
+        self._send_json(200, {
+            'success': True, 'data': row,
+            'message': f'Added {total} points to user {user_id}',
+            'total_points': total, 'items': used,
+        })
+
+    def get_pricing(self, query, body):
+        pricing = self.store.pricing()
+        version = pricing_version(pricing)
+        etag = f'"{version}"'
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if self.headers.get('If-None-Match') == etag:
+            self._send_json(304, headers=headers)
+            return
+        self._send_json(200, {'success': True, 'pricing': pricing, 'version': version}, headers)
+
+    def post_pricing(self, query, body):
+        pricing = body.get('pricing')
+        if not pricing:
+            raise ApiError(400, 'Missing pricing data')
+        self.store.set_pricing(pricing)
+        self._send_json(200, {'success': True, 'message': 'Pricing updated successfully'})
+
+    def get_bottle_counts(self, query, body):
+        if query.get('machine_id'):
+            machine_id = machine_id_from(query['machine_id'])
+            counts = self.store.bottle_counts(machine_id)
+            self._send_json(200, {
+                'success': True, 'machine_id': machine_id,
+                'counts': counts, 'total': counts['total'],
+            })
+            return
+        counts = self.store.bottle_counts()
+        machines = counts.pop('machines')
+        self._send_json(200, {
+            'success': True, 'counts': counts, 'total': counts['total'], 'machines': machines,
+        })
+
+    def post_bottle_counts(self, query, body):
+        action = body.get('action')
+        machine_id = machine_id_from(body.get('machine_id'))
+        if action == 'reset_all':
+            # ไม่ระบุ machine_id = ทุกเครื่อง
+            self.store.reset_bottles(machine_id if body.get('machine_id') else None)
+            self._send_json(200, {'success': True, 'message': 'Reset all bottle counts successfully'})
+            return
+        kind = (body.get('bottle_type') or '').lower()
+        if action == 'increment' and kind:
+            if kind not in ('glass', 'plastic', 'can'):
+                raise ApiError(400, 'Invalid bottle type')
+            self.store.increment_bottles(machine_id, {kind: 1})
+            self._send_json(200, {'success': True, 'message': f'Incremented {kind} count'})
+            return
+        raise ApiError(400, 'Invalid action')
+
+
+ROUTES = {
+    ('POST', '/api/loginPhone'): ApiHandler.login_phone,
+    ('GET', '/api/getPoint'): ApiHandler.get_point,
+    ('POST', '/api/addPoint'): ApiHandler.add_point,
+    ('POST', '/api/addPointBatch'): ApiHandler.add_point_batch,
+    ('GET', '/api/pricing'): ApiHandler.get_pricing,
+    ('POST', '/api/pricing'): ApiHandler.post_pricing,
+    ('GET', '/api/bottleCounts'): ApiHandler.get_bottle_counts,
+    ('POST', '/api/bottleCounts'): ApiHandler.post_bottle_counts,
+}
+
+
+def create_server(host: str = '127.0.0.1', port: int = 3000, db: str = ':memory:',
+                  seed_users: int = 200, faults: Optional[FaultInjector] = None,
+                  quiet: bool = False) -> ThreadingHTTPServer:
+    """สร้าง server (ยังไม่ start) - ใช้ใน benchmark ได้โดยรัน serve_forever ใน thread"""
+    store = LocalStore(db)
+    if seed_users:
+        store.seed_users(seed_users)
+    handler = type('LocalApiHandler', (ApiHandler,), {
+        'store': store,
+        'faults': faults or FaultInjector(),
+        'quiet': quiet,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sorting Machine local stand-in API server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument('--db', default=':memory:', help='ไฟล์ SQLite (default: ในหน่วยความจำ)')
+    parser.add_argument('--seed-users', type=int, default=200, help='สร้างผู้ใช้ทดสอบ 0800000000..')
+    parser.add_argument('--latency', type=float, default=0, help='ms ต่อ request')
+    parser.add_argument('--jitter', type=float, default=0, help='± ms')
+    parser.add_argument('--failure-rate', type=float, default=0, help='สัดส่วนที่ตอบ error (0-1)')
+    parser.add_argument('--failure-status', type=int, default=503)
+    parser.add_argument('--drop-rate', type=float, default=0, help='สัดส่วนที่ปิด connection ไม่ตอบ (0-1)')
+    parser.add_argument('--cold-start', type=float, default=0, help='ms เพิ่มเมื่อ idle นานเกิน --cold-idle')
+    parser.add_argument('--cold-idle', type=float, default=300, help='วินาที')
+    parser.add_argument('--seed', type=int, help='random seed (ผลซ้ำได้)')
+    parser.add_argument('--quiet', action='store_true', help='ไม่ log ทุก request')
+    args = parser.parse_args()
+
+    faults = FaultInjector(
+        latency=args.latency, jitter=args.jitter,
+        failure_rate=args.failure_rate, failure_status=args.failure_status,
+        drop_rate=args.drop_rate, cold_start=args.cold_start, cold_idle=args.cold_idle,
+        seed=args.seed,
+    )
+    server = create_server(args.host, args.port, args.db, args.seed_users, faults, args.quiet)
+    print(f'🧪 Local API server: http://{args.host}:{args.port} '
+          f'(latency {args.latency:.0f}±{args.jitter:.0f}ms, '
+          f'fail {args.failure_rate:.0%}, drop {args.drop_rate:.0%})')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('\n👋 Server stopped')
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,8 @@ import time
 import logging
 from api_client import SortingMachineAPIClient
 from config import API_BASE_URL
+from telemetry import telemetry
+from load_simulator import run_simulation
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO)
@@ -149,9 +151,11 @@ def main():
         print('\n📋 เมนู:')
         print('1. สแกนสินค้าด้วยตนเอง')
         print('2. โหมดอัตโนมัติ')
-        print('3. ออกจากโปรแกรม')
+        print('3. สถิติการเรียก API')
+        print('4. จำลองโหลดหลายเครื่อง (load test)')
+        print('5. ออกจากโปรแกรม')
 
-        choice = input('เลือก (1-3): ').strip()
+        choice = input('เลือก (1-5): ').strip()
 
         if choice == '1':
             # โหมดด้วยตนเอง
@@ -172,6 +176,27 @@ def main():
             auto_loop(client, phone, iterations)
 
         elif choice == '3':
+            print(f'\n📊 API Telemetry:\n{telemetry.summary()}')
+
+        elif choice == '4':
+            # จำลองหลายเครื่องพร้อมกัน - ยิงไปที่ server ทดสอบเท่านั้น
+            url = input(f'Target URL (default {API_BASE_URL}): ').strip() or API_BASE_URL
+            try:
+                kiosks = int(input('จำนวนเครื่อง (default 10): ').strip() or '10')
+                users = int(input('จำนวนผู้ใช้ (default 200): ').strip() or '200')
+                duration = float(input('ระยะเวลา วินาที (default 60): ').strip() or '60')
+                time_scale = float(input('ย่อเวลารอ (default 1.0): ').strip() or '1.0')
+            except ValueError:
+                print('❌ ตัวเลขไม่ถูกต้อง')
+                continue
+
+            try:
+                run_simulation(base_url=url, kiosks=kiosks, users=users,
+                               duration=duration, time_scale=time_scale)
+            except RuntimeError as e:
+                print(f'❌ {e}')
+
+        elif choice == '5':
             print('👋 ขอบคุณที่ใช้ Sorting Machine!')
             break
 
@@ -0,0 +1,197 @@
+# ===================================================================
+# Sorting Machine - API Telemetry
+# เก็บ latency / status / bytes ต่อ endpoint ของทุก API call
+# (raspberry_pi_app/telemetry.py เป็นสำเนาของไฟล์นี้ - iot ติดตั้งแยกได้; แก้ไฟล์หนึ่งต้องแก้อีกไฟล์ให้ตรงกัน)
+# ===================================================================
+
+import bisect
+import threading
+import logging
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# ขอบบนของแต่ละ bucket (ms) - bucket สุดท้ายคือ > 10 วินาที
+LATENCY_BUCKETS_MS = [25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class EndpointStats:
+    """สถิติของ endpoint เดียว (histogram แบบ bucket คงที่ - ใช้หน่วยความจำคงที่)"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency_sum_ms = 0.0
+        self.latency_max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.status_codes = Counter()
+        self.regions = Counter()
+
+    def add(self, event: Dict):
+        latency = event['latency_ms']
+        self.count += 1
+        self.retries += event.get('retries', 0)
+        self.bytes_sent += event.get('bytes_sent', 0)
+        self.bytes_received += event.get('bytes_received', 0)
+        self.latency_sum_ms += latency
+        self.latency_max_ms = max(self.latency_max_ms, latency)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, latency)] += 1
+        self.status_codes[event.get('status') or 'error'] += 1
+        if event.get('region'):
+            self.regions[event['region']] += 1
+        if event.get('error') or (event.get('status') or 0) >= 500:
+            self.errors += 1
+
+    def percentile(self, q: float) -> float:
+        """ประมาณค่า percentile จาก histogram (ขอบบนของ bucket)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                if i < len(LATENCY_BUCKETS_MS):
+                    return min(float(LATENCY_BUCKETS_MS[i]), self.latency_max_ms)
+                return self.latency_max_ms
+        return self.latency_max_ms
+
+    def snapshot(self) -> Dict:
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'error_rate': self.errors / self.count if self.count else 0.0,
+            'retries': self.retries,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'latency_mean_ms': self.latency_sum_ms / self.count if self.count else 0.0,
+            'latency_p50_ms': self.percentile(0.50),
+            'latency_p95_ms': self.percentile(0.95),
+            'latency_p99_ms': self.percentile(0.99),
+            'latency_max_ms': self.latency_max_ms,
+            'buckets': list(self.buckets),
+            'status_codes': {str(k): v for k, v in self.status_codes.items()},
+            'regions': dict(self.regions),
+        }
+
+
+class Telemetry:
+    """
+    ตัวรวบรวมสถิติ API (ใช้ร่วมกันทั้ง process ผ่าน `telemetry` ด้านล่าง)
+    - record() เรียกจาก API client หลังทุก request
+    - add_hook(fn) รับ event dict ทุกครั้ง เช่น ส่งต่อให้ metrics exporter
+      event: endpoint, method, status, latency_ms, bytes_sent, bytes_received,
+             retries, region, error
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.hooks: List[Callable[[Dict], None]] = []
+
+    def add_hook(self, hook: Callable[[Dict], None]):
+        self.hooks.append(hook)
+
+    def record(self, endpoint: str, method: str, status: Optional[int], latency_ms: float,
+               bytes_sent: int = 0, bytes_received: int = 0, retries: int = 0,
+               region: Optional[str] = None, error: Optional[str] = None):
+        event = {
+            'endpoint': endpoint,
+            'method': method,
+            'status': status,
+            'latency_ms': latency_ms,
+            'bytes_sent': bytes_sent,
+            'bytes_received': bytes_received,
+            'retries': retries,
+            'region': region,
+            'error': error,
+        }
+        with self.lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats()
+            stats.add(event)
+
+        for hook in self.hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                logger.debug(f"Telemetry hook error: {e}")
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self.lock:
+            return {name: stats.snapshot() for name, stats in self.endpoints.items()}
+
+    def summary(self) -> str:
+        """สรุป 1 บรรทัดต่อ endpoint สำหรับ log"""
+        lines = []
+        for name, s in sorted(self.snapshot().items()):
+            lines.append(
+                f"{name}: n={s['count']} err={s['error_rate']:.1%} "
+                f"p50={s['latency_p50_ms']:.0f}ms p95={s['latency_p95_ms']:.0f}ms "
+                f"max={s['latency_max_ms']:.0f}ms retries={s['retries']} "
+                f"rx={s['bytes_received']}B"
+            )
+        return '\n'.join(lines) or 'no API calls'
+
+    def prometheus(self, prefix: str = 'sorting_api') -> str:
+        """
+        สถิติในรูปแบบ Prometheus text exposition
+        sample ของแต่ละ metric ต้องอยู่ติดกันต่อจากบรรทัด # TYPE ของมัน (วน metric ก่อน แล้วค่อยวน endpoint)
+        """
+        stats = sorted(self.snapshot().items())
+
+        def histogram(label, s):
+            lines, cumulative = [], 0
+            for bound, n in zip(LATENCY_BUCKETS_MS + ['+Inf'], s['buckets']):
+                cumulative += n
+                lines.append(f'{prefix}_request_duration_ms_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_request_duration_ms_sum{{{label}}} {s["latency_mean_ms"] * s["count"]:.1f}')
+            lines.append(f'{prefix}_request_duration_ms_count{{{label}}} {s["count"]}')
+            return lines
+
+        def requests_total(label, s):
+            return [f'{prefix}_requests_total{{{label},status="{status}"}} {n}'
+                    for status, n in sorted(s['status_codes'].items())]
+
+        def counter(metric, key):
+            return lambda label, s: [f'{prefix}_{metric}{{{label}}} {s[key]}']
+
+        families = [
+            ('request_duration_ms', 'histogram', histogram),
+            ('requests_total', 'counter', requests_total),
+            ('errors_total', 'counter', counter('errors_total', 'errors')),
+            ('retries_total', 'counter', counter('retries_total', 'retries')),
+            ('bytes_received_total', 'counter', counter('bytes_received_total', 'bytes_received')),
+            ('bytes_sent_total', 'counter', counter('bytes_sent_total', 'bytes_sent')),
+        ]
+
+        out = []
+        for metric, kind, render in families:
+            out.append(f'# TYPE {prefix}_{metric} {kind}')
+            for name, s in stats:
+                out.extend(render(f'endpoint="{name}"', s))
+        return '\n'.join(out) + '\n'
+
+
+def endpoint_name(url_or_path: str) -> str:
+    """'/api/addPoint?x=1' หรือ URL เต็ม -> 'addPoint'"""
+    path = url_or_path.split('?', 1)[0].rstrip('/')
+    return path.rsplit('/', 1)[-1] or path
+
+
+def vercel_region(headers) -> Optional[str]:
+    """region ที่ตอบ request จาก header x-vercel-id (เช่น 'sin1::iad1::...' -> 'iad1')"""
+    value = headers.get('x-vercel-id') if headers is not None else None
+    if not value:
+        return None
+    parts = [p for p in value.split('::') if p]
+    # รูปแบบ edge::function::id - เอา region ที่รัน function
+    return parts[-2] if len(parts) >= 2 else parts[0]
+
+
+telemetry = Telemetry()
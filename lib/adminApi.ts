@@ -1,4 +1,4 @@
-﻿import { supabaseAdmin } from './supabase'
+﻿import { getPointsSummary, supabaseAdmin } from './supabase'
 
 /**
  * Admin API Functions
@@ -20,12 +20,8 @@ export async function getDashboardStats() {
       .from('users')
       .select('*', { count: 'exact', head: true })
 
-    // รวมแต้มทั้งหมด
-    const { data: pointsData } = await supabaseAdmin
-      .from('user_points')
-      .select('points')
-    
-    const totalPoints = pointsData?.reduce((sum: number, p: any) => sum + (p.points || 0), 0) || 0
+    // รวมแต้มทั้งหมด + จำนวนขวด (ยอดรวมที่ trigger อัพเดทไว้ - ไม่ต้องดึงทุกแถว)
+    const summary = await getPointsSummary()
 
     // นับรายการรอโอนเงิน
     const { count: pendingWithdrawals } = await supabaseAdmin
@@ -33,16 +29,11 @@ export async function getDashboardStats() {
       .select('*', { count: 'exact', head: true })
       .eq('status', 'pending')
 
-    // นับจำนวนขวดรีไซเคิล (จาก point_history)
-    const { count: bottleCount } = await supabaseAdmin
-      .from('point_history')
-      .select('*', { count: 'exact', head: true })
-
     return {
       userCount: userCount || 0,
-      totalPoints,
+      totalPoints: summary.total_points,
       pendingWithdrawals: pendingWithdrawals || 0,
-      bottleCount: bottleCount || 0
+      bottleCount: summary.item_count
     }
   } catch (error) {
     console.error('Error fetching dashboard stats:', error)
@@ -0,0 +1,85 @@
+import { createHmac, timingSafeEqual } from 'crypto'
+
+// ใช้ฝั่ง server เท่านั้น (API routes) - ไฟล์นี้ใช้ node crypto
+
+// key ที่ตู้ทุกเครื่องส่งมาใน header X-Kiosk-Key (endpoint ที่ให้เฉพาะตู้ใช้)
+const KIOSK_API_KEY = process.env.KIOSK_API_KEY || ''
+// secret สำหรับเซ็น session token - แยกจาก key อื่น (ไม่ตั้ง = ไม่ออก token)
+const SESSION_SECRET = process.env.KIOSK_SESSION_SECRET || ''
+
+// อายุ token ของ session ที่ตู้ (1 session ไม่ควรเกินนี้)
+export const SESSION_TTL_SECONDS = 15 * 60
+
+function sign(body: string): string {
+  return createHmac('sha256', SESSION_SECRET).update(body).digest('base64url')
+}
+
+/**
+ * สร้าง session token อายุสั้นสำหรับผู้ใช้ที่ login ที่ตู้
+ * รูปแบบ: base64url({ uid, mid, exp }).HMAC-SHA256
+ * @returns { token, expires_at } หรือ null ถ้ายังไม่ได้ตั้ง secret
+ */
+export function createSessionToken(
+  user_id: string,
+  machine_id: string | null = null
+): { token: string; expires_at: string } | null {
+  if (!SESSION_SECRET) {
+    return null
+  }
+
+  const exp = Math.floor(Date.now() / 1000) + SESSION_TTL_SECONDS
+  const body = Buffer.from(JSON.stringify({ uid: user_id, mid: machine_id, exp })).toString('base64url')
+
+  return {
+    token: `${body}.${sign(body)}`,
+    expires_at: new Date(exp * 1000).toISOString()
+  }
+}
+
+/**
+ * ตรวจ session token
+ * @returns user_id ของ token ถ้าลายเซ็นถูกและยังไม่หมดอายุ, ไม่เช่นนั้น null
+ */
+export function verifySessionToken(token: string): string | null {
+  if (!SESSION_SECRET || !token) {
+    return null
+  }
+
+  const [body, signature] = token.split('.')
+  if (!body || !signature) {
+    return null
+  }
+
+  const expected = Buffer.from(sign(body))
+  const actual = Buffer.from(signature)
+  if (expected.length !== actual.length || !timingSafeEqual(expected, actual)) {
+    return null
+  }
+
+  try {
+    const payload = JSON.parse(Buffer.from(body, 'base64url').toString('utf8'))
+    if (typeof payload.uid !== 'string' || typeof payload.exp !== 'number') {
+      return null
+    }
+    if (payload.exp < Date.now() / 1000) {
+      return null
+    }
+    return payload.uid
+  } catch {
+    return null
+  }
+}
+
+/**
+ * ตรวจว่า request มาจากตู้ (header X-Kiosk-Key ตรงกับ KIOSK_API_KEY)
+ * server ที่ยังไม่ได้ตั้ง KIOSK_API_KEY จะปฏิเสธทุก request
+ */
+export function isKioskRequest(headers: Headers): boolean {
+  const key = headers.get('x-kiosk-key')
+  if (!KIOSK_API_KEY || !key) {
+    return false
+  }
+  const expected = Buffer.from(KIOSK_API_KEY)
+  const actual = Buffer.from(key)
+  return expected.length === actual.length && timingSafeEqual(expected, actual)
+}
@@ -21,6 +21,15 @@ export const supabaseAdmin: SupabaseClient = createClient(
   }
 )
 
+// RPC ที่เขียนข้อมูล (credit_points, increment_bottle_counts, login_by_phone) ถูก REVOKE จาก anon
+// ไม่ตั้ง SUPABASE_SERVICE_ROLE_KEY = supabaseAdmin กลายเป็น anon และเรียก RPC เหล่านี้ไม่ได้
+export const HAS_SERVICE_KEY = SUPABASE_SERVICE_KEY !== ''
+export const SERVICE_KEY_MISSING = 'Server misconfigured: SUPABASE_SERVICE_ROLE_KEY is not set'
+
+if (!HAS_SERVICE_KEY) {
+  console.warn('SUPABASE_SERVICE_ROLE_KEY is not set - point crediting and kiosk login are disabled')
+}
+
 // ==================== Type Definitions ====================
 export interface User {
   id: string
@@ -76,10 +85,32 @@ export interface MachineStatus {
   glass_count?: number
   plastic_count?: number
   can_count?: number
+  cpu_temp_max?: number | null
+  throttled?: number
+  inference_ms?: number | null
+  api_latency_ms?: number | null
+  uptime_s?: number
   last_heartbeat: string
   updated_at: string
 }
 
+export interface MachineHeartbeat {
+  status?: 'online' | 'maintenance'
+  window_s?: number
+  uptime_s?: number
+  cpu_temp?: number | null
+  cpu_temp_avg?: number | null
+  cpu_temp_max?: number | null
+  throttled?: number
+  storage_used?: number | null
+  inference_count?: number
+  inference_ms_avg?: number | null
+  inference_ms_p95?: number | null
+  detect_misses?: number
+  bins?: { glass?: number; plastic?: number; can?: number }
+  api_latency_ms?: number | null
+}
+
 // ==================== User Management ====================
 
 /**
@@ -110,6 +141,26 @@ export async function getUserByPhone(phone: string): Promise<User | null> {
   }
 }
 
+/**
+ * login ที่ตู้: ผู้ใช้ + แต้ม ใน query เดียว (login_by_phone - MIGRATION_LOGIN_RPC.sql)
+ * @param phone - เบอร์โทรศัพท์
+ * @returns { user, points } หรือ null ถ้าไม่พบเบอร์
+ */
+export async function loginByPhone(phone: string): Promise<{ user: User; points: number } | null> {
+  try {
+    const { data, error } = await supabaseAdmin.rpc('login_by_phone', { p_phone: phone })
+
+    if (error) {
+      throw error
+    }
+
+    return (data as { user: User; points: number } | null) || null
+  } catch (error) {
+    console.error('❌ Error logging in by phone:', error)
+    throw error
+  }
+}
+
 /**
  * สร้างผู้ใช้ใหม่
  * @param phone - เบอร์โทรศัพท์
@@ -215,6 +266,37 @@ export async function getAllUsers(limit: number = 50, offset: number = 0): Promi
   }
 }
 
+/**
+ * ดึงเบอร์โทรของผู้ใช้ทั้งหมด (ทีละหน้า)
+ * @param pageSize - จำนวนแถวต่อ query
+ * @returns array ของเบอร์โทร
+ */
+export async function getAllPhones(pageSize: number = 1000): Promise<string[]> {
+  try {
+    const phones: string[] = []
+    for (let offset = 0; ; offset += pageSize) {
+      const { data, error } = await supabaseAdmin
+        .from('users')
+        .select('phone')
+        .order('id', { ascending: true })
+        .range(offset, offset + pageSize - 1)
+
+      if (error) {
+        throw error
+      }
+
+      for (const row of data || []) {
+        if (row.phone) phones.push(row.phone)
+      }
+      if (!data || data.length < pageSize) break
+    }
+    return phones
+  } catch (error) {
+    console.error('❌ Error fetching phones:', error)
+    throw error
+  }
+}
+
 /**
  * นับจำนวนผู้ใช้ทั้งหมด
  * @returns จำนวนผู้ใช้
@@ -315,6 +397,51 @@ export async function getUserPoints(user_id: string): Promise<number> {
   }
 }
 
+/**
+ * บวกแต้ม + บันทึกประวัติ + นับขวด ใน RPC เดียว (credit_points - MIGRATION_ATOMIC_POINTS.sql)
+ * ทำงานใน transaction เดียวบน database - ไม่มีค่าหายเมื่อหลายเครื่องส่งพร้อมกัน
+ * @param user_id - ID ของผู้ใช้
+ * @param entries - รายการต่อชิ้น { item_type, points }
+ * @param options.machine_id - เครื่องที่นับขวด (ไม่ส่ง = ไม่นับขวด)
+ * @param options.bottles - จำนวนขวดที่เพิ่มของแต่ละประเภท
+ * @param options.idempotency_key - key ที่เคยใช้แล้วจะไม่บวกซ้ำ
+ * @returns { duplicate, data } - data เป็น null ถ้า duplicate
+ */
+export async function creditPoints(
+  user_id: string,
+  entries: { item_type: string | null; points: number }[],
+  options: {
+    machine_id?: string
+    bottles?: { glass?: number; plastic?: number; can?: number }
+    idempotency_key?: string | null
+  } = {}
+): Promise<{ duplicate: boolean; data: UserPoints | null }> {
+  try {
+    const bottles = options.bottles || {}
+    const { data, error } = await supabaseAdmin.rpc('credit_points', {
+      p_user_id: user_id,
+      p_entries: entries,
+      p_machine_id: options.machine_id || null,
+      p_glass: bottles.glass || 0,
+      p_plastic: bottles.plastic || 0,
+      p_can: bottles.can || 0,
+      p_idempotency_key: options.idempotency_key || null
+    })
+
+    if (error) {
+      throw error
+    }
+
+    return {
+      duplicate: Boolean(data?.duplicate),
+      data: (data?.data || null) as UserPoints | null
+    }
+  } catch (error) {
+    console.error('❌ Error crediting points:', error)
+    throw error
+  }
+}
+
 /**
  * เพิ่มแต้มให้ผู้ใช้ พร้อมบันทึกประวัติ
  * @param user_id - ID ของผู้ใช้
@@ -327,47 +454,22 @@ export async function addPoints(
   points: number,
   item_type: string = 'glass'
 ): Promise<UserPoints> {
-  try {
-    // ดึงแต้มปัจจุบัน
-    const currentPoints = await getUserPoints(user_id)
-    const newPoints = currentPoints + points
-
-    // อัพเดตแต้ม
-    const { data: updatedPoints, error: updateError } = await supabase
-      .from('user_points')
-      .update({
-        points: newPoints,
-        updated_at: new Date().toISOString()
-      })
-      .eq('user_id', user_id)
-      .select()
-      .single()
-
-    if (updateError) {
-      throw updateError
-    }
-
-    // บันทึกประวัติ
-    const { error: historyError } = await supabase
-      .from('point_history')
-      .insert([
-        {
-          user_id,
-          points,
-          item_type,
-          created_at: new Date().toISOString()
-        }
-      ])
-
-    if (historyError) {
-      console.warn('⚠️ Failed to log point history:', historyError)
-    }
+  const { data } = await creditPoints(user_id, [{ item_type, points }])
+  return data as UserPoints
+}
 
-    return updatedPoints as UserPoints
-  } catch (error) {
-    console.error('❌ Error adding points:', error)
-    throw error
-  }
+/**
+ * เพิ่มแต้มหลายชิ้นในครั้งเดียว (1 RPC)
+ * @param user_id - ID ของผู้ใช้
+ * @param entries - รายการต่อชิ้น { item_type, points }
+ * @returns ข้อมูลแต้มที่อัพเดต
+ */
+export async function addPointsBatch(
+  user_id: string,
+  entries: { item_type: string; points: number }[]
+): Promise<UserPoints> {
+  const { data } = await creditPoints(user_id, entries)
+  return data as UserPoints
 }
 
 /**
@@ -487,6 +589,79 @@ export async function getTopUsers(limit: number = 10): Promise<(User & { points:
   }
 }
 
+export type LeaderboardPeriod = 'all' | 'month' | 'week'
+
+export interface LeaderboardEntry {
+  rank: number
+  user_id: string
+  username: string
+  phone: string
+  points: number
+}
+
+/**
+ * ดึง leaderboard ของช่วงเวลาปัจจุบัน (get_leaderboard - MIGRATION_LEADERBOARD.sql)
+ * อ่านจาก leaderboard_scores ที่ trigger อัพเดทไว้ - ไม่ต้อง sort user_points ทั้งตาราง
+ * @param period - 'all' | 'month' | 'week' (แต้มที่ได้ในช่วงนั้น)
+ * @param limit - จำนวนอันดับ (สูงสุด 100)
+ * @returns array ของอันดับ (เบอร์โทรปิดบางส่วน)
+ */
+export async function getLeaderboard(
+  period: LeaderboardPeriod = 'all',
+  limit: number = 10
+): Promise<LeaderboardEntry[]> {
+  try {
+    const { data, error } = await supabaseAdmin.rpc('get_leaderboard', {
+      p_period: period,
+      p_limit: limit
+    })
+
+    if (error) {
+      throw error
+    }
+
+    return (data || []).map((row: any) => ({
+      rank: Number(row.rank),
+      user_id: row.user_id,
+      username: row.username,
+      phone: row.phone,
+      points: Number(row.points)
+    }))
+  } catch (error) {
+    console.error('❌ Error fetching leaderboard:', error)
+    throw error
+  }
+}
+
+/**
+ * ดึงสถิติแต้มรวมจาก database (get_points_stats - MIGRATION_POINTS_SUMMARY.sql)
+ * ยอดรวมถูกอัพเดทโดย trigger ทุกครั้งที่บวกแต้ม - ไม่ต้องดึง user_points ทุกแถว
+ * @returns { total_points, user_count, average_points, max_points, min_points, item_count }
+ */
+export async function getPointsSummary(): Promise<{
+  total_points: number
+  user_count: number
+  average_points: number
+  max_points: number
+  min_points: number
+  item_count: number
+}> {
+  const { data, error } = await supabaseAdmin.rpc('get_points_stats')
+
+  if (error) {
+    throw error
+  }
+
+  return {
+    total_points: Number(data?.total_points) || 0,
+    user_count: Number(data?.user_count) || 0,
+    average_points: Number(data?.average_points) || 0,
+    max_points: Number(data?.max_points) || 0,
+    min_points: Number(data?.min_points) || 0,
+    item_count: Number(data?.item_count) || 0
+  }
+}
+
 /**
  * ดึงสถิติแต้มทั้งหมด
  * @returns object ของสถิติแต้ม
@@ -499,24 +674,14 @@ export async function getTotalPointsStats(): Promise<{
   userCount: number
 }> {
   try {
-    const { data, error } = await supabaseAdmin
-      .from('user_points')
-      .select('points')
-
-    if (error) {
-      throw error
-    }
-
-    const points = (data || []).map((item: any) => item.points)
-    const total = points.reduce((sum: number, p: number) => sum + p, 0)
-    const count = points.length
+    const stats = await getPointsSummary()
 
     return {
-      totalPoints: total,
-      averagePoints: count > 0 ? Math.floor(total / count) : 0,
-      maxPoints: count > 0 ? Math.max(...points) : 0,
-      minPoints: count > 0 ? Math.min(...points) : 0,
-      userCount: count
+      totalPoints: stats.total_points,
+      averagePoints: stats.average_points,
+      maxPoints: stats.max_points,
+      minPoints: stats.min_points,
+      userCount: stats.user_count
     }
   } catch (error) {
     console.error('❌ Error fetching points stats:', error)
@@ -527,31 +692,71 @@ export async function getTotalPointsStats(): Promise<{
 // ==================== History & Logs ====================
 
 /**
- * ดึงประวัติการรีไซเคิลของผู้ใช้
+ * ดึงประวัติการรีไซเคิลของผู้ใช้ทีละหน้า (keyset - ใช้ index (user_id, created_at DESC, id DESC))
  * @param user_id - ID ของผู้ใช้
- * @param limit - จำนวนบันทึกที่ต้องการ
- * @returns array ของประวัติ
+ * @param options.cursor - cursor จากหน้าก่อน ("created_at|id") ไม่ส่ง = หน้าแรก (ล่าสุด)
+ * @param options.limit - จำนวนบันทึกต่อหน้า
+ * @returns { history, cursor, has_more } - cursor ใช้ดึงหน้าถัดไป (เก่ากว่า)
  */
-export async function getHistory(user_id: string, limit: number = 20): Promise<PointHistory[]> {
+export async function getHistoryPage(
+  user_id: string,
+  options: { cursor?: string | null; limit?: number } = {}
+): Promise<{ history: PointHistory[]; cursor: string | null; has_more: boolean }> {
   try {
-    const { data, error } = await supabase
+    const limit = options.limit || 20
+
+    // ดึงเกิน 1 แถวเพื่อรู้ว่ามีหน้าถัดไปหรือไม่
+    let query = supabase
       .from('point_history')
       .select('*')
       .eq('user_id', user_id)
       .order('created_at', { ascending: false })
-      .limit(limit)
+      .order('id', { ascending: false })
+      .limit(limit + 1)
+
+    if (options.cursor) {
+      // cursor ถูกต่อเข้า filter ของ .or() - ต้องเป็น timestamp|uuid เท่านั้น
+      const before = parseKeysetCursor(options.cursor)
+      if (!before) {
+        throw new Error('Invalid cursor')
+      }
+      query = query.or(
+        `created_at.lt."${before.at}",and(created_at.eq."${before.at}",id.lt.${before.id})`
+      )
+    }
+
+    const { data, error } = await query
 
     if (error) {
       throw error
     }
 
-    return (data || []) as PointHistory[]
+    const rows = (data || []) as PointHistory[]
+    const history = rows.slice(0, limit)
+    const last = history[history.length - 1]
+
+    return {
+      history,
+      cursor: last ? `${last.created_at}|${last.id}` : null,
+      has_more: rows.length > limit
+    }
   } catch (error) {
     console.error('❌ Error fetching history:', error)
     throw error
   }
 }
 
+/**
+ * ดึงประวัติการรีไซเคิลล่าสุดของผู้ใช้
+ * @param user_id - ID ของผู้ใช้
+ * @param limit - จำนวนบันทึกที่ต้องการ
+ * @returns array ของประวัติ
+ */
+export async function getHistory(user_id: string, limit: number = 20): Promise<PointHistory[]> {
+  const { history } = await getHistoryPage(user_id, { limit })
+  return history
+}
+
 // ==================== Withdrawals ====================
 
 /**
@@ -852,11 +1057,40 @@ export async function getActivityLogsByFilter(
 
 // ==================== Pricing & Settings ====================
 
+// ค่า pricing เริ่มต้น (ใช้เมื่อยังไม่มีใน machine_settings)
+export const DEFAULT_PRICING = {
+  glass: { points: 5, name: 'ขวดแก้ว', emoji: '🍾' },
+  plastic: { points: 3, name: 'ขวดพลาสติก', emoji: '🥤' },
+  can: { points: 4, name: 'กระป๋อง', emoji: '🥫' },
+  points_per_baht: 100, // 100 แต้ม = 1 บาท
+  min_withdrawal: 100, // ขั้นต่ำถอน 100 แต้ม
+}
+
+// cache ใน process (แต่ละ serverless instance มีของตัวเอง - ค่าเก่าได้ไม่เกิน TTL)
+const PRICING_CACHE_TTL_MS = 30_000
+let pricingCache: { pricing: any; version: string; expires: number } | null = null
+
+// FNV-1a ของ JSON (ไม่ใช้ node crypto เพราะไฟล์นี้ถูก import ฝั่ง client ด้วย)
+function pricingVersion(pricing: any): string {
+  const text = JSON.stringify(pricing)
+  let hash = 0x811c9dc5
+  for (let i = 0; i < text.length; i++) {
+    hash ^= text.charCodeAt(i)
+    hash = Math.imul(hash, 0x01000193)
+  }
+  return (hash >>> 0).toString(16).padStart(8, '0')
+}
+
 /**
- * ดึงค่า pricing ปัจจุบัน
- * @returns object ของราคา
+ * ดึงค่า pricing พร้อม version (hash ของค่า - ใช้เป็น ETag)
+ * อ่านจาก cache ถ้ายังไม่หมดอายุ, ถ้า query ล้มเหลวจะใช้ค่าใน cache ล่าสุดแทน
+ * @returns { pricing, version }
  */
-export async function getPricing(): Promise<any> {
+export async function getPricingWithVersion(): Promise<{ pricing: any; version: string }> {
+  if (pricingCache && pricingCache.expires > Date.now()) {
+    return pricingCache
+  }
+
   try {
     const { data, error } = await supabase
       .from('machine_settings')
@@ -868,19 +1102,37 @@ export async function getPricing(): Promise<any> {
       throw error
     }
 
-    return data?.value || {
-      glass: { points: 5, name: 'ขวดแก้ว', emoji: '🍾' },
-      plastic: { points: 3, name: 'ขวดพลาสติก', emoji: '🥤' },
-      can: { points: 4, name: 'กระป๋อง', emoji: '🥫' },
-      points_per_baht: 100,
-      min_withdrawal: 100
+    const pricing = data?.value || DEFAULT_PRICING
+    pricingCache = {
+      pricing,
+      version: pricingVersion(pricing),
+      expires: Date.now() + PRICING_CACHE_TTL_MS
     }
+    return pricingCache
   } catch (error) {
     console.error('❌ Error fetching pricing:', error)
+    if (pricingCache) {
+      return pricingCache
+    }
     throw error
   }
 }
 
+/**
+ * ดึงค่า pricing ปัจจุบัน (ผ่าน cache)
+ * @returns object ของราคา
+ */
+export async function getPricing(): Promise<any> {
+  return (await getPricingWithVersion()).pricing
+}
+
+/**
+ * ล้าง cache ของ pricing (เรียกหลังแก้ไขค่า)
+ */
+export function invalidatePricingCache(): void {
+  pricingCache = null
+}
+
 /**
  * อัปเดตค่า pricing (Admin only)
  * @param pricing - object ของราคาใหม่
@@ -903,6 +1155,8 @@ export async function updatePricing(pricing: any): Promise<boolean> {
       throw error
     }
 
+    invalidatePricingCache()
+
     // บันทึก activity log
     await logActivity(null, 'pricing_updated', { new_pricing: pricing })
       .catch(err => console.warn('⚠️ Failed to log activity:', err))
@@ -990,6 +1244,95 @@ export async function updateMachineStatus(
   }
 }
 
+/**
+ * บันทึก heartbeat จากเครื่อง (ค่าล่าสุดใน machine_status + ประวัติใน machine_heartbeats)
+ * ไม่แตะจำนวนขวด - credit_points นับไว้แล้ว (bins ใน payload เก็บเป็นประวัติเท่านั้น)
+ * @param machine_id - ID ของเครื่อง
+ * @param heartbeat - สรุปของรอบ (จาก HeartbeatAgent)
+ */
+export async function recordHeartbeat(
+  machine_id: string,
+  heartbeat: MachineHeartbeat
+): Promise<void> {
+  try {
+    const now = new Date().toISOString()
+    const status: Record<string, any> = {
+      machine_id,
+      status: heartbeat.status === 'maintenance' ? 'maintenance' : 'online',
+      last_heartbeat: now,
+      updated_at: now
+    }
+    // ส่งเฉพาะค่าที่วัดได้ (เครื่องที่ไม่ใช่ Pi ไม่มีอุณหภูมิ)
+    const fields: [string, any][] = [
+      ['cpu_temp', heartbeat.cpu_temp],
+      ['cpu_temp_max', heartbeat.cpu_temp_max],
+      ['storage_used', heartbeat.storage_used],
+      ['throttled', heartbeat.throttled],
+      ['inference_ms', heartbeat.inference_ms_avg],
+      ['api_latency_ms', heartbeat.api_latency_ms],
+      ['uptime_s', heartbeat.uptime_s]
+    ]
+    for (const [column, value] of fields) {
+      if (value !== undefined && value !== null) {
+        status[column] = value
+      }
+    }
+
+    const [statusResult, historyResult] = await Promise.all([
+      supabaseAdmin.from('machine_status').upsert(status, { onConflict: 'machine_id' }),
+      supabaseAdmin.from('machine_heartbeats').insert({ machine_id, payload: heartbeat })
+    ])
+
+    if (statusResult.error) {
+      throw statusResult.error
+    }
+    if (historyResult.error) {
+      console.warn('⚠️ Failed to log heartbeat:', historyResult.error)
+    }
+  } catch (error) {
+    console.error('❌ Error recording heartbeat:', error)
+    throw error
+  }
+}
+
+/**
+ * ดึงจำนวนขวดรวมทุกเครื่อง (view machine_fleet_totals - MIGRATION_DEVICE_SHARDING.sql)
+ * @returns object ของจำนวนขวด + จำนวนเครื่อง
+ */
+export async function getFleetBottleCounts(): Promise<{
+  glass: number
+  plastic: number
+  can: number
+  total: number
+  machines: number
+}> {
+  try {
+    const { data, error } = await supabase
+      .from('machine_fleet_totals')
+      .select('machines, glass_count, plastic_count, can_count')
+      .single()
+
+    if (error) {
+      throw error
+    }
+
+    const counts = {
+      glass: data?.glass_count || 0,
+      plastic: data?.plastic_count || 0,
+      can: data?.can_count || 0
+    }
+
+    return {
+      ...counts,
+      total: counts.glass + counts.plastic + counts.can,
+      machines: data?.machines || 0
+    }
+  } catch (error) {
+    console.error('❌ Error fetching fleet bottle counts:', error)
+    throw error
+  }
+}
+
 /**
  * ดึงจำนวนขวดแต่ละประเภท
  * @param machine_id - ID ของเครื่อง (default: 'main')
@@ -1068,6 +1411,33 @@ export async function updateBottleCounts(
   }
 }
 
+/**
+ * เพิ่มจำนวนขวดหลายประเภทในครั้งเดียว
+ * @param machine_id - ID ของเครื่อง
+ * @param deltas - จำนวนที่เพิ่มของแต่ละประเภท
+ */
+export async function incrementBottleCounts(
+  machine_id: string,
+  deltas: { glass?: number; plastic?: number; can?: number }
+): Promise<void> {
+  try {
+    // เพิ่มบน database โดยตรง (increment_bottle_counts - MIGRATION_ATOMIC_POINTS.sql)
+    const { error } = await supabaseAdmin.rpc('increment_bottle_counts', {
+      p_machine_id: machine_id,
+      p_glass: deltas.glass || 0,
+      p_plastic: deltas.plastic || 0,
+      p_can: deltas.can || 0
+    })
+
+    if (error) {
+      throw error
+    }
+  } catch (error) {
+    console.error('❌ Error incrementing bottle counts:', error)
+    throw error
+  }
+}
+
 /**
  * ดึงสถิติเครื่อง
  * @param machine_id - ID ของเครื่อง
@@ -1114,6 +1484,62 @@ export function isValidThaiPhone(phone: string): boolean {
   return thaiPhoneRegex.test(phone)
 }
 
+// timezone ไม่บังคับ: คอลัมน์ TIMESTAMP (ไม่มี time zone) PostgREST คืนค่าแบบไม่มี offset
+const CURSOR_TIMESTAMP_RE = /^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d{1,6})?(Z|[+-]\d{2}:\d{2})?$/
+const UUID_RE = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i
+
+/**
+ * แยก keyset cursor "timestamp|uuid" และตรวจรูปแบบ
+ * (ค่าถูกใส่ลง filter ของ PostgREST ตรงๆ - ต้องไม่ยอมให้แทรก filter อื่นได้)
+ * timestamp รับได้ทั้ง TIMESTAMPTZ และ TIMESTAMP (ส่งกลับไปตามที่ server ออกให้ ไม่แปลง):
+ * - "2024-05-01T10:20:30.123456+00:00|<uuid>"
+ * - "2024-05-01T10:20:30.123456|<uuid>"
+ * - "2024-05-01T10:20:30Z|<uuid>"
+ * @returns { at, id } หรือ null ถ้ารูปแบบไม่ถูกต้อง
+ */
+export function parseKeysetCursor(cursor: string): { at: string; id: string } | null {
+  const parts = cursor.split('|')
+  if (parts.length !== 2) {
+    return null
+  }
+  const [at, id] = parts
+  if (!CURSOR_TIMESTAMP_RE.test(at) || Number.isNaN(Date.parse(at)) || !UUID_RE.test(id)) {
+    return null
+  }
+  return { at, id }
+}
+
+// เครื่องที่ไม่ส่ง machine_id มา (client เวอร์ชันเก่า) นับเป็นแถว 'main'
+export const DEFAULT_MACHINE_ID = 'main'
+
+/**
+ * ตรวจ machine_id (DEVICE_ID ของเครื่อง) ที่ส่งมากับ request
+ * @param value - ค่าจาก body / query
+ * @returns machine_id, DEFAULT_MACHINE_ID ถ้าไม่ได้ส่งมา, หรือ null ถ้ารูปแบบไม่ถูกต้อง
+ */
+export function normalizeMachineId(value: unknown): string | null {
+  if (value === undefined || value === null || value === '') {
+    return DEFAULT_MACHINE_ID
+  }
+  if (typeof value !== 'string' || !/^[A-Za-z0-9_.:-]{1,64}$/.test(value)) {
+    return null
+  }
+  return value
+}
+
+/**
+ * แปลง label จากเครื่องเป็นประเภทขวด
+ * @param label - เช่น 'glass', 'plastic_bottle', 'can'
+ * @returns 'glass' | 'plastic' | 'can' หรือ null ถ้าไม่รู้จัก
+ */
+export function getBottleType(label: string): 'glass' | 'plastic' | 'can' | null {
+  const labelLower = label.toLowerCase()
+  if (labelLower.includes('glass')) return 'glass'
+  if (labelLower.includes('plastic')) return 'plastic'
+  if (labelLower.includes('can') || labelLower.includes('aluminum')) return 'can'
+  return null
+}
+
 /**
  * แปลง points เป็น baht
  * @param points - จำนวนแต้ม
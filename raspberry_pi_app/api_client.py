@@ -3,10 +3,14 @@
 # ===================================================================
 
 import re
+import time
+import threading
 import requests
 import logging
-from typing import Optional, Dict
-from config import API_BASE_URL, API_TIMEOUT
+from typing import Optional, Dict, List
+from config import API_BASE_URL, API_TIMEOUT, API_KEEPALIVE_INTERVAL, DEVICE_ID, KIOSK_API_KEY
+from connectivity import CircuitBreaker
+from telemetry import telemetry, endpoint_name, vercel_region
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,17 +23,92 @@ def is_valid_thai_phone(phone: str) -> bool:
     return bool(re.match(pattern, phone))
 
 
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """API ออฟไลน์ (circuit open) - ไม่ได้ส่ง request จริง"""
+
+
 class APIClient:
     """Client สำหรับเชื่อมต่อ Sorting Machine API"""
 
-    def __init__(self):
+    def __init__(self, breaker: Optional[CircuitBreaker] = None):
         self.base_url = API_BASE_URL
+        self.device_id = DEVICE_ID
         self.session = requests.Session()
+        if KIOSK_API_KEY:
+            self.session.headers['X-Kiosk-Key'] = KIOSK_API_KEY
+        self.breaker = breaker or CircuitBreaker()
         self.current_user = None
         self.current_user_id = None
+        self.session_token = None  # จาก /api/loginPhone (อายุสั้น)
+        self.last_warm_up = 0
+
+    def _request(self, method: str, path: str, retries: int = 0, **kwargs) -> requests.Response:
+        """
+        ส่ง request ผ่าน circuit breaker และบันทึก telemetry
+        ตอนออฟไลน์จะ raise CircuitOpenError ทันที (ไม่ต้องรอ API_TIMEOUT)
+        retries: ครั้งที่เคยส่งรายการนี้ไม่สำเร็จมาก่อน (สำหรับสถิติ)
+        """
+        endpoint = endpoint_name(path)
+        if not self.breaker.allow():
+            raise CircuitOpenError(f'API offline (circuit open): {path}')
+        kwargs.setdefault('timeout', API_TIMEOUT)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, f'{self.base_url}{path}', **kwargs)
+        except requests.exceptions.RequestException as e:
+            telemetry.record(endpoint, method, None, (time.perf_counter() - start) * 1000,
+                             retries=retries, error=type(e).__name__)
+            self.breaker.record_failure()
+            raise
+        telemetry.record(
+            endpoint, method, response.status_code, (time.perf_counter() - start) * 1000,
+            bytes_sent=len(response.request.body or b''),
+            bytes_received=len(response.content),
+            retries=retries,
+            region=vercel_region(response.headers),
+        )
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def warm_up(self):
+        """
+        เปิด connection ล่วงหน้าใน background (DNS + TCP + TLS)
+        เรียกตอนผู้ใช้เริ่มกด numpad เพื่อให้ login ไม่ต้องรอ handshake
+        """
+        if time.monotonic() - self.last_warm_up < API_KEEPALIVE_INTERVAL:
+            return
+        self.last_warm_up = time.monotonic()
+
+        def _warm():
+            try:
+                self._request('GET', '/api/pricing', timeout=API_TIMEOUT)
+            except requests.exceptions.RequestException as e:
+                logger.debug(f"Warm-up failed: {e}")
+
+        threading.Thread(target=_warm, daemon=True).start()
 
     def login(self, phone: str) -> Dict:
         """Login ด้วยเบอร์โทรศัพท์"""
+        result = self.lookup_user(phone)
+        if result['success']:
+            self.set_user(result['user'], result.get('session_token'))
+            logger.info(f"✅ Login successful: {result['user']['username']}")
+        return result
+
+    def set_user(self, user: Dict, session_token: Optional[str] = None):
+        """
+        ตั้งผู้ใช้ของ session ปัจจุบัน (เช่น login จาก UserDirectory ในเครื่อง)
+        session_token: จาก /api/loginPhone - login จากรายชื่อในเครื่องจะยังไม่มีจนกว่าจะตรวจกับ server
+        """
+        self.current_user = user
+        self.current_user_id = user['id']
+        self.session_token = session_token
+
+    def lookup_user(self, phone: str) -> Dict:
+        """ตรวจเบอร์โทรกับ server โดยไม่เปลี่ยน session (ใช้ตรวจเบื้องหลังได้)"""
         # ตรวจสอบรูปแบบเบอร์โทรศัพท์ก่อน
         if not is_valid_thai_phone(phone):
             logger.warning(f"❌ Invalid phone format: {phone}")
@@ -39,22 +118,21 @@ class APIClient:
             }
         
         try:
-            response = self.session.post(
-                f'{self.base_url}/api/loginPhone',
-                json={'phone': phone},
+            response = self._request(
+                'POST', '/api/loginPhone',
+                json={'phone': phone, 'machine_id': self.device_id},
                 timeout=API_TIMEOUT
             )
             response.raise_for_status()
             data = response.json()
 
             if data.get('user'):
-                self.current_user = data['user']
-                self.current_user_id = data['user']['id']
-                logger.info(f"✅ Login successful: {data['user']['username']}")
                 return {
                     'success': True,
                     'user': data['user'],
-                    'points': data.get('points', 0)
+                    'points': data.get('points', 0),
+                    'pricing_version': data.get('pricing_version'),
+                    'session_token': data.get('session_token')
                 }
             else:
                 return {'success': False, 'error': 'ไม่พบบัญชีผู้ใช้'}
@@ -63,7 +141,7 @@ class APIClient:
             # Handle specific HTTP errors
             if e.response.status_code == 404:
                 logger.warning(f"❌ User not found: {phone}")
-                return {'success': False, 'error': 'ไม่พบเบอร์โทรศัพท์นี้ในระบบ\nกรุณาลงทะเบียนก่อนใช้งาน'}
+                return {'success': False, 'error': 'ไม่พบเบอร์โทรศัพท์นี้ในระบบ\nกรุณาลงทะเบียนก่อนใช้งาน', 'status': 404}
             elif e.response.status_code == 400:
                 logger.warning(f"❌ Bad request: {phone}")
                 return {'success': False, 'error': 'ข้อมูลไม่ถูกต้อง'}
@@ -72,26 +150,35 @@ class APIClient:
                 return {'success': False, 'error': f'เกิดข้อผิดพลาด ({e.response.status_code})'}
         except requests.exceptions.RequestException as e:
             logger.error(f"❌ Login error: {e}")
-            return {'success': False, 'error': 'ไม่สามารถเชื่อมต่อ API ได้'}
+            return {'success': False, 'error': 'ไม่สามารถเชื่อมต่อ API ได้', 'offline': True}
 
     def logout(self):
         """Logout"""
         self.current_user = None
         self.current_user_id = None
+        self.session_token = None
         logger.info("👋 Logged out")
 
-    def send_points(self, item_type: str, points: int) -> Dict:
-        """ส่งคะแนนไปยัง API"""
-        if not self.current_user_id:
+    def send_points(self, item_type: str, points: int, user_id: Optional[str] = None,
+                    idempotency_key: Optional[str] = None) -> Dict:
+        """
+        ส่งคะแนนไปยัง API
+        user_id: ระบุผู้ใช้ตรงๆ (ใช้จาก background thread เพื่อไม่ให้ผูกกับ session ปัจจุบัน)
+        idempotency_key: key เดิมส่งซ้ำได้ - server จะไม่บวกแต้มซ้ำ
+        """
+        user_id = user_id or self.current_user_id
+        if not user_id:
             return {'success': False, 'error': 'กรุณา Login ก่อน'}
 
         try:
-            response = self.session.post(
-                f'{self.base_url}/api/addPoint',
+            response = self._request(
+                'POST', '/api/addPoint',
                 json={
-                    'user_id': self.current_user_id,
+                    'user_id': user_id,
                     'points': points,
-                    'label': item_type
+                    'label': item_type,
+                    'idempotency_key': idempotency_key,
+                    'machine_id': self.device_id
                 },
                 timeout=API_TIMEOUT
             )
@@ -100,37 +187,166 @@ class APIClient:
             logger.info(f"✅ Points sent: +{points} for {item_type}")
             return {'success': True, 'data': data}
 
+        except requests.exceptions.HTTPError as e:
+            logger.error(f"❌ Send points HTTP error: {e}")
+            return {'success': False, 'error': str(e), 'status': e.response.status_code}
         except requests.exceptions.RequestException as e:
             logger.error(f"❌ Send points error: {e}")
             return {'success': False, 'error': str(e)}
 
-    def get_points(self) -> Optional[int]:
-        """ดึงคะแนนปัจจุบัน"""
-        if not self.current_user_id:
-            return None
+    def send_points_batch(self, items: List[Dict], user_id: Optional[str] = None,
+                          idempotency_key: Optional[str] = None, retries: int = 0) -> Dict:
+        """
+        ส่งคะแนนหลายชิ้นในครั้งเดียว
+        items: [{'label': 'glass', 'count': 2}, ...]
+        retries: จำนวนครั้งที่ batch นี้เคยส่งไม่สำเร็จ (สำหรับ telemetry)
+        """
+        user_id = user_id or self.current_user_id
+        if not user_id:
+            return {'success': False, 'error': 'กรุณา Login ก่อน'}
 
         try:
-            response = self.session.get(
-                f'{self.base_url}/api/getPoint',
-                params={'user_id': self.current_user_id},
+            response = self._request(
+                'POST', '/api/addPointBatch',
+                retries=retries,
+                json={
+                    'user_id': user_id,
+                    'items': items,
+                    'idempotency_key': idempotency_key,
+                    'machine_id': self.device_id
+                },
                 timeout=API_TIMEOUT
             )
             response.raise_for_status()
             data = response.json()
-            return data.get('points', 0)
+            logger.info(f"✅ Batch sent: +{data.get('total_points', 0)} for {len(items)} type(s)")
+            return {'success': True, 'data': data}
 
-        except Exception as e:
-            logger.error(f"❌ Get points error: {e}")
-            return None
+        except requests.exceptions.HTTPError as e:
+            logger.error(f"❌ Send batch HTTP error: {e}")
+            return {'success': False, 'error': str(e), 'status': e.response.status_code}
+        except requests.exceptions.RequestException as e:
+            logger.error(f"❌ Send batch error: {e}")
+            return {'success': False, 'error': str(e)}
 
-    def is_connected(self) -> bool:
-        """ตรวจสอบการเชื่อมต่อ API"""
+    def get_user_directory(self, cursor: Optional[str] = None, limit: int = 500) -> Dict:
+        """ดึงรายชื่อผู้ใช้ที่เปลี่ยนหลัง cursor (สำหรับ UserDirectory)"""
+        params = {'limit': limit}
+        if cursor:
+            params['cursor'] = cursor
+        try:
+            response = self._request(
+                'GET', '/api/userDirectory',
+                params=params,
+                timeout=API_TIMEOUT
+            )
+            response.raise_for_status()
+            return {'success': True, 'data': response.json()}
+
+        except requests.exceptions.HTTPError as e:
+            return {'success': False, 'error': str(e), 'status': e.response.status_code}
+        except (requests.exceptions.RequestException, ValueError) as e:
+            return {'success': False, 'error': str(e)}
+
+    def _session_headers(self, user_id: str) -> Dict:
+        """Authorization ของ session ปัจจุบัน (เฉพาะเมื่อเป็นผู้ใช้คนเดียวกัน)"""
+        if self.session_token and user_id == self.current_user_id:
+            return {'Authorization': f'Bearer {self.session_token}'}
+        return {}
+
+    def get_history(self, cursor: Optional[str] = None, limit: int = 20,
+                    user_id: Optional[str] = None) -> Dict:
+        """
+        ดึงประวัติแต้มของผู้ใช้ทีละหน้า (ใหม่ -> เก่า)
+        ส่ง data['cursor'] ของหน้าก่อนเพื่อดึงหน้าถัดไป จนกว่า data['has_more'] เป็น False
+        """
+        user_id = user_id or self.current_user_id
+        if not user_id:
+            return {'success': False, 'error': 'No user logged in'}
+        # server ต้องการ session token ของผู้ใช้คนนี้ (login จากรายชื่อในเครื่องยังไม่มี)
+        headers = self._session_headers(user_id)
+        if not headers:
+            return {'success': False, 'error': 'No session token', 'status': 401}
+        params = {'user_id': user_id, 'limit': limit}
+        if cursor:
+            params['cursor'] = cursor
+        try:
+            response = self._request(
+                'GET', '/api/getHistory',
+                params=params,
+                headers=headers,
+                timeout=API_TIMEOUT
+            )
+            response.raise_for_status()
+            return {'success': True, 'data': response.json()}
+
+        except requests.exceptions.HTTPError as e:
+            return {'success': False, 'error': str(e), 'status': e.response.status_code}
+        except (requests.exceptions.RequestException, ValueError) as e:
+            return {'success': False, 'error': str(e)}
+
+    def get_pricing(self, etag: Optional[str] = None) -> Dict:
+        """ดึง pricing (ส่ง etag เดิมเพื่อรับ 304 ถ้าไม่เปลี่ยน)"""
+        headers = {'If-None-Match': etag} if etag else {}
+        try:
+            response = self._request(
+                'GET', '/api/pricing',
+                headers=headers,
+                timeout=API_TIMEOUT
+            )
+            if response.status_code == 304:
+                return {'success': True, 'not_modified': True}
+            response.raise_for_status()
+            return {'success': True, 'data': response.json(), 'etag': response.headers.get('ETag')}
+
+        except requests.exceptions.HTTPError as e:
+            return {'success': False, 'error': str(e), 'status': e.response.status_code}
+        except (requests.exceptions.RequestException, ValueError) as e:
+            return {'success': False, 'error': str(e)}
+
+    def get_phone_filter(self, etag: Optional[str] = None) -> Dict:
+        """ดาวน์โหลด Bloom filter ของเบอร์ที่ลงทะเบียน (ส่ง etag เดิมเพื่อรับ 304)"""
+        headers = {'If-None-Match': etag} if etag else {}
         try:
-            response = self.session.get(
-                f'{self.base_url}/api/getPoint',
-                params={'user_id': 'test'},
-                timeout=5
+            response = self._request(
+                'GET', '/api/phoneFilter',
+                headers=headers,
+                timeout=API_TIMEOUT
             )
-            return response.status_code in [200, 400, 404]
-        except:
+            if response.status_code == 304:
+                return {'success': True, 'not_modified': True}
+            response.raise_for_status()
+            return {'success': True, 'data': response.json(), 'etag': response.headers.get('ETag')}
+
+        except requests.exceptions.HTTPError as e:
+            return {'success': False, 'error': str(e), 'status': e.response.status_code}
+        except (requests.exceptions.RequestException, ValueError) as e:
+            return {'success': False, 'error': str(e)}
+
+    def send_heartbeat(self, payload: Dict) -> Dict:
+        """ส่งสถานะเครื่อง (HeartbeatAgent)"""
+        try:
+            response = self._request(
+                'POST', '/api/heartbeat',
+                json={'machine_id': self.device_id, **payload},
+                timeout=API_TIMEOUT
+            )
+            response.raise_for_status()
+            return {'success': True}
+
+        except requests.exceptions.HTTPError as e:
+            return {'success': False, 'error': str(e), 'status': e.response.status_code}
+        except requests.exceptions.RequestException as e:
+            return {'success': False, 'error': str(e)}
+
+    def probe(self, timeout: float = 5) -> bool:
+        """ตรวจว่า API ตอบได้ (ไม่ผ่าน circuit breaker - ใช้โดย HealthMonitor)"""
+        try:
+            response = self.session.get(f'{self.base_url}/api/pricing', timeout=timeout)
+            return response.status_code < 500
+        except requests.exceptions.RequestException:
             return False
+
+    def is_connected(self) -> bool:
+        """สถานะการเชื่อมต่อ API ล่าสุด (จาก circuit breaker - ไม่ส่ง request)"""
+        return self.breaker.online
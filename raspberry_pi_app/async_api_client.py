@@ -0,0 +1,392 @@
+# ===================================================================
+# Sorting Machine - Async API Client (httpx + HTTP/2)
+# ใช้ endpoint และรูปแบบผลลัพธ์เดียวกับ APIClient
+# ===================================================================
+
+import asyncio
+import socket
+import threading
+import time
+import logging
+from typing import Optional, Dict, List
+from urllib.parse import urlparse
+
+from config import API_BASE_URL, API_TIMEOUT, API_KEEPALIVE_INTERVAL, DEVICE_ID, KIOSK_API_KEY
+from api_client import is_valid_thai_phone
+from connectivity import CircuitBreaker
+from telemetry import telemetry, endpoint_name, vercel_region
+
+try:
+    import httpx
+    HAS_HTTPX = True
+except ImportError:
+    httpx = None
+    HAS_HTTPX = False
+
+# http2=True ต้องมี h2 (pip install httpx[http2]) - ไม่มีจะใช้ HTTP/1.1 keep-alive แทน
+try:
+    import h2  # noqa: F401
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAPIClient:
+    """
+    Client แบบ async บน httpx (HTTP/2, connection เดียว multiplex ทุก request)
+    - event loop ของตัวเองใน background thread
+    - warm_up(): resolve DNS + เปิด TLS connection ล่วงหน้า
+    - keepalive ping ระหว่าง idle เพื่อไม่ให้ connection ถูกปิด
+    ใช้แทน APIClient ได้ทันที (มี method แบบ sync ชื่อเดียวกัน)
+    หรือเรียก coroutine a* โดยตรงจากโค้ด asyncio
+    """
+
+    def __init__(self, base_url: str = API_BASE_URL,
+                 keepalive_interval: float = API_KEEPALIVE_INTERVAL,
+                 breaker: Optional[CircuitBreaker] = None):
+        if not HAS_HTTPX:
+            raise RuntimeError('AsyncAPIClient requires httpx: pip install "httpx[http2]"')
+
+        self.base_url = base_url
+        self.device_id = DEVICE_ID
+        self.keepalive_interval = keepalive_interval
+        self.breaker = breaker or CircuitBreaker()
+        self.current_user = None
+        self.current_user_id = None
+        self.session_token = None  # จาก /api/loginPhone (อายุสั้น)
+        self.client = None
+        self.last_activity = 0
+        self.keepalive_task = None
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    # ---------- event loop helpers ----------
+
+    def submit(self, coro):
+        """ส่ง coroutine เข้า loop ของ client - คืน concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def _run(self, coro):
+        """เรียก coroutine แบบ sync (ห้ามเรียกจาก loop ของ client เอง)"""
+        return self.submit(coro).result()
+
+    def _ensure_client(self):
+        if self.client is None:
+            if not HAS_HTTP2:
+                logger.warning("⚠️ h2 not installed - AsyncAPIClient using HTTP/1.1 (pip install httpx[http2])")
+            self.client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=HAS_HTTP2,
+                timeout=API_TIMEOUT,
+                headers={'X-Kiosk-Key': KIOSK_API_KEY} if KIOSK_API_KEY else None,
+                limits=httpx.Limits(keepalive_expiry=self.keepalive_interval * 3),
+            )
+        return self.client
+
+    async def _request(self, method: str, path: str, retries: int = 0, **kwargs):
+        """ส่ง request ผ่าน circuit breaker (ออฟไลน์ = ConnectError ทันที) และบันทึก telemetry"""
+        if not self.breaker.allow():
+            raise httpx.ConnectError(f'API offline (circuit open): {path}')
+        endpoint = endpoint_name(path)
+        start = time.perf_counter()
+        try:
+            response = await self._ensure_client().request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            telemetry.record(endpoint, method, None, (time.perf_counter() - start) * 1000,
+                             retries=retries, error=type(e).__name__)
+            self.breaker.record_failure()
+            raise
+        self.last_activity = time.monotonic()
+        telemetry.record(
+            endpoint, method, response.status_code, (time.perf_counter() - start) * 1000,
+            bytes_sent=len(response.request.content or b''),
+            bytes_received=len(response.content),
+            retries=retries,
+            region=vercel_region(response.headers),
+        )
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    # ---------- connection warm-up ----------
+
+    def warm_up(self):
+        """เปิด connection ล่วงหน้า (ไม่บล็อก) - เรียกซ้ำได้"""
+        if time.monotonic() - self.last_activity < self.keepalive_interval:
+            return
+        self.last_activity = time.monotonic()
+        self.submit(self.awarm_up())
+
+    async def awarm_up(self):
+        url = urlparse(self.base_url)
+        port = url.port or (443 if url.scheme == 'https' else 80)
+        try:
+            # resolve ล่วงหน้าให้ resolver cache ของเครื่องมีคำตอบพร้อม
+            await self.loop.getaddrinfo(url.hostname, port, type=socket.SOCK_STREAM)
+            # request เบาๆ เพื่อเปิด TCP + TLS + HTTP/2 connection
+            await self._request('GET', '/api/pricing')
+        except (OSError, httpx.HTTPError) as e:
+            logger.debug(f"Warm-up failed: {e}")
+
+        if self.keepalive_task is None:
+            self.keepalive_task = self.loop.create_task(self._keepalive())
+
+    async def _keepalive(self):
+        """ping เมื่อ idle เพื่อรักษา connection ไว้"""
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            if time.monotonic() - self.last_activity < self.keepalive_interval:
+                continue
+            try:
+                await self._request('GET', '/api/pricing')
+            except httpx.HTTPError as e:
+                logger.debug(f"Keepalive failed: {e}")
+
+    # ---------- API (async) ----------
+
+    async def alogin(self, phone: str) -> Dict:
+        """Login ด้วยเบอร์โทรศัพท์"""
+        result = await self.alookup_user(phone)
+        if result['success']:
+            self.set_user(result['user'], result.get('session_token'))
+            logger.info(f"✅ Login successful: {result['user']['username']}")
+        return result
+
+    async def alookup_user(self, phone: str) -> Dict:
+        """ตรวจเบอร์โทรกับ server โดยไม่เปลี่ยน session"""
+        if not is_valid_thai_phone(phone):
+            logger.warning(f"❌ Invalid phone format: {phone}")
+            return {
+                'success': False,
+                'error': 'เบอร์โทรศัพท์ไม่ถูกต้อง\n(ต้องขึ้นต้นด้วย 06, 08 หรือ 09 และมี 10 หลัก)'
+            }
+
+        try:
+            response = await self._request(
+                'POST', '/api/loginPhone', json={'phone': phone, 'machine_id': self.device_id}
+            )
+            response.raise_for_status()
+            data = response.json()
+
+            if data.get('user'):
+                return {
+                    'success': True,
+                    'user': data['user'],
+                    'points': data.get('points', 0),
+                    'pricing_version': data.get('pricing_version'),
+                    'session_token': data.get('session_token')
+                }
+            return {'success': False, 'error': 'ไม่พบบัญชีผู้ใช้'}
+
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
+            if status == 404:
+                logger.warning(f"❌ User not found: {phone}")
+                return {'success': False, 'error': 'ไม่พบเบอร์โทรศัพท์นี้ในระบบ\nกรุณาลงทะเบียนก่อนใช้งาน', 'status': 404}
+            if status == 400:
+                logger.warning(f"❌ Bad request: {phone}")
+                return {'success': False, 'error': 'ข้อมูลไม่ถูกต้อง'}
+            logger.error(f"❌ Login HTTP error: {e}")
+            return {'success': False, 'error': f'เกิดข้อผิดพลาด ({status})'}
+        except httpx.HTTPError as e:
+            logger.error(f"❌ Login error: {e}")
+            return {'success': False, 'error': 'ไม่สามารถเชื่อมต่อ API ได้', 'offline': True}
+
+    async def _post_points(self, path: str, payload: Dict, retries: int = 0) -> Dict:
+        try:
+            response = await self._request('POST', path, retries=retries, json=payload)
+            response.raise_for_status()
+            return {'success': True, 'data': response.json()}
+        except httpx.HTTPStatusError as e:
+            logger.error(f"❌ Send points HTTP error: {e}")
+            return {'success': False, 'error': str(e), 'status': e.response.status_code}
+        except httpx.HTTPError as e:
+            logger.error(f"❌ Send points error: {e}")
+            return {'success': False, 'error': str(e)}
+
+    async def asend_points(self, item_type: str, points: int, user_id: Optional[str] = None,
+                           idempotency_key: Optional[str] = None) -> Dict:
+        """ส่งคะแนนไปยัง API"""
+        user_id = user_id or self.current_user_id
+        if not user_id:
+            return {'success': False, 'error': 'กรุณา Login ก่อน'}
+        return await self._post_points('/api/addPoint', {
+            'user_id': user_id,
+            'points': points,
+            'label': item_type,
+            'idempotency_key': idempotency_key,
+            'machine_id': self.device_id
+        })
+
+    async def asend_points_batch(self, items: List[Dict], user_id: Optional[str] = None,
+                                 idempotency_key: Optional[str] = None, retries: int = 0) -> Dict:
+        """ส่งคะแนนหลายชิ้นในครั้งเดียว"""
+        user_id = user_id or self.current_user_id
+        if not user_id:
+            return {'success': False, 'error': 'กรุณา Login ก่อน'}
+        return await self._post_points('/api/addPointBatch', {
+            'user_id': user_id,
+            'items': items,
+            'idempotency_key': idempotency_key,
+            'machine_id': self.device_id
+        }, retries=retries)
+
+    async def aget_user_directory(self, cursor: Optional[str] = None, limit: int = 500) -> Dict:
+        """ดึงรายชื่อผู้ใช้ที่เปลี่ยนหลัง cursor"""
+        params = {'limit': limit}
+        if cursor:
+            params['cursor'] = cursor
+        try:
+            response = await self._request('GET', '/api/userDirectory', params=params)
+            response.raise_for_status()
+            return {'success': True, 'data': response.json()}
+        except httpx.HTTPStatusError as e:
+            return {'success': False, 'error': str(e), 'status': e.response.status_code}
+        except (httpx.HTTPError, ValueError) as e:
+            return {'success': False, 'error': str(e)}
+
+    def _session_headers(self, user_id: str) -> Dict:
+        """Authorization ของ session ปัจจุบัน (เฉพาะเมื่อเป็นผู้ใช้คนเดียวกัน)"""
+        if self.session_token and user_id == self.current_user_id:
+            return {'Authorization': f'Bearer {self.session_token}'}
+        return {}
+
+    async def aget_history(self, cursor: Optional[str] = None, limit: int = 20,
+                           user_id: Optional[str] = None) -> Dict:
+        """ดึงประวัติแต้มของผู้ใช้ทีละหน้า (keyset cursor)"""
+        user_id = user_id or self.current_user_id
+        if not user_id:
+            return {'success': False, 'error': 'No user logged in'}
+        # server ต้องการ session token ของผู้ใช้คนนี้ (login จากรายชื่อในเครื่องยังไม่มี)
+        headers = self._session_headers(user_id)
+        if not headers:
+            return {'success': False, 'error': 'No session token', 'status': 401}
+        params = {'user_id': user_id, 'limit': limit}
+        if cursor:
+            params['cursor'] = cursor
+        try:
+            response = await self._request(
+                'GET', '/api/getHistory', params=params, headers=headers
+            )
+            response.raise_for_status()
+            return {'success': True, 'data': response.json()}
+        except httpx.HTTPStatusError as e:
+            return {'success': False, 'error': str(e), 'status': e.response.status_code}
+        except (httpx.HTTPError, ValueError) as e:
+            return {'success': False, 'error': str(e)}
+
+    async def aget_pricing(self, etag: Optional[str] = None) -> Dict:
+        """ดึง pricing (conditional GET)"""
+        headers = {'If-None-Match': etag} if etag else {}
+        try:
+            response = await self._request('GET', '/api/pricing', headers=headers)
+            if response.status_code == 304:
+                return {'success': True, 'not_modified': True}
+            response.raise_for_status()
+            return {'success': True, 'data': response.json(), 'etag': response.headers.get('ETag')}
+        except httpx.HTTPStatusError as e:
+            return {'success': False, 'error': str(e), 'status': e.response.status_code}
+        except (httpx.HTTPError, ValueError) as e:
+            return {'success': False, 'error': str(e)}
+
+    async def aget_phone_filter(self, etag: Optional[str] = None) -> Dict:
+        """ดาวน์โหลด Bloom filter ของเบอร์ที่ลงทะเบียน"""
+        headers = {'If-None-Match': etag} if etag else {}
+        try:
+            response = await self._request('GET', '/api/phoneFilter', headers=headers)
+            if response.status_code == 304:
+                return {'success': True, 'not_modified': True}
+            response.raise_for_status()
+            return {'success': True, 'data': response.json(), 'etag': response.headers.get('ETag')}
+        except httpx.HTTPStatusError as e:
+            return {'success': False, 'error': str(e), 'status': e.response.status_code}
+        except (httpx.HTTPError, ValueError) as e:
+            return {'success': False, 'error': str(e)}
+
+    async def asend_heartbeat(self, payload: Dict) -> Dict:
+        """ส่งสถานะเครื่อง (HeartbeatAgent)"""
+        try:
+            response = await self._request(
+                'POST', '/api/heartbeat', json={'machine_id': self.device_id, **payload}
+            )
+            response.raise_for_status()
+            return {'success': True}
+        except httpx.HTTPStatusError as e:
+            return {'success': False, 'error': str(e), 'status': e.response.status_code}
+        except httpx.HTTPError as e:
+            return {'success': False, 'error': str(e)}
+
+    # ---------- API (sync - ใช้แทน APIClient) ----------
+
+    def login(self, phone: str) -> Dict:
+        return self._run(self.alogin(phone))
+
+    def lookup_user(self, phone: str) -> Dict:
+        return self._run(self.alookup_user(phone))
+
+    def set_user(self, user: Dict, session_token: Optional[str] = None):
+        """ตั้งผู้ใช้ของ session ปัจจุบัน"""
+        self.current_user = user
+        self.current_user_id = user['id']
+        self.session_token = session_token
+
+    def logout(self):
+        """Logout"""
+        self.current_user = None
+        self.current_user_id = None
+        self.session_token = None
+        logger.info("👋 Logged out")
+
+    def send_points(self, item_type: str, points: int, user_id: Optional[str] = None,
+                    idempotency_key: Optional[str] = None) -> Dict:
+        return self._run(self.asend_points(item_type, points, user_id, idempotency_key))
+
+    def send_points_batch(self, items: List[Dict], user_id: Optional[str] = None,
+                          idempotency_key: Optional[str] = None, retries: int = 0) -> Dict:
+        return self._run(self.asend_points_batch(items, user_id, idempotency_key, retries))
+
+    def get_user_directory(self, cursor: Optional[str] = None, limit: int = 500) -> Dict:
+        return self._run(self.aget_user_directory(cursor, limit))
+
+    def get_history(self, cursor: Optional[str] = None, limit: int = 20,
+                    user_id: Optional[str] = None) -> Dict:
+        return self._run(self.aget_history(cursor, limit, user_id))
+
+    def get_pricing(self, etag: Optional[str] = None) -> Dict:
+        return self._run(self.aget_pricing(etag))
+
+    def get_phone_filter(self, etag: Optional[str] = None) -> Dict:
+        return self._run(self.aget_phone_filter(etag))
+
+    def send_heartbeat(self, payload: Dict) -> Dict:
+        return self._run(self.asend_heartbeat(payload))
+
+    def probe(self, timeout: float = 5) -> bool:
+        """ตรวจว่า API ตอบได้ (ไม่ผ่าน circuit breaker - ใช้โดย HealthMonitor)"""
+        async def _probe():
+            try:
+                response = await self._ensure_client().get('/api/pricing', timeout=timeout)
+                return response.status_code < 500
+            except httpx.HTTPError:
+                return False
+        return self._run(_probe())
+
+    def is_connected(self) -> bool:
+        """สถานะการเชื่อมต่อ API ล่าสุด (จาก circuit breaker)"""
+        return self.breaker.online
+
+    def close(self):
+        """ปิด connection และหยุด event loop"""
+        async def _close():
+            if self.keepalive_task:
+                self.keepalive_task.cancel()
+            if self.client:
+                await self.client.aclose()
+        self._run(_close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
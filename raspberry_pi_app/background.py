@@ -0,0 +1,56 @@
+# ===================================================================
+# Sorting Machine - Background Refresher
+# thread วนดึงข้อมูลจาก server เป็นระยะ ใช้ร่วมกันระหว่าง
+# UserDirectory / PhoneFilter / PricingCache
+# ===================================================================
+
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicRefresher:
+    """
+    base class ของงานที่ต้อง refresh(api) ทันทีแล้ววนทุก interval วินาที
+    - subclass เขียน refresh(api) และตั้ง refresh_interval / refresh_name
+    - refresh_soon() ปลุก thread ให้ทำรอบถัดไปทันทีโดยไม่ต้องรอครบ interval
+    - stop() ปลุก thread ให้ออกจาก loop ทันที
+    """
+
+    refresh_interval: float = 60
+    refresh_name: str = 'Background refresh'
+
+    def __init__(self):
+        self.running = False
+        self.wake = threading.Event()
+
+    def refresh(self, api):
+        raise NotImplementedError
+
+    def start_refresh(self, api, interval: float = None):
+        """refresh ทันที แล้ววนทุก interval วินาทีใน background thread"""
+        if self.running:
+            return
+        self.running = True
+        interval = self.refresh_interval if interval is None else interval
+
+        def _loop():
+            while self.running:
+                try:
+                    self.refresh(api)
+                except Exception as e:
+                    logger.error(f"❌ {self.refresh_name} error: {e}")
+                self.wake.wait(timeout=interval)
+                self.wake.clear()
+
+        threading.Thread(target=_loop, daemon=True).start()
+
+    def refresh_soon(self):
+        """ขอให้ refresh รอบถัดไปทันที"""
+        if self.running:
+            self.wake.set()
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
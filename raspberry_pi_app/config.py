@@ -10,12 +10,58 @@ load_dotenv()
 # API Configuration
 API_BASE_URL = os.getenv('API_BASE_URL', 'https://sortingmachine.vercel.app')
 API_TIMEOUT = 10
+LOGIN_TIMEOUT = 6  # วินาที - รอ login จาก server นานสุดเท่านี้ (หน้าจอไม่ค้าง - ยกเลิกได้)
 
-# Points Configuration
+# machine_id ของเครื่องนี้ใน machine_status (แต่ละเครื่องต้องไม่ซ้ำกัน)
+DEVICE_ID = os.getenv('DEVICE_ID', 'main')
+
+# key ของตู้ (ตรงกับ KIOSK_API_KEY บน server) - ส่งใน header X-Kiosk-Key ทุก request
+KIOSK_API_KEY = os.getenv('KIOSK_API_KEY', '')
+
+# ใช้ AsyncAPIClient (httpx + HTTP/2) แทน requests - ต้องติดตั้ง httpx[http2]
+API_ASYNC = os.getenv('API_ASYNC', 'false').lower() == 'true'
+API_KEEPALIVE_INTERVAL = 20  # วินาที - ping รักษา connection / ระยะห่างขั้นต่ำของ warm-up
+
+# Connectivity (circuit breaker + health monitor)
+CIRCUIT_FAILURE_THRESHOLD = 3  # error ติดกันกี่ครั้งถึงถือว่าออฟไลน์
+HEALTH_INTERVAL = 30           # วินาที - ตรวจ API ตอนออนไลน์
+HEALTH_PROBE_TIMEOUT = 3       # วินาที - timeout ของ probe (สั้นกว่า API_TIMEOUT)
+HEALTH_BACKOFF_BASE = 2        # วินาที - ตรวจซ้ำตอนออฟไลน์ (เพิ่มเท่าตัว)
+HEALTH_BACKOFF_MAX = 60        # วินาที
+
+# Outbox (เก็บแต้มในเครื่องก่อนส่ง)
+OUTBOX_PATH = os.getenv('OUTBOX_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'outbox.db'))
+OUTBOX_BATCH_SIZE = 20       # ส่งเป็น batch เมื่อครบกี่ชิ้น
+OUTBOX_FLUSH_MS = 3000       # ...หรือเมื่อรายการเก่าสุดรอนานเกินกี่ ms
+OUTBOX_RETRY_BASE = 2        # วินาที - backoff เริ่มต้นเมื่อส่งไม่สำเร็จ
+OUTBOX_RETRY_MAX = 300       # วินาที - backoff สูงสุด
+
+# User Directory (รายชื่อผู้ใช้ในเครื่อง - login ได้ทันที/ตอนออฟไลน์)
+USER_DIRECTORY_PATH = os.getenv('USER_DIRECTORY_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'users.db'))
+USER_SYNC_INTERVAL = 300     # วินาที - ดึงรายชื่อที่เปลี่ยนจาก server
+USER_SYNC_PAGE_SIZE = 500    # จำนวนผู้ใช้ต่อ 1 request
+
+# Phone Filter (Bloom filter ของเบอร์ที่ลงทะเบียน - ตอบ "ไม่พบเบอร์" ได้ทันที)
+PHONE_FILTER_PATH = os.getenv('PHONE_FILTER_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'phone_filter.json'))
+PHONE_FILTER_REFRESH = 600   # วินาที - ดาวน์โหลด filter ใหม่ (conditional GET)
+
+# Pricing (ดึงจาก /api/pricing ด้วย ETag - POINTS_CONFIG เป็นค่าสำรองตอนออฟไลน์)
+PRICING_PATH = os.getenv('PRICING_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pricing.json'))
+PRICING_REFRESH = 300        # วินาที
+
+# Heartbeat (สถานะเครื่อง -> machine_status)
+HEARTBEAT_INTERVAL = 60          # วินาที - ส่งสรุป 1 ครั้งต่อรอบ
+HEARTBEAT_SAMPLE_INTERVAL = 10   # วินาที - วัดอุณหภูมิ/throttling ในเครื่อง
+HEARTBEAT_MAX_INTERVAL = 600     # วินาที - รอบสูงสุดเมื่อ API ช้า/ล้มเหลว
+HEARTBEAT_SLOW_MS = 2000         # latency เฉลี่ยของ API ที่ถือว่าช้า
+HEARTBEAT_DISK_PATH = '/'
+HEARTBEAT_MAX_SAMPLES = 1000     # ค่าอุณหภูมิ/inference สูงสุดที่เก็บต่อรอบ (ออฟไลน์นานไม่กินหน่วยความจำ)
+
+# Points Configuration (ค่าเริ่มต้นเดียวกับ DEFAULT_PRICING ใน lib/supabase.ts)
 POINTS_CONFIG = {
     'glass': {'name': 'ขวดแก้ว', 'points': 5, 'rate': 0.50, 'emoji': '🍾'},
     'plastic': {'name': 'ขวดพลาสติก', 'points': 3, 'rate': 0.30, 'emoji': '🧴'},
-    'can': {'name': 'กระป๋อง', 'points': 2, 'rate': 0.20, 'emoji': '🥫'},
+    'can': {'name': 'กระป๋อง', 'points': 4, 'rate': 0.20, 'emoji': '🥫'},
 }
 
 # GPIO Configuration (Raspberry Pi)
@@ -42,7 +88,10 @@ DISPLAY_HEIGHT = int(os.getenv('DISPLAY_HEIGHT', '600'))
 # สำหรับ Raspberry Pi ให้ใช้ FULLSCREEN=true
 FULLSCREEN = os.getenv('FULLSCREEN', 'false').lower() == 'true'
 
+# โหลด/ย่อรูปทุกขนาดที่ใช้ไว้ตั้งแต่เปิดโปรแกรม (หน้าสรุปผลไม่ต้องอ่านไฟล์)
+IMAGE_CACHE_WARM = os.getenv('IMAGE_CACHE_WARM', 'true').lower() == 'true'
+
 # แสดงปุ่มปิดบนหน้าจอ (สำคัญสำหรับ touch screen)
 SHOW_CLOSE_BUTTON = os.getenv('SHOW_CLOSE_BUTTON', 'true').lower() == 'true'
 
-print(f"✅ Config loaded: API={API_BASE_URL}, Fullscreen={FULLSCREEN}, GPIO={USE_GPIO}")
+print(f"✅ Config loaded: API={API_BASE_URL}, Device={DEVICE_ID}, Fullscreen={FULLSCREEN}, GPIO={USE_GPIO}")
@@ -0,0 +1,133 @@
+# ===================================================================
+# Sorting Machine - Connectivity
+# Circuit breaker + health monitor ที่ใช้ร่วมกันทุก API call
+# ===================================================================
+
+import random
+import threading
+import time
+import logging
+from typing import Callable, List
+
+from config import (
+    CIRCUIT_FAILURE_THRESHOLD, HEALTH_INTERVAL, HEALTH_PROBE_TIMEOUT,
+    HEALTH_BACKOFF_BASE, HEALTH_BACKOFF_MAX
+)
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = 'closed'  # ปกติ - ส่ง request ได้
+STATE_OPEN = 'open'      # API ล่ม - ตอบ error ทันทีไม่ต้องรอ timeout
+
+
+class CircuitBreaker:
+    """
+    นับ error ติดกันของ API call
+    - ครบ CIRCUIT_FAILURE_THRESHOLD ครั้ง -> open (allow() = False)
+    - HealthMonitor probe สำเร็จ หรือมี call ที่สำเร็จ -> closed
+    listener จะถูกเรียกด้วย online: bool เมื่อสถานะเปลี่ยน (จาก thread ใดก็ได้)
+    """
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD):
+        self.failure_threshold = failure_threshold
+        self.lock = threading.Lock()
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        self.last_success = 0
+        self.listeners: List[Callable[[bool], None]] = []
+        self.failure_listeners: List[Callable[[], None]] = []
+
+    @property
+    def online(self) -> bool:
+        return self.state == STATE_CLOSED
+
+    def allow(self) -> bool:
+        """ส่ง request ได้หรือไม่ (เรียกทุก call - ต้องเร็ว)"""
+        return self.state == STATE_CLOSED
+
+    def add_listener(self, callback: Callable[[bool], None]):
+        self.listeners.append(callback)
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.last_success = time.monotonic()
+            changed = self.state != STATE_CLOSED
+            self.state = STATE_CLOSED
+        if changed:
+            logger.info(f"🟢 API back online (down {time.monotonic() - self.opened_at:.0f}s)")
+            self._notify(True)
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            changed = self.state == STATE_CLOSED and self.failures >= self.failure_threshold
+            if changed:
+                self.state = STATE_OPEN
+                self.opened_at = time.monotonic()
+        for callback in self.failure_listeners:
+            callback()
+        if changed:
+            logger.warning(f"🔴 API offline - circuit open after {self.failures} failure(s)")
+            self._notify(False)
+
+    def _notify(self, online: bool):
+        for callback in self.listeners:
+            try:
+                callback(online)
+            except Exception as e:
+                logger.error(f"❌ Connectivity listener error: {e}")
+
+
+class HealthMonitor:
+    """
+    Thread ตรวจ API เป็นระยะ
+    - ออนไลน์: probe ทุก HEALTH_INTERVAL วินาที (ข้ามถ้ามี call สำเร็จเมื่อเร็วๆ นี้)
+    - มี call ล้มเหลว: probe ทันทีเพื่อยืนยัน (เปิด circuit ได้เร็วกว่ารอ timeout ซ้ำๆ)
+    - ออฟไลน์: probe แบบ exponential backoff จนกว่าจะกลับมา
+    probe(timeout) -> bool ต้องไม่ผ่าน circuit breaker
+    """
+
+    def __init__(self, breaker: CircuitBreaker, probe: Callable[[float], bool]):
+        self.breaker = breaker
+        self.probe = probe
+        self.wake = threading.Event()
+        self.running = False
+        self.backoff = 0
+        breaker.failure_listeners.append(self.wake.set)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+
+    def _next_delay(self) -> float:
+        if self.breaker.online:
+            self.backoff = 0
+            return HEALTH_INTERVAL
+        self.backoff = min(HEALTH_BACKOFF_MAX, max(HEALTH_BACKOFF_BASE, self.backoff * 2))
+        return self.backoff * random.uniform(0.8, 1.2)
+
+    def _loop(self):
+        while self.running:
+            recently_ok = time.monotonic() - self.breaker.last_success < HEALTH_INTERVAL
+            if not (self.breaker.online and recently_ok and not self.breaker.failures):
+                try:
+                    ok = self.probe(HEALTH_PROBE_TIMEOUT)
+                except Exception as e:
+                    logger.debug(f"Health probe error: {e}")
+                    ok = False
+                if ok:
+                    self.breaker.record_success()
+                else:
+                    self.breaker.record_failure()
+
+            # ล้าง wake ที่เกิดจาก probe ของตัวเอง
+            self.wake.clear()
+            self.wake.wait(timeout=self._next_delay())
@@ -0,0 +1,209 @@
+# ===================================================================
+# Sorting Machine - Heartbeat Agent
+# สุ่มวัดสถานะเครื่องในเครื่อง แล้วส่งสรุป 1 ครั้งต่อรอบไป /api/heartbeat
+# (อุณหภูมิ CPU, throttling, disk, เวลา inference, จำนวนขวดต่อถัง)
+# ===================================================================
+
+import math
+import shutil
+import subprocess
+import threading
+import time
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from config import (
+    HEARTBEAT_INTERVAL, HEARTBEAT_SAMPLE_INTERVAL, HEARTBEAT_MAX_INTERVAL,
+    HEARTBEAT_SLOW_MS, HEARTBEAT_DISK_PATH, HEARTBEAT_MAX_SAMPLES
+)
+from telemetry import telemetry
+
+logger = logging.getLogger(__name__)
+
+THERMAL_PATH = '/sys/class/thermal/thermal_zone0/temp'
+
+
+def read_cpu_temp() -> Optional[float]:
+    """อุณหภูมิ CPU (°C) - None ถ้าไม่ใช่ Raspberry Pi"""
+    try:
+        with open(THERMAL_PATH, 'r') as f:
+            return int(f.read().strip()) / 1000
+    except (OSError, ValueError):
+        return None
+
+
+def read_throttled() -> Optional[int]:
+    """
+    flags จาก `vcgencmd get_throttled` (เช่น 0x50005)
+    bit 0 = ไฟไม่พอ, 1 = ลด freq, 2 = throttled, 3 = ร้อนเกิน (soft limit)
+    bit 16-19 = เคยเกิดตั้งแต่บูต
+    """
+    try:
+        output = subprocess.run(
+            ['vcgencmd', 'get_throttled'],
+            capture_output=True, text=True, timeout=2
+        ).stdout
+        return int(output.strip().split('=', 1)[1], 16)
+    except (OSError, subprocess.SubprocessError, IndexError, ValueError):
+        return None
+
+
+def read_disk_used(path: str = HEARTBEAT_DISK_PATH) -> Optional[float]:
+    """พื้นที่ disk ที่ใช้ไป (%)"""
+    try:
+        usage = shutil.disk_usage(path)
+        return round(100 * usage.used / usage.total, 1)
+    except OSError:
+        return None
+
+
+class HeartbeatAgent:
+    """
+    รวมค่าในเครื่องแล้วส่ง heartbeat เดียวต่อรอบ (ไม่ส่งทุก event)
+    - sample ทุก HEARTBEAT_SAMPLE_INTERVAL: อุณหภูมิ (ล่าสุด/เฉลี่ย/สูงสุด), throttled (OR ของ flags)
+    - record_detection() / record_item() เรียกจาก controller / GUI (แค่บวกตัวนับ)
+    - ส่งทุก HEARTBEAT_INTERVAL; API ช้า (latency เฉลี่ยเกิน HEARTBEAT_SLOW_MS)
+      หรือส่งไม่สำเร็จ จะยืดรอบเป็นเท่าตัวจนถึง HEARTBEAT_MAX_INTERVAL
+    - ส่งไม่สำเร็จ: ค่าของรอบนั้นรวมเข้ารอบถัดไป (จำนวนขวดไม่หาย)
+      อุณหภูมิ/inference เก็บแค่ HEARTBEAT_MAX_SAMPLES ค่าล่าสุด (ออฟไลน์นานหน่วยความจำไม่โต)
+    """
+
+    def __init__(self, api, status_provider=None):
+        self.api = api
+        # callback: () -> 'online' | 'maintenance' (เช่น watchdog lockout)
+        self.status_provider = status_provider
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.running = False
+        self.interval = HEARTBEAT_INTERVAL
+        self.api_latency_ms = None  # EWMA ของทุก API call (จาก telemetry hook)
+        self.started = time.time()
+        self._reset()
+        telemetry.add_hook(self._on_api_event)
+
+    def _reset(self):
+        self.temps: Deque[float] = deque(maxlen=HEARTBEAT_MAX_SAMPLES)
+        self.throttled = 0
+        self.inference_ms: Deque[float] = deque(maxlen=HEARTBEAT_MAX_SAMPLES)
+        self.inference_count = 0
+        self.detect_misses = 0
+        self.bins: Dict[str, int] = {}
+        self.window_start = time.time()
+
+    # ---------- inputs ----------
+
+    def record_detection(self, label: Optional[str], elapsed: float):
+        """เวลาที่ใช้ตรวจจับ 1 ชิ้น (วินาที)"""
+        with self.lock:
+            if label is None:
+                self.detect_misses += 1
+            self.inference_count += 1
+            self.inference_ms.append(elapsed * 1000)
+
+    def record_item(self, item_type: str):
+        """ขวด 1 ชิ้นลงถัง"""
+        with self.lock:
+            self.bins[item_type] = self.bins.get(item_type, 0) + 1
+
+    def _on_api_event(self, event: Dict):
+        latency = event['latency_ms']
+        with self.lock:
+            if self.api_latency_ms is None:
+                self.api_latency_ms = latency
+            else:
+                self.api_latency_ms = self.api_latency_ms * 0.8 + latency * 0.2
+
+    def sample(self):
+        """วัดอุณหภูมิและ throttling 1 ครั้ง"""
+        temp = read_cpu_temp()
+        throttled = read_throttled()
+        with self.lock:
+            if temp is not None:
+                self.temps.append(temp)
+            if throttled is not None:
+                self.throttled |= throttled
+
+    # ---------- heartbeat ----------
+
+    def build(self) -> Dict:
+        """สรุปค่าของรอบปัจจุบัน"""
+        with self.lock:
+            temps = self.temps
+            inference = sorted(self.inference_ms)
+            payload = {
+                'status': self.status_provider() if self.status_provider else 'online',
+                'window_s': round(time.time() - self.window_start),
+                'uptime_s': round(time.time() - self.started),
+                'cpu_temp': round(temps[-1], 1) if temps else None,
+                'cpu_temp_avg': round(sum(temps) / len(temps), 1) if temps else None,
+                'cpu_temp_max': round(max(temps), 1) if temps else None,
+                'throttled': self.throttled,
+                'storage_used': read_disk_used(),
+                'inference_count': self.inference_count,
+                'inference_ms_avg': round(sum(inference) / len(inference)) if inference else None,
+                'inference_ms_p95': round(inference[math.ceil(0.95 * len(inference)) - 1]) if inference else None,
+                'detect_misses': self.detect_misses,
+                'bins': dict(self.bins),
+                'api_latency_ms': round(self.api_latency_ms) if self.api_latency_ms is not None else None,
+            }
+        return payload
+
+    def send(self) -> bool:
+        """ส่ง heartbeat ของรอบนี้ - สำเร็จแล้วเริ่มรอบใหม่"""
+        payload = self.build()
+        result = self.api.send_heartbeat(payload)
+        if not result.get('success'):
+            logger.debug(f"Heartbeat failed: {result.get('error')}")
+            return False
+        with self.lock:
+            # ตัดเฉพาะส่วนที่ส่งไปแล้ว (ระหว่างส่งอาจมีขวดเพิ่ม)
+            for item, count in payload['bins'].items():
+                self.bins[item] -= count
+            bins = {k: v for k, v in self.bins.items() if v}
+            self._reset()
+            self.bins = bins
+        return True
+
+    def _next_interval(self, ok: bool) -> float:
+        slow = self.api_latency_ms is not None and self.api_latency_ms > HEARTBEAT_SLOW_MS
+        if ok and not slow:
+            self.interval = HEARTBEAT_INTERVAL
+        else:
+            self.interval = min(HEARTBEAT_MAX_INTERVAL, self.interval * 2)
+        return self.interval
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+
+        def _loop():
+            next_send = time.monotonic() + self.interval
+            while self.running:
+                try:
+                    self.sample()
+                except Exception as e:
+                    logger.debug(f"Heartbeat sample error: {e}")
+
+                if time.monotonic() >= next_send:
+                    ok = False
+                    # ออฟไลน์: ไม่ต้องลองส่ง รวมค่าไว้รอบถัดไป
+                    if self.api.is_connected():
+                        try:
+                            ok = self.send()
+                        except Exception as e:
+                            logger.error(f"❌ Heartbeat error: {e}")
+                    previous = self.interval
+                    interval = self._next_interval(ok)
+                    if interval != previous:
+                        logger.info(f"💓 Heartbeat every {interval:.0f}s")
+                    next_send = time.monotonic() + interval
+
+                self.wake.wait(timeout=HEARTBEAT_SAMPLE_INTERVAL)
+
+        threading.Thread(target=_loop, daemon=True).start()
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
@@ -0,0 +1,92 @@
+# ===================================================================
+# Sorting Machine - Image Cache
+# รูปใน public/ (PNG / SVG) ที่ decode + ย่อแล้ว ใช้ร่วมกันทั้ง process
+# หน้าจอสรุปผลทุก session ไม่ต้องอ่านไฟล์/ย่อรูปใหม่
+# ===================================================================
+
+import os
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPainter, QPixmap
+from PyQt5.QtSvg import QSvgRenderer
+from PyQt5.QtWidgets import QApplication
+
+logger = logging.getLogger(__name__)
+
+
+class ImageCache:
+    """
+    cache ของ pixmap ตาม (path, width, height, dpr)
+    - PNG/JPG: decode จากไฟล์ครั้งเดียวต่อ path แล้วย่อแบบ SmoothTransformation ครั้งเดียวต่อขนาด
+    - SVG: render เป็น pixmap ตามขนาดจริงบนจอ (ไม่ต้องวาด vector ใหม่ทุกครั้งที่ repaint)
+    - ไฟล์ไม่มี/เสีย: คืน None (จำไว้ - ไม่ลองอ่านซ้ำ) ให้ผู้เรียกใช้ emoji แทน
+    ต้องเรียกจาก GUI thread เท่านั้น (QPixmap)
+    """
+
+    def __init__(self):
+        self.sources: Dict[str, Optional[QPixmap]] = {}
+        self.scaled: Dict[Tuple[str, int, int, float], Optional[QPixmap]] = {}
+
+    @staticmethod
+    def device_pixel_ratio() -> float:
+        app = QApplication.instance()
+        return app.devicePixelRatio() if app else 1.0
+
+    def pixmap(self, path: str, width: int, height: int,
+               dpr: Optional[float] = None) -> Optional[QPixmap]:
+        """pixmap ขนาดไม่เกิน width x height (คงสัดส่วน) - None ถ้าโหลดไม่ได้"""
+        dpr = dpr or self.device_pixel_ratio()
+        key = (path, width, height, dpr)
+        if key in self.scaled:
+            return self.scaled[key]
+
+        pixmap = self._render(path, round(width * dpr), round(height * dpr))
+        if pixmap is not None:
+            pixmap.setDevicePixelRatio(dpr)
+        self.scaled[key] = pixmap
+        return pixmap
+
+    def _source(self, path: str) -> Optional[QPixmap]:
+        if path not in self.sources:
+            pixmap = QPixmap(path) if path and os.path.exists(path) else None
+            if pixmap is not None and pixmap.isNull():
+                logger.warning(f"⚠️ Cannot decode image: {path}")
+                pixmap = None
+            self.sources[path] = pixmap
+        return self.sources[path]
+
+    def _render(self, path: str, width: int, height: int) -> Optional[QPixmap]:
+        if path.lower().endswith('.svg'):
+            if not os.path.exists(path):
+                return None
+            renderer = QSvgRenderer(path)
+            if not renderer.isValid():
+                logger.warning(f"⚠️ Cannot render SVG: {path}")
+                return None
+            size = renderer.defaultSize()
+            size.scale(width, height, Qt.KeepAspectRatio)
+            pixmap = QPixmap(size)
+            pixmap.fill(Qt.transparent)
+            painter = QPainter(pixmap)
+            renderer.render(painter)
+            painter.end()
+            return pixmap
+
+        source = self._source(path)
+        if source is None:
+            return None
+        return source.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    def warm(self, entries: Iterable[Tuple[str, int, int]]):
+        """โหลดล่วงหน้า [(path, width, height), ...] (เช่น ตอนเปิดโปรแกรม)"""
+        for path, width, height in entries:
+            self.pixmap(path, width, height)
+
+    def clear(self):
+        self.sources.clear()
+        self.scaled.clear()
+
+
+image_cache = ImageCache()
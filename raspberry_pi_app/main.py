@@ -18,24 +18,37 @@
 
 import sys
 import os
+import threading
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QLineEdit, QStackedWidget, QFrame,
     QGridLayout, QMessageBox, QSizePolicy, QSpacerItem, QShortcut, QDialog
 )
 from PyQt5.QtCore import Qt, QTimer, QSize, QPropertyAnimation, QSequentialAnimationGroup, pyqtProperty, pyqtSignal, QObject
-from PyQt5.QtGui import QFont, QPixmap, QPainter, QColor, QKeySequence
-from PyQt5.QtSvg import QSvgWidget, QSvgRenderer
+from PyQt5.QtGui import QFont, QPainter, QColor, QKeySequence, QPalette
 
-from config import POINTS_CONFIG, DISPLAY_WIDTH, DISPLAY_HEIGHT, FULLSCREEN, USE_GPIO
+from config import (
+    POINTS_CONFIG, DISPLAY_WIDTH, DISPLAY_HEIGHT, FULLSCREEN, USE_GPIO, API_ASYNC, LOGIN_TIMEOUT,
+    IMAGE_CACHE_WARM
+)
 from api_client import APIClient
+from async_api_client import AsyncAPIClient, HAS_HTTPX
+from point_submitter import PointSubmitter
+from user_directory import UserDirectory
+from phone_filter import PhoneFilter
+from pricing import PricingCache
+from connectivity import HealthMonitor
+from telemetry import telemetry
+from heartbeat import HeartbeatAgent
+from image_cache import image_cache
 
 # Hardware Controller (สำหรับ Raspberry Pi)
 if USE_GPIO:
-    from sorting_hardware import SortingController, cleanup as hardware_cleanup
+    from sorting_hardware import SortingController, cleanup as hardware_cleanup, watchdog
 else:
     SortingController = None
     hardware_cleanup = None
+    watchdog = None
 
 # Get the path to images
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -53,6 +66,15 @@ IMAGES = {
     'qr_register': os.path.join(PUBLIC_DIR, 'frame.png'),
 }
 
+# รูป + ขนาดที่หน้าต่างๆ ใช้ - โหลดเข้า image_cache ตอนเปิดโปรแกรม
+WARM_IMAGES = [
+    *((IMAGES[item], 40, 40) for item in ('glass', 'plastic', 'can')),  # ProcessingPage
+    *((IMAGES[item], 50, 50) for item in ('glass', 'plastic', 'can')),  # ResultPage summary
+    (IMAGES['recycle'], 100, 100),
+    (IMAGES['qr_register'], 150, 150),
+    (IMAGES['qr_register'], 220, 220),
+]
+
 # Colors
 COLORS = {
     'primary': '#10B981',
@@ -76,27 +98,14 @@ def create_icon_label(emoji: str, size: int = 48) -> QLabel:
 
 
 def create_image_label(image_path: str, width: int = 64, height: int = 64) -> QWidget:
-    """สร้าง widget แสดงรูปภาพ (รองรับทั้ง PNG และ SVG)"""
-    
-    if os.path.exists(image_path):
-        # ถ้าเป็น SVG ใช้ QSvgWidget
-        if image_path.lower().endswith('.svg'):
-            try:
-                svg_widget = QSvgWidget(image_path)
-                svg_widget.setFixedSize(width, height)
-                return svg_widget
-            except:
-                pass
-        
-        # ถ้าเป็นรูปอื่น (PNG, JPG) ใช้ QLabel + QPixmap
-        pixmap = QPixmap(image_path)
-        if not pixmap.isNull():
-            label = QLabel()
-            label.setAlignment(Qt.AlignCenter)
-            scaled = pixmap.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            label.setPixmap(scaled)
-            label.setFixedSize(width, height)
-            return label
+    """สร้าง widget แสดงรูปภาพ (รองรับทั้ง PNG และ SVG - ผ่าน image_cache)"""
+    pixmap = image_cache.pixmap(image_path, width, height)
+    if pixmap is not None:
+        label = QLabel()
+        label.setAlignment(Qt.AlignCenter)
+        label.setPixmap(pixmap)
+        label.setFixedSize(width, height)
+        return label
     
     # Fallback: แสดง emoji
     label = QLabel("♻️")
@@ -106,6 +115,41 @@ def create_image_label(image_path: str, width: int = 64, height: int = 64) -> QW
     return label
 
 
+class FlashLabel(QLabel):
+    """
+    QLabel ที่กระพริบสีเมื่อมีขวดเข้า - QPropertyAnimation บน property `color` (ผ่าน palette)
+    - ไม่เรียก setStyleSheet (ไม่ re-polish widget ทุกชิ้น) และไม่สร้าง QTimer ต่อชิ้น
+    - flash() ระหว่างที่ยังเล่นอยู่ = เริ่มจากสีไฮไลต์ใหม่ใน animation เดิม (ขวดเข้าถี่ๆ ไม่ซ้อนกัน)
+    ห้ามตั้ง color ใน stylesheet ของ label นี้ (จะทับ palette)
+    """
+
+    def __init__(self, text: str, color: str, flash_color: str, duration: int = 300, parent=None):
+        super().__init__(text, parent)
+        self._color = QColor(color)
+        self.set_color(self._color)
+        self.animation = QPropertyAnimation(self, b'color', self)
+        self.animation.setDuration(duration)
+        self.animation.setStartValue(QColor(flash_color))
+        self.animation.setEndValue(QColor(color))
+
+    def get_color(self) -> QColor:
+        return self._color
+
+    def set_color(self, color: QColor):
+        self._color = QColor(color)
+        palette = self.palette()
+        palette.setColor(QPalette.WindowText, self._color)
+        self.setPalette(palette)
+
+    color = pyqtProperty(QColor, get_color, set_color)
+
+    def flash(self):
+        if self.animation.state() == QPropertyAnimation.Running:
+            self.animation.setCurrentTime(0)
+        else:
+            self.animation.start()
+
+
 class StyleHelper:
     """Helper class สำหรับ styles"""
 
@@ -230,8 +274,14 @@ class HomePage(QWidget):
         layout.setContentsMargins(40, 30, 40, 30)
         layout.setSpacing(0)
 
-        # Top bar with fullscreen button
+        # Top bar with connectivity indicator + fullscreen button
         top_bar = QHBoxLayout()
+
+        self.connection_label = QLabel()
+        self.connection_label.setFont(QFont('Segoe UI', 11))
+        top_bar.addWidget(self.connection_label)
+        self.set_online(True)
+
         top_bar.addStretch()
 
         self.fullscreen_btn = QPushButton("⛶")
@@ -366,16 +416,48 @@ class HomePage(QWidget):
         if self.main_window:
             self.main_window.toggle_fullscreen()
 
+    def set_online(self, online: bool):
+        """แสดงสถานะการเชื่อมต่อ API"""
+        if online:
+            self.connection_label.setText("🟢 ออนไลน์")
+            self.connection_label.setStyleSheet(f"color: {COLORS['text_secondary']};")
+        else:
+            self.connection_label.setText("🔴 ออฟไลน์ - สะสมแต้มได้ตามปกติ")
+            self.connection_label.setStyleSheet(f"color: {COLORS['danger']};")
+
 
 # ============================================================
 # PAGE: LOGIN (หน้าล็อกอิน)
 # ============================================================
+class LoginSignals(QObject):
+    """ส่งผล login เบื้องหลังกลับ GUI"""
+    verified = pyqtSignal(str, object)       # (phone, result) - ตรวจ login ในเครื่องกับ server
+    finished = pyqtSignal(int, str, object)  # (request_id, phone, result) - login ผ่าน server
+
+
+SPINNER_FRAMES = ['◐', '◓', '◑', '◒']
+
+
 class LoginPage(QWidget):
     """หน้าล็อกอินด้วยเบอร์โทร - พร้อม Numpad สำหรับ Touchscreen"""
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.main_window = parent
+        # แต้มที่ค้างใน outbox ตอน login (server ยังไม่รวม)
+        self.login_pending_points = 0
+        self.login_signals = LoginSignals()
+        self.login_signals.verified.connect(self.on_login_verified)
+        self.login_signals.finished.connect(self.on_login_finished)
+        # login ที่รอ server อยู่ (request_id, phone) - None = ไม่มี
+        self.login_request = None
+        self.login_seq = 0
+        self.spinner_frame = 0
+        self.spinner_timer = QTimer()
+        self.spinner_timer.timeout.connect(self.update_spinner)
+        self.login_deadline = QTimer()
+        self.login_deadline.setSingleShot(True)
+        self.login_deadline.timeout.connect(self.on_login_timeout)
         self.setup_ui()
 
     def setup_ui(self):
@@ -405,7 +487,7 @@ class LoginPage(QWidget):
             }}
         """)
         back_btn.setCursor(Qt.PointingHandCursor)
-        back_btn.clicked.connect(lambda: self.main_window.show_page('home'))
+        back_btn.clicked.connect(self.go_back)
         top_bar.addWidget(back_btn)
 
         top_bar.addStretch()
@@ -650,9 +732,22 @@ class LoginPage(QWidget):
 
         layout.addLayout(content_layout, 1)
 
+    def go_back(self):
+        """กลับหน้าแรก (ยกเลิก login ที่รออยู่)"""
+        if self.login_request is not None:
+            self.cancel_login()
+        self.main_window.show_page('home')
+
     def numpad_press(self, num: str):
         """กดตัวเลข"""
+        if self.login_request is not None:
+            return
         current = self.phone_input.text()
+        if not current:
+            # เปิด connection ล่วงหน้าระหว่างที่ผู้ใช้กำลังกดเบอร์
+            self.main_window.api.warm_up()
+            # ตรวจ pricing ล่าสุดก่อนเริ่ม session (304 ถ้าไม่เปลี่ยน)
+            self.main_window.pricing.refresh_soon()
         if len(current) < 10:
             self.phone_input.setText(current + num)
             self.update_display()
@@ -660,6 +755,8 @@ class LoginPage(QWidget):
 
     def numpad_delete(self):
         """ลบตัวเลขสุดท้าย"""
+        if self.login_request is not None:
+            return
         current = self.phone_input.text()
         if current:
             self.phone_input.setText(current[:-1])
@@ -667,6 +764,8 @@ class LoginPage(QWidget):
 
     def numpad_clear(self):
         """ล้างทั้งหมด"""
+        if self.login_request is not None:
+            return
         self.phone_input.setText("")
         self.update_display()
         self.error_label.setText("")
@@ -702,6 +801,11 @@ class LoginPage(QWidget):
             """)
 
     def do_login(self):
+        # ระหว่างรอ server ปุ่มนี้คือ "ยกเลิก"
+        if self.login_request is not None:
+            self.cancel_login()
+            return
+
         phone = self.phone_input.text().strip()
 
         if not phone or len(phone) < 10:
@@ -709,20 +813,122 @@ class LoginPage(QWidget):
             self.error_label.show()
             return
 
-        self.login_btn.setEnabled(False)
-        self.login_btn.setText("กำลังเข้าสู่ระบบ...")
+        api = self.main_window.api
+        directory = self.main_window.user_directory
+        phone_filter = self.main_window.phone_filter
+
+        local_user = directory.lookup(phone)
+        if local_user:
+            # ตอบจากรายชื่อในเครื่องทันที แล้วค่อยตรวจกับ server เบื้องหลัง
+            api.set_user(local_user)
+            result = {'success': True, 'user': local_user, 'points': local_user['points']}
+            threading.Thread(target=self.verify_login, args=(phone,), daemon=True).start()
+        elif not phone_filter.might_contain(phone):
+            # ไม่มีใน Bloom filter = ยังไม่ลงทะเบียนแน่นอน - แสดง QR ทันที
+            # (ตรวจเบื้องหลังเผื่อเพิ่งลงทะเบียนหลัง filter ถูกสร้าง)
+            result = {'success': False, 'error': 'ไม่พบเบอร์โทรศัพท์นี้ในระบบ', 'status': 404}
+            threading.Thread(target=self.verify_login, args=(phone,), daemon=True).start()
+        else:
+            # ต้องถาม server - ไม่บล็อก GUI (ผลกลับมาทาง on_login_finished)
+            self.start_login_request(phone)
+            return
+
+        self.apply_login_result(result)
+
+    def start_login_request(self, phone: str):
+        """ส่ง login ใน background thread พร้อม spinner และเวลาสูงสุด LOGIN_TIMEOUT"""
+        self.login_seq += 1
+        self.login_request = (self.login_seq, phone)
+        self.set_login_busy(True)
+        # เตรียมหน้า Processing ระหว่างรอ (เปลี่ยนหน้าได้ทันทีเมื่อ login สำเร็จ)
+        self.main_window.processing_page.prepare()
+        self.login_deadline.start(int(LOGIN_TIMEOUT * 1000))
+        threading.Thread(target=self.run_login, args=(self.login_seq, phone), daemon=True).start()
+
+    def run_login(self, request_id: int, phone: str):
+        """ถามเบอร์กับ server (background thread) - ยังไม่เปลี่ยน session จนกว่า GUI รับผล"""
+        try:
+            result = self.main_window.api.lookup_user(phone)
+        except Exception as e:
+            result = {'success': False, 'error': str(e), 'offline': True}
+        self.login_signals.finished.emit(request_id, phone, result)
+
+    def on_login_finished(self, request_id: int, phone: str, result: dict):
+        """ผล login จาก server (เรียกจาก Signal)"""
+        if result.get('success'):
+            # เก็บไว้ในเครื่องเสมอ (แม้ถูกยกเลิก/หมดเวลาไปแล้ว ครั้งหน้าจะ login ได้ทันที)
+            self.main_window.user_directory.upsert([{**result['user'], 'phone': phone,
+                                                     'points': result.get('points', 0)}])
+            self.main_window.pricing.check_version(result.get('pricing_version'))
+
+        if self.login_request is None or self.login_request[0] != request_id:
+            # ถูกยกเลิกหรือหมดเวลาไปแล้ว
+            return
 
-        result = self.main_window.api.login(phone)
+        self.finish_login_request(result.get('success'))
+        if result.get('success'):
+            self.main_window.api.set_user(result['user'], result.get('session_token'))
+            print(f"✅ Login successful: {result['user'].get('username')}")
+        self.apply_login_result(result)
 
+    def on_login_timeout(self):
+        """server ตอบไม่ทันใน LOGIN_TIMEOUT - เลิกรอ (ผลที่มาทีหลังจะถูกละไว้)"""
+        if self.login_request is None:
+            return
+        print(f"⏱️ Login timed out after {LOGIN_TIMEOUT}s")
+        self.finish_login_request(False)
+        self.apply_login_result({'success': False, 'error': 'timeout', 'offline': True})
+
+    def cancel_login(self):
+        """ยกเลิก login ที่รออยู่ (ผลที่มาทีหลังจะถูกละไว้)"""
+        self.finish_login_request(False)
+        self.error_label.hide()
+
+    def finish_login_request(self, success: bool):
+        self.login_request = None
+        self.login_deadline.stop()
+        self.set_login_busy(False)
+        if not success and not self.main_window.processing_page.is_processing:
+            # ไม่ได้เริ่ม session - ปิดกล้องที่เปิดรอไว้
+            self.main_window.processing_page.reset()
+
+    def set_login_busy(self, busy: bool):
+        """สถานะกำลังรอ server: spinner + ปุ่มกลายเป็น "ยกเลิก" """
+        if busy:
+            self.spinner_frame = 0
+            self.update_spinner()
+            self.error_label.show()
+            self.spinner_timer.start(150)
+            self.error_label.setStyleSheet(f"color: {COLORS['primary']}; font-size: 13px;")
+            self.login_btn.setText("✖ ยกเลิก")
+        else:
+            self.spinner_timer.stop()
+            self.error_label.hide()
+            self.error_label.setStyleSheet(f"color: {COLORS['danger']}; font-size: 13px;")
+            self.login_btn.setText("เข้าสู่ระบบ")
+
+    def update_spinner(self):
+        frame = SPINNER_FRAMES[self.spinner_frame % len(SPINNER_FRAMES)]
+        self.spinner_frame += 1
+        self.error_label.setText(f"{frame} กำลังเข้าสู่ระบบ...")
+
+    def apply_login_result(self, result: dict):
+        """แสดงผล login (ทุกเส้นทาง: รายชื่อในเครื่อง / Bloom filter / server)"""
         if result['success']:
             self.error_label.hide()
+            outbox = self.main_window.submitter.outbox
+            self.login_pending_points = outbox.pending_points(result['user']['id'])
             self.main_window.user_data = result['user']
-            self.main_window.current_points = result.get('points', 0)
+            self.main_window.current_points = result.get('points', 0) + self.login_pending_points
             # ไปหน้า Processing เลย (ข้าม MainPage)
             self.main_window.processing_page.start_processing()
             self.main_window.show_page('processing')
             # Reset หลัง login สำเร็จ
             self.reset()
+        elif result.get('offline'):
+            # ออฟไลน์และไม่มีเบอร์นี้ในเครื่อง - ไม่ใช่ "ไม่พบเบอร์" จึงไม่แสดง QR
+            self.error_label.setText("📡 ไม่สามารถเชื่อมต่อระบบได้ กรุณาลองใหม่")
+            self.error_label.show()
         else:
             # ไม่พบเบอร์ในระบบ - แสดง error และ QR Code สำหรับลงทะเบียน
             self.error_label.setText("❌ ไม่พบเบอร์นี้ในระบบ")
@@ -731,8 +937,49 @@ class LoginPage(QWidget):
             # Reset เบอร์โทรเพื่อให้กรอกใหม่
             self.reset()
 
-        self.login_btn.setEnabled(True)
-        self.login_btn.setText("เข้าสู่ระบบ")
+    def verify_login(self, phone: str):
+        """ตรวจเบอร์กับ server (background thread)"""
+        try:
+            result = self.main_window.api.lookup_user(phone)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        self.login_signals.verified.emit(phone, result)
+
+    def on_login_verified(self, phone: str, result: dict):
+        """ผลตรวจ login จาก server (เรียกจาก Signal)"""
+        directory = self.main_window.user_directory
+        api = self.main_window.api
+
+        if result.get('success'):
+            user = result['user']
+            points = result.get('points', 0)
+            directory.upsert([{**user, 'phone': phone, 'points': points}])
+            self.main_window.pricing.check_version(result.get('pricing_version'))
+            if not self.main_window.phone_filter.might_contain(phone):
+                # filter เก่ากว่าการลงทะเบียน - ดาวน์โหลดใหม่
+                self.main_window.phone_filter.refresh_soon()
+            # อัพเดทชื่อ/แต้มจริงถ้ายังเป็น session เดิม
+            if api.current_user_id == user['id']:
+                api.set_user(user, result.get('session_token'))
+                self.main_window.user_data = user
+                self.main_window.current_points = points + self.login_pending_points
+                self.main_window.processing_page.update_user_info()
+                self.main_window.processing_page.update_display()
+        elif result.get('status') == 404:
+            # ผู้ใช้ถูกลบจาก server แล้ว - แต้มที่ส่งไปจะถูกปฏิเสธ (dead) ใน outbox
+            print(f"⚠️ User {phone} no longer exists - removed from directory")
+            local_user = directory.lookup(phone)
+            directory.remove(phone)
+            if local_user and api.current_user_id == local_user['id']:
+                self.main_window.processing_page.reset()
+                api.logout()
+                self.main_window.user_data = None
+                self.main_window.current_points = 0
+                self.main_window.show_page('login')
+                self.error_label.setText("❌ ไม่พบเบอร์นี้ในระบบ")
+                self.error_label.show()
+                self.show_register_qr_dialog()
+        # error อื่น (ออฟไลน์) - ใช้ข้อมูลในเครื่องต่อไป
 
     def show_register_qr_dialog(self):
         """แสดง Dialog พร้อม QR Code สำหรับลงทะเบียน"""
@@ -764,10 +1011,9 @@ class LoginPage(QWidget):
         qr_label.setAlignment(Qt.AlignCenter)
         qr_path = IMAGES.get('qr_register', '')
         if os.path.exists(qr_path):
-            pixmap = QPixmap(qr_path)
-            if not pixmap.isNull():
-                scaled = pixmap.scaled(220, 220, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                qr_label.setPixmap(scaled)
+            pixmap = image_cache.pixmap(qr_path, 220, 220)
+            if pixmap is not None:
+                qr_label.setPixmap(pixmap)
             else:
                 qr_label.setText("QR Code")
                 qr_label.setFont(QFont('Segoe UI', 16))
@@ -788,6 +1034,8 @@ class LoginPage(QWidget):
 
     def reset(self):
         """Reset ฟอร์ม login"""
+        if self.login_request is not None:
+            self.cancel_login()
         self.phone_input.clear()
         self.error_label.hide()
         # Reset display กลับเป็นค่าเริ่มต้น
@@ -952,6 +1200,11 @@ class HardwareSignals(QObject):
     item_detected = pyqtSignal(str)
 
 
+class ConnectivitySignals(QObject):
+    """ส่งสถานะ circuit breaker (online: bool) จาก thread ใดก็ได้ไป GUI"""
+    changed = pyqtSignal(bool)
+
+
 # ============================================================
 class ProcessingPage(QWidget):
     """หน้าแสดงสถานะกำลังทำงาน พร้อม Animation + Hardware Control"""
@@ -963,6 +1216,11 @@ class ProcessingPage(QWidget):
         self.animation_step = 0
         self.dot_count = 0
         self.is_processing = False
+        # สถานะการส่งแต้ม (นับในจอก่อน แล้วยืนยันเมื่อ server ตอบ)
+        self.pending_items = 0
+        self.failed_items = 0
+        self.server_points = None
+        self.is_online = True
         
         # Timer สำหรับ animation
         self.anim_timer = QTimer()
@@ -973,6 +1231,8 @@ class ProcessingPage(QWidget):
         self.hw_signals = HardwareSignals()
         self.hw_signals.status_changed.connect(self.update_status_text)
         self.hw_signals.item_detected.connect(self.add_item)
+        self.main_window.submitter.submitted.connect(self.on_points_submitted)
+        self.main_window.submitter.backlog_changed.connect(self.on_backlog_changed)
         
         self.setup_ui()
 
@@ -1042,10 +1302,9 @@ class ProcessingPage(QWidget):
         
         # QR Code image
         qr_label = QLabel()
-        qr_path = IMAGES.get('qr_register', '')
-        if os.path.exists(qr_path):
-            pixmap = QPixmap(qr_path)
-            qr_label.setPixmap(pixmap.scaled(150, 150, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        qr_pixmap = image_cache.pixmap(IMAGES.get('qr_register', ''), 150, 150)
+        if qr_pixmap is not None:
+            qr_label.setPixmap(qr_pixmap)
         else:
             qr_label.setText("📷")
             qr_label.setFont(QFont('Segoe UI Emoji', 48))
@@ -1098,9 +1357,8 @@ class ProcessingPage(QWidget):
         center_layout.addSpacing(20)
 
         # Count display
-        self.count_label = QLabel("📦 0 ชิ้น")
+        self.count_label = FlashLabel("📦 0 ชิ้น", COLORS['text'], COLORS['primary'])
         self.count_label.setFont(QFont('Segoe UI', 24, QFont.Bold))
-        self.count_label.setStyleSheet(f"color: {COLORS['text']};")
         self.count_label.setAlignment(Qt.AlignCenter)
         center_layout.addWidget(self.count_label)
 
@@ -1111,6 +1369,13 @@ class ProcessingPage(QWidget):
         self.points_label.setAlignment(Qt.AlignCenter)
         center_layout.addWidget(self.points_label)
 
+        # Sync status - สถานะการส่งแต้มไป server
+        self.sync_label = QLabel("")
+        self.sync_label.setFont(QFont('Segoe UI', 10))
+        self.sync_label.setStyleSheet(f"color: {COLORS['text_secondary']};")
+        self.sync_label.setAlignment(Qt.AlignCenter)
+        center_layout.addWidget(self.sync_label)
+
         center_layout.addStretch()
         
         content_layout.addWidget(center_frame, 1)
@@ -1149,10 +1414,9 @@ class ProcessingPage(QWidget):
             
             # ใช้รูปภาพแทน emoji
             icon_lbl = QLabel()
-            img_path = IMAGES.get(item_type, '')
-            if os.path.exists(img_path):
-                pixmap = QPixmap(img_path)
-                icon_lbl.setPixmap(pixmap.scaled(40, 40, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            pixmap = image_cache.pixmap(IMAGES.get(item_type, ''), 40, 40)
+            if pixmap is not None:
+                icon_lbl.setPixmap(pixmap)
             else:
                 icon_lbl.setText(config['emoji'])
                 icon_lbl.setFont(QFont('Segoe UI Emoji', 20))
@@ -1166,9 +1430,8 @@ class ProcessingPage(QWidget):
             
             row_layout.addStretch()
             
-            count_lbl = QLabel("0")
+            count_lbl = FlashLabel("0", COLORS['primary'], COLORS['warning'])
             count_lbl.setFont(QFont('Segoe UI', 20, QFont.Bold))
-            count_lbl.setStyleSheet(f"color: {COLORS['primary']};")
             row_layout.addWidget(count_lbl)
             
             self.item_labels[item_type] = count_lbl
@@ -1213,10 +1476,23 @@ class ProcessingPage(QWidget):
         
         layout.addLayout(btn_layout)
 
+    def prepare(self):
+        """
+        เตรียมล่วงหน้าระหว่างรอ login (โหลด model + เปิดกล้องใน background)
+        สร้าง controller ใน GUI thread ได้ (constructor ไม่โหลด model) - งานช้าอยู่ใน open()
+        start_processing() จะใช้ controller นี้ต่อ - ไม่ต้องรอตอนเปลี่ยนหน้า
+        """
+        if self.is_processing or not (USE_GPIO and SortingController):
+            return
+        if self.sorting_controller is None:
+            self.sorting_controller = SortingController()
+        threading.Thread(target=self.sorting_controller.open, daemon=True).start()
+
     def start_processing(self):
         """เริ่มการทำงาน"""
         self.counts = {'glass': 0, 'plastic': 0, 'can': 0}
         self.is_processing = True
+        self.reset_sync_status()
         self.update_user_info()
         self.update_display()
         self.dot_count = 0
@@ -1224,10 +1500,12 @@ class ProcessingPage(QWidget):
         
         # เริ่ม Hardware (ถ้ารันบน Raspberry Pi)
         if USE_GPIO and SortingController:
-            self.sorting_controller = SortingController()
+            if self.sorting_controller is None:
+                self.sorting_controller = SortingController()
             # เชื่อม callbacks
             self.sorting_controller.on_status = lambda msg: self.hw_signals.status_changed.emit(msg)
             self.sorting_controller.on_item_sorted = lambda item: self.hw_signals.item_detected.emit(item)
+            self.sorting_controller.on_detected = self.main_window.heartbeat.record_detection
             self.sorting_controller.start()
 
     def update_status_text(self, msg: str):
@@ -1250,13 +1528,19 @@ class ProcessingPage(QWidget):
         if self.sorting_controller:
             self.sorting_controller.stop()
             self.sorting_controller = None
+
+        # ส่งแต้มที่ค้างทั้ง session ในครั้งเดียว
+        self.main_window.submitter.flush()
         
         total_items = sum(self.counts.values())
         total_points = self.get_total_points()
         
         if total_items > 0:
-            # Update main points
-            self.main_window.current_points += total_points
+            # Update main points - ใช้ยอดจาก server ถ้าส่งครบแล้ว
+            if self.server_points is not None and self.pending_items == 0:
+                self.main_window.current_points = self.server_points
+            else:
+                self.main_window.current_points += total_points
             # Go to result page
             self.main_window.result_page.set_result(self.counts.copy(), total_points)
             self.main_window.show_page('result')
@@ -1277,20 +1561,68 @@ class ProcessingPage(QWidget):
         """เพิ่มขยะ"""
         if item_type in self.counts:
             self.counts[item_type] += 1
+            self.main_window.heartbeat.record_item(item_type)
             self.update_display()
             
-            # Flash effect on item label
+            # Flash effect (animation สี - ขวดเข้าถี่ๆ รวมเป็น flash เดียว)
             if item_type in self.item_labels:
-                self.item_labels[item_type].setStyleSheet(f"color: {COLORS['warning']}; font-size: 20px;")
-                QTimer.singleShot(200, lambda t=item_type: self.item_labels[t].setStyleSheet(f"color: {COLORS['primary']};"))
-            
-            # Flash effect on count
-            self.count_label.setStyleSheet(f"color: {COLORS['primary']}; font-size: 28px;")
-            QTimer.singleShot(200, lambda: self.count_label.setStyleSheet(f"color: {COLORS['text']};"))
+                self.item_labels[item_type].flash()
+            self.count_label.flash()
             
-            # Send to API
-            config = POINTS_CONFIG[item_type]
-            self.main_window.api.send_points(item_type, config['points'])
+            # Send to API (background) - นับในจอไปก่อน แล้วค่อยยืนยันผล
+            points = self.main_window.pricing.points_for(item_type)
+            user_id = self.main_window.api.current_user_id
+            if user_id:
+                if self.main_window.submitter.submit(user_id, item_type, points):
+                    self.pending_items += 1
+                else:
+                    self.failed_items += 1
+                self.update_sync_status()
+
+    def on_points_submitted(self, user_id: str, item_type: str, points: int, result: dict):
+        """รับผลการส่งแต้มจาก PointSubmitter (เรียกจาก Signal)"""
+        # ผลของ session ก่อนหน้า - ไม่ต้องแสดง
+        if user_id != self.main_window.api.current_user_id:
+            return
+
+        self.pending_items = max(0, self.pending_items - 1)
+        if result.get('success'):
+            row = (result.get('data') or {}).get('data') or {}
+            if isinstance(row.get('points'), int):
+                self.server_points = row['points']
+                self.main_window.user_directory.update_points(user_id, row['points'])
+        else:
+            self.failed_items += 1
+        self.update_sync_status()
+
+    def on_connectivity_changed(self, online: bool):
+        """สถานะการเชื่อมต่อ API (เรียกจาก Signal)"""
+        self.is_online = online
+        self.update_sync_status()
+
+    def on_backlog_changed(self, online: bool, backlog: int):
+        """สถานะ outbox (เรียกจาก Signal)"""
+        self.is_online = online
+        self.update_sync_status()
+
+    def update_sync_status(self):
+        """แสดงสถานะการส่งแต้ม"""
+        if self.pending_items and not self.is_online:
+            self.sync_label.setText(f"📥 บันทึกแต้มไว้ในเครื่อง {self.pending_items} รายการ (จะส่งอัตโนมัติ)")
+        elif self.pending_items:
+            self.sync_label.setText(f"⏳ กำลังบันทึกแต้ม {self.pending_items} รายการ")
+        elif self.failed_items:
+            self.sync_label.setText(f"⚠️ บันทึกแต้มไม่สำเร็จ {self.failed_items} รายการ")
+        elif self.server_points is not None:
+            self.sync_label.setText("✅ บันทึกแต้มแล้ว")
+        else:
+            self.sync_label.setText("")
+
+    def reset_sync_status(self):
+        self.pending_items = 0
+        self.failed_items = 0
+        self.server_points = None
+        self.sync_label.setText("")
 
     def update_display(self):
         """อัพเดทการแสดงผล"""
@@ -1312,7 +1644,7 @@ class ProcessingPage(QWidget):
     def get_total_points(self) -> int:
         total = 0
         for item_type, count in self.counts.items():
-            total += count * POINTS_CONFIG[item_type]['points']
+            total += count * self.main_window.pricing.points_for(item_type)
         return total
 
     def reset(self):
@@ -1325,6 +1657,7 @@ class ProcessingPage(QWidget):
             self.sorting_controller = None
         self.count_label.setText("📦 0 ชิ้น")
         self.points_label.setText("⭐ +0 แต้ม")
+        self.reset_sync_status()
         self.status_text.setText("กำลังรอรับขยะ")
         self.dots_label.setText("...")
         self.main_icon.setText("♻️")
@@ -1336,6 +1669,62 @@ class ProcessingPage(QWidget):
 # ============================================================
 # PAGE: RESULT (หน้าสรุปผล)
 # ============================================================
+class SummaryCard(QFrame):
+    """
+    การ์ดสรุป 1 ประเภทขวดในหน้า Result
+    สร้างครั้งเดียวตอนเปิดโปรแกรม - แต่ละ session แค่เปลี่ยนข้อความ/ซ่อน-แสดง
+    (ไม่สร้าง widget หรือ parse stylesheet ใหม่ตอนจบ session)
+    """
+
+    def __init__(self, item_type: str, parent=None):
+        super().__init__(parent)
+        config = POINTS_CONFIG[item_type]
+        self.setStyleSheet(f"""
+            QFrame {{
+                background-color: white;
+                border-radius: 15px;
+                padding: 10px;
+            }}
+        """)
+        layout = QVBoxLayout(self)
+        layout.setAlignment(Qt.AlignCenter)
+        layout.setSpacing(5)
+
+        # รูปภาพ (จาก image_cache)
+        pixmap = image_cache.pixmap(IMAGES.get(item_type, ''), 50, 50)
+        if pixmap is not None:
+            img_label = QLabel()
+            img_label.setPixmap(pixmap)
+        else:
+            img_label = QLabel(config['emoji'])
+            img_label.setFont(QFont('Segoe UI Emoji', 30))
+        img_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(img_label)
+
+        # ชื่อและจำนวน
+        name_label = QLabel(f"{config['name']}")
+        name_label.setFont(QFont('Segoe UI', 12))
+        name_label.setStyleSheet(f"color: {COLORS['text']};")
+        name_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(name_label)
+
+        self.count_label = QLabel("x0")
+        self.count_label.setFont(QFont('Segoe UI', 18, QFont.Bold))
+        self.count_label.setStyleSheet(f"color: {COLORS['primary']};")
+        self.count_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.count_label)
+
+        self.points_label = QLabel("+0 แต้ม")
+        self.points_label.setFont(QFont('Segoe UI', 10))
+        self.points_label.setStyleSheet(f"color: {COLORS['text_secondary']};")
+        self.points_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.points_label)
+
+    def set_values(self, count: int, points: int):
+        self.count_label.setText(f"x{count}")
+        self.points_label.setText(f"+{points} แต้ม")
+
+
 class ResultPage(QWidget):
     """หน้าสรุปผลการใส่ขยะ - รอ 10 วินาทีแล้วกลับหน้าแรกอัตโนมัติ"""
 
@@ -1358,10 +1747,12 @@ class ResultPage(QWidget):
         self.success_icon_container = QHBoxLayout()
         self.success_icon_container.setAlignment(Qt.AlignCenter)
         
-        recycle_path = IMAGES.get('recycle', '')
-        if os.path.exists(recycle_path) and recycle_path.endswith('.svg'):
-            icon_widget = QSvgWidget(recycle_path)
+        recycle_pixmap = image_cache.pixmap(IMAGES.get('recycle', ''), 100, 100)
+        if recycle_pixmap is not None:
+            icon_widget = QLabel()
+            icon_widget.setPixmap(recycle_pixmap)
             icon_widget.setFixedSize(100, 100)
+            icon_widget.setAlignment(Qt.AlignCenter)
         else:
             icon_widget = QLabel("✅")
             icon_widget.setFont(QFont('Segoe UI Emoji', 64))
@@ -1388,6 +1779,13 @@ class ResultPage(QWidget):
         self.summary_layout = QHBoxLayout(self.summary_container)
         self.summary_layout.setAlignment(Qt.AlignCenter)
         self.summary_layout.setSpacing(30)
+        # การ์ดของทุกประเภทสร้างไว้ก่อน (ซ่อนไว้จนกว่าจะมีขวดประเภทนั้น)
+        self.summary_cards = {}
+        for item_type in POINTS_CONFIG:
+            card = SummaryCard(item_type)
+            card.hide()
+            self.summary_layout.addWidget(card)
+            self.summary_cards[item_type] = card
         layout.addWidget(self.summary_container)
 
         layout.addSpacing(30)
@@ -1404,57 +1802,14 @@ class ResultPage(QWidget):
     def set_result(self, counts: dict, points: int):
         self.points_label.setText(f"+{points} แต้ม")
 
-        # ล้าง summary เดิม
-        while self.summary_layout.count():
-            item = self.summary_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-
-        # สร้าง summary ใหม่ด้วยรูปภาพ
-        for item_type, count in counts.items():
+        # อัพเดทการ์ดเดิม (ไม่สร้าง widget ใหม่)
+        for item_type, card in self.summary_cards.items():
+            count = counts.get(item_type, 0)
             if count > 0:
-                config = POINTS_CONFIG[item_type]
-                
-                # สร้าง frame สำหรับแต่ละ item
-                item_frame = QFrame()
-                item_frame.setStyleSheet(f"""
-                    QFrame {{
-                        background-color: white;
-                        border-radius: 15px;
-                        padding: 10px;
-                    }}
-                """)
-                item_layout = QVBoxLayout(item_frame)
-                item_layout.setAlignment(Qt.AlignCenter)
-                item_layout.setSpacing(5)
-                
-                # รูปภาพ
-                img_path = IMAGES.get(item_type, '')
-                if os.path.exists(img_path):
-                    img_label = QLabel()
-                    pixmap = QPixmap(img_path)
-                    img_label.setPixmap(pixmap.scaled(50, 50, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-                    img_label.setAlignment(Qt.AlignCenter)
-                else:
-                    img_label = QLabel(config['emoji'])
-                    img_label.setFont(QFont('Segoe UI Emoji', 30))
-                    img_label.setAlignment(Qt.AlignCenter)
-                item_layout.addWidget(img_label)
-                
-                # ชื่อและจำนวน
-                name_label = QLabel(f"{config['name']}")
-                name_label.setFont(QFont('Segoe UI', 12))
-                name_label.setStyleSheet(f"color: {COLORS['text']};")
-                name_label.setAlignment(Qt.AlignCenter)
-                item_layout.addWidget(name_label)
-                
-                count_label = QLabel(f"x{count}")
-                count_label.setFont(QFont('Segoe UI', 18, QFont.Bold))
-                count_label.setStyleSheet(f"color: {COLORS['primary']};")
-                count_label.setAlignment(Qt.AlignCenter)
-                item_layout.addWidget(count_label)
-                
-                self.summary_layout.addWidget(item_frame)
+                card.set_values(count, count * self.main_window.pricing.points_for(item_type))
+                card.show()
+            else:
+                card.hide()
         
         # เริ่ม countdown
         self.countdown = 10
@@ -1489,7 +1844,27 @@ class MainWindow(QMainWindow):
 
     def __init__(self):
         super().__init__()
-        self.api = APIClient()
+        if API_ASYNC and HAS_HTTPX:
+            self.api = AsyncAPIClient()
+        else:
+            self.api = APIClient()
+        # ตรวจ API เบื้องหลัง - ตอนล่ม ทุก call ตอบ error ทันทีผ่าน circuit breaker
+        self.connectivity_signals = ConnectivitySignals()
+        self.api.breaker.add_listener(self.connectivity_signals.changed.emit)
+        self.health_monitor = HealthMonitor(self.api.breaker, self.api.probe)
+        self.submitter = PointSubmitter(self.api)
+        self.user_directory = UserDirectory()
+        self.user_directory.start_refresh(self.api)
+        self.phone_filter = PhoneFilter()
+        self.phone_filter.start_refresh(self.api)
+        self.pricing = PricingCache()
+        self.pricing.start_refresh(self.api)
+        # สถานะเครื่อง -> machine_status (lockout ของ watchdog = maintenance)
+        self.heartbeat = HeartbeatAgent(
+            self.api,
+            status_provider=lambda: 'maintenance' if watchdog and watchdog.locked_out else 'online'
+        )
+        self.heartbeat.start()
         self.user_data = None
         self.current_points = 0
         self.is_fullscreen = False
@@ -1497,6 +1872,9 @@ class MainWindow(QMainWindow):
         self.setup_ui()
         self.setup_shortcuts()
 
+        self.connectivity_signals.changed.connect(self.on_connectivity_changed)
+        self.health_monitor.start()
+
     def setup_ui(self):
         self.setWindowTitle("Sorting Machine")
         self.setMinimumSize(800, 500)
@@ -1514,6 +1892,10 @@ class MainWindow(QMainWindow):
         self.stack = QStackedWidget()
         main_layout.addWidget(self.stack)
 
+        # decode/ย่อรูปครั้งเดียวก่อนสร้างหน้า (หน้าต่างๆ ดึงจาก image_cache)
+        if IMAGE_CACHE_WARM:
+            image_cache.warm(WARM_IMAGES)
+
         # Create pages
         self.home_page = HomePage(self)
         self.login_page = LoginPage(self)
@@ -1552,10 +1934,22 @@ class MainWindow(QMainWindow):
         QShortcut(QKeySequence(Qt.Key_2), self, lambda: self.processing_page.add_item('plastic'))
         QShortcut(QKeySequence(Qt.Key_3), self, lambda: self.processing_page.add_item('can'))
 
+        # Ctrl+Shift+R: เจ้าหน้าที่ปลด lockout ของ watchdog หลังซ่อมเครื่อง
+        if watchdog:
+            QShortcut(QKeySequence('Ctrl+Shift+R'), self, watchdog.reset)
+
     def show_page(self, page_name: str):
         if page_name in self.pages:
             self.stack.setCurrentIndex(self.pages[page_name])
 
+    def on_connectivity_changed(self, online: bool):
+        """API ออนไลน์/ออฟไลน์ (เรียกจาก Signal)"""
+        self.home_page.set_online(online)
+        self.processing_page.on_connectivity_changed(online)
+        if online:
+            # กลับมาออนไลน์ - ส่งแต้มที่ค้างใน outbox ทันที
+            self.submitter.flush()
+
     def toggle_fullscreen(self):
         if self.is_fullscreen:
             self.showNormal()
@@ -1573,7 +1967,17 @@ class MainWindow(QMainWindow):
         """ทำความสะอาดเมื่อปิดโปรแกรม"""
         # หยุด Processing
         self.processing_page.reset()
+        self.health_monitor.stop()
+        self.submitter.stop()
+        self.user_directory.stop()
+        self.phone_filter.stop()
+        self.pricing.stop()
+        self.heartbeat.stop()
+        if isinstance(self.api, AsyncAPIClient):
+            self.api.close()
         
+        print(f"📊 API telemetry:\n{telemetry.summary()}")
+
         # Cleanup Hardware
         if USE_GPIO and hardware_cleanup:
             hardware_cleanup()
@@ -0,0 +1,138 @@
+# ===================================================================
+# Sorting Machine - Point Outbox
+# บันทึกแต้มลง SQLite ในเครื่องก่อนส่ง (ไม่หายเมื่อเน็ตหลุด/ไฟดับ)
+# ===================================================================
+
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from config import OUTBOX_PATH
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = 'pending'
+STATUS_DEAD = 'dead'  # server ปฏิเสธถาวร (เช่น 400/404) - ไม่ส่งซ้ำ
+
+
+class PointOutbox:
+    """
+    Outbox แบบ WAL-mode SQLite
+    ทุกชิ้นที่คัดแยกจะถูก commit ลงเครื่องพร้อม idempotency key
+    ก่อนส่งไป /api/addPoint - ส่งซ้ำได้โดย server ไม่บวกแต้มซ้ำ
+    """
+
+    def __init__(self, path: str = OUTBOX_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT UNIQUE NOT NULL,
+                user_id TEXT NOT NULL,
+                item_type TEXT NOT NULL,
+                points INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                batch_key TEXT
+            )
+        ''')
+        # outbox จากเวอร์ชันก่อนยังไม่มี batch_key
+        columns = [row['name'] for row in self.conn.execute('PRAGMA table_info(outbox)')]
+        if 'batch_key' not in columns:
+            self.conn.execute('ALTER TABLE outbox ADD COLUMN batch_key TEXT')
+        self.conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox(status, id)'
+        )
+        self.conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_outbox_batch ON outbox(batch_key)'
+        )
+
+    def add(self, user_id: str, item_type: str, points: int) -> str:
+        """บันทึกรายการใหม่ - คืน idempotency key"""
+        key = uuid.uuid4().hex
+        with self.lock:
+            self.conn.execute(
+                'INSERT INTO outbox (idempotency_key, user_id, item_type, points, created_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, user_id, item_type, points, time.time())
+            )
+        return key
+
+    def claim_batch(self, limit: int) -> Tuple[Optional[str], List[Dict]]:
+        """
+        จองรายการของผู้ใช้คนเดียวเป็น 1 batch (ใช้ batch key เป็น idempotency key)
+        batch ที่เคยส่งไม่สำเร็จจะถูกส่งซ้ำด้วย key เดิมและรายการเดิมเสมอ
+        Returns: (batch_key, rows) หรือ (None, []) ถ้าไม่มีรายการ
+        """
+        with self.lock:
+            first = self.conn.execute(
+                'SELECT user_id, batch_key FROM outbox WHERE status = ? ORDER BY id LIMIT 1',
+                (STATUS_PENDING,)
+            ).fetchone()
+            if first is None:
+                return None, []
+
+            batch_key = first['batch_key']
+            if batch_key is None:
+                batch_key = uuid.uuid4().hex
+                self.conn.execute(
+                    'UPDATE outbox SET batch_key = ? WHERE id IN ('
+                    '  SELECT id FROM outbox WHERE status = ? AND user_id = ? AND batch_key IS NULL'
+                    '  ORDER BY id LIMIT ?)',
+                    (batch_key, STATUS_PENDING, first['user_id'], limit)
+                )
+
+            rows = self.conn.execute(
+                'SELECT * FROM outbox WHERE batch_key = ? ORDER BY id', (batch_key,)
+            ).fetchall()
+        return batch_key, [dict(row) for row in rows]
+
+    def mark_batch_sent(self, batch_key: str):
+        """ส่ง batch สำเร็จ - ลบออกจาก outbox"""
+        with self.lock:
+            self.conn.execute('DELETE FROM outbox WHERE batch_key = ?', (batch_key,))
+
+    def mark_batch_failed(self, batch_key: str, error: str, dead: bool = False):
+        """ส่ง batch ไม่สำเร็จ (dead=True จะไม่ส่งซ้ำอีก)"""
+        with self.lock:
+            self.conn.execute(
+                'UPDATE outbox SET attempts = attempts + 1, last_error = ?, status = ? '
+                'WHERE batch_key = ?',
+                (error, STATUS_DEAD if dead else STATUS_PENDING, batch_key)
+            )
+
+    def count(self) -> int:
+        """จำนวนรายการที่รอส่ง"""
+        return self.stats()[0]
+
+    def pending_points(self, user_id: str) -> int:
+        """แต้มของผู้ใช้ที่ยังรอส่ง (ยังไม่รวมในยอดของ server)"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT COALESCE(SUM(points), 0) FROM outbox WHERE status = ? AND user_id = ?',
+                (STATUS_PENDING, user_id)
+            ).fetchone()
+        return row[0]
+
+    def stats(self) -> Tuple[int, Optional[float], bool]:
+        """(จำนวนที่รอส่ง, เวลาสร้างของรายการเก่าสุด, มี batch ที่รอส่งซ้ำหรือไม่)"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT COUNT(*), MIN(created_at), COUNT(batch_key) FROM outbox WHERE status = ?',
+                (STATUS_PENDING,)
+            ).fetchone()
+        return row[0], row[1], row[2] > 0
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
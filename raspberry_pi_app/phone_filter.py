@@ -0,0 +1,116 @@
+# ===================================================================
+# Sorting Machine - Phone Filter
+# Bloom filter ของเบอร์ที่ลงทะเบียนแล้ว (ดาวน์โหลดจาก /api/phoneFilter)
+# ===================================================================
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+import logging
+from typing import Optional
+
+from config import PHONE_FILTER_PATH, PHONE_FILTER_REFRESH
+from background import PeriodicRefresher
+
+logger = logging.getLogger(__name__)
+
+
+class PhoneFilter(PeriodicRefresher):
+    """
+    ตรวจว่าเบอร์ "ยังไม่ลงทะเบียนแน่นอน" โดยไม่ต้องถาม server
+    - might_contain() = False -> ไม่มีในระบบแน่นอน (ณ เวลาที่ดาวน์โหลด filter)
+    - might_contain() = True  -> อาจมี ต้องถาม /api/loginPhone ตามปกติ
+    ยังไม่มี filter (เช่น บูตครั้งแรกแบบออฟไลน์) จะตอบ True เสมอ
+    hash ต้องตรงกับ app/api/phoneFilter/route.ts
+    """
+
+    refresh_interval = PHONE_FILTER_REFRESH
+    refresh_name = 'Phone filter refresh'
+
+    def __init__(self, path: str = PHONE_FILTER_PATH):
+        super().__init__()
+        self.path = path
+        self.lock = threading.Lock()
+        self.m = 0
+        self.k = 0
+        self.bits = b''
+        self.count = 0
+        self.etag = None
+        self.loaded_at = 0
+        self._load_file()
+
+    # ---------- query ----------
+
+    @property
+    def ready(self) -> bool:
+        return self.m > 0
+
+    def might_contain(self, phone: str) -> bool:
+        with self.lock:
+            m, k, bits = self.m, self.k, self.bits
+        if not m:
+            return True
+
+        digest = hashlib.sha256(phone.encode('utf-8')).digest()
+        h1 = int.from_bytes(digest[0:4], 'big')
+        h2 = int.from_bytes(digest[4:8], 'big') | 1
+        for i in range(k):
+            index = (h1 + i * h2) % m
+            if not bits[index >> 3] & (1 << (index & 7)):
+                return False
+        return True
+
+    # ---------- load / refresh ----------
+
+    def _apply(self, data: dict, etag: Optional[str]):
+        bits = base64.b64decode(data['bits'])
+        if data.get('hash', 'sha256') != 'sha256' or len(bits) * 8 != data['m']:
+            raise ValueError('Unsupported phone filter format')
+        with self.lock:
+            self.m = data['m']
+            self.k = data['k']
+            self.bits = bits
+            self.count = data.get('count', 0)
+            self.etag = etag
+            self.loaded_at = time.time()
+
+    def _load_file(self):
+        """โหลด filter ที่บันทึกไว้ (ใช้ได้ทันทีตอนบูตแม้ยังออฟไลน์)"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            self._apply(saved['filter'], saved.get('etag'))
+            logger.info(f"📇 Phone filter loaded: {self.count} phone(s)")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️ Phone filter file ignored: {e}")
+
+    def _save_file(self, data: dict, etag: Optional[str]):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'etag': etag, 'filter': data}, f)
+        os.replace(tmp_path, self.path)
+
+    def refresh(self, api) -> bool:
+        """ดาวน์โหลด filter ใหม่ถ้าเปลี่ยน - คืน False ถ้าไม่สำเร็จ"""
+        result = api.get_phone_filter(self.etag)
+        if not result.get('success'):
+            logger.warning(f"⚠️ Phone filter refresh failed: {result.get('error')}")
+            return False
+        if result.get('not_modified'):
+            with self.lock:
+                self.loaded_at = time.time()
+            return True
+
+        try:
+            self._apply(result['data'], result.get('etag'))
+            self._save_file(result['data'], result.get('etag'))
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"❌ Phone filter error: {e}")
+            return False
+        logger.info(f"📇 Phone filter updated: {self.count} phone(s), {self.m // 8} bytes")
+        return True
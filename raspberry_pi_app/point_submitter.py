@@ -0,0 +1,150 @@
+# ===================================================================
+# Sorting Machine - Point Submitter
+# ส่งแต้มไปยัง API ใน background thread (ไม่บล็อก Qt GUI)
+# ===================================================================
+
+import random
+import threading
+import time
+import logging
+from collections import Counter
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from config import OUTBOX_BATCH_SIZE, OUTBOX_FLUSH_MS, OUTBOX_RETRY_BASE, OUTBOX_RETRY_MAX
+from outbox import PointOutbox
+
+logger = logging.getLogger(__name__)
+
+# รอบตรวจ outbox เมื่อไม่มีงานใหม่ (วินาที)
+IDLE_INTERVAL = 30
+
+
+class PointSubmitter(QObject):
+    """
+    รับรายการแต้มจาก GUI แล้ว commit ลง PointOutbox ทันที
+    worker thread รวมรายการเป็น batch แล้วส่งไป /api/addPointBatch
+    เมื่อครบ OUTBOX_BATCH_SIZE ชิ้น, รายการเก่าสุดรอนานเกิน OUTBOX_FLUSH_MS
+    หรือเมื่อเรียก flush() (retry แบบ exponential backoff)
+    ผลลัพธ์ส่งกลับ GUI ผ่าน Signal (thread-safe)
+    """
+    # user_id, item_type, points, result dict - เมื่อได้ผลถาวรแล้ว (สำเร็จ/ถูกปฏิเสธ)
+    submitted = pyqtSignal(str, str, int, object)
+    # online, จำนวนรายการที่รอส่ง - หลังจบแต่ละรอบการส่ง
+    backlog_changed = pyqtSignal(bool, int)
+
+    def __init__(self, api, outbox: PointOutbox = None):
+        super().__init__()
+        self.api = api
+        self.outbox = outbox or PointOutbox()
+        self.wake = threading.Event()
+        self.running = True
+        self.flush_requested = False
+        self.backoff = 0
+        self.retry_at = 0
+
+        recovered = self.outbox.count()
+        if recovered:
+            logger.info(f"📥 Recovered {recovered} unsent item(s) from outbox")
+            self.flush_requested = True
+
+        self.thread = threading.Thread(target=self._worker, daemon=True)
+        self.thread.start()
+
+    def submit(self, user_id: str, item_type: str, points: int) -> bool:
+        """บันทึกรายการลง outbox แล้วปลุก worker - คืน False ถ้าบันทึกไม่ได้"""
+        try:
+            self.outbox.add(user_id, item_type, points)
+        except Exception as e:
+            logger.error(f"❌ Outbox write error: {e}")
+            return False
+        self.wake.set()
+        return True
+
+    def flush(self):
+        """ส่งทุกรายการที่ค้างทันที (เช่น ตอนจบ session)"""
+        self.flush_requested = True
+        self.wake.set()
+
+    def pending(self) -> int:
+        """จำนวนรายการที่ยังรอส่ง"""
+        return self.outbox.count()
+
+    def stop(self):
+        """หยุด worker (รายการที่ค้างยังอยู่ใน outbox - ส่งต่อเมื่อเปิดเครื่องใหม่)"""
+        self.running = False
+        self.wake.set()
+
+    def _worker(self):
+        while self.running:
+            delay = self._flush_delay()
+            if delay > 0:
+                self.wake.wait(timeout=delay)
+                self.wake.clear()
+                continue
+
+            self.flush_requested = False
+            self.drain()
+
+    def _flush_delay(self) -> float:
+        """เวลาที่ต้องรอก่อนส่ง batch ถัดไป (0 = ส่งเลย)"""
+        count, oldest, has_retry = self.outbox.stats()
+        if count == 0:
+            self.flush_requested = False
+            return IDLE_INTERVAL
+        if self.flush_requested:
+            return 0
+        now = time.time()
+        if now < self.retry_at:
+            return self.retry_at - now
+        if has_retry or count >= OUTBOX_BATCH_SIZE:
+            return 0
+        return max(0, oldest + OUTBOX_FLUSH_MS / 1000 - now)
+
+    def drain(self):
+        """ส่ง batch จนหมด outbox หรือจนกว่าจะเจอ error ชั่วคราว"""
+        while self.running:
+            batch_key, rows = self.outbox.claim_batch(OUTBOX_BATCH_SIZE)
+            if not rows:
+                self.backlog_changed.emit(True, 0)
+                return
+
+            if not self._send_batch(batch_key, rows):
+                # error ชั่วคราว - รอแล้วค่อยลองใหม่
+                self.backoff = min(
+                    OUTBOX_RETRY_MAX,
+                    max(OUTBOX_RETRY_BASE, self.backoff * 2)
+                ) * random.uniform(0.8, 1.2)
+                self.retry_at = time.time() + self.backoff
+                logger.warning(f"⏳ Outbox retry in {self.backoff:.0f}s")
+                self.backlog_changed.emit(False, self.outbox.count())
+                return
+
+    def _send_batch(self, batch_key: str, rows: list) -> bool:
+        """ส่ง 1 batch (ผู้ใช้คนเดียว) - คืน False เมื่อควร backoff"""
+        user_id = rows[0]['user_id']
+        counts = Counter(row['item_type'] for row in rows)
+        items = [{'label': label, 'count': count} for label, count in counts.items()]
+        try:
+            result = self.api.send_points_batch(
+                items, user_id=user_id, idempotency_key=batch_key,
+                retries=rows[0]['attempts']
+            )
+        except Exception as e:
+            logger.error(f"❌ Submit worker error: {e}")
+            result = {'success': False, 'error': str(e)}
+
+        status = result.get('status')
+        if result.get('success'):
+            self.outbox.mark_batch_sent(batch_key)
+            self.backoff = 0
+            self.retry_at = 0
+        elif status is not None and 400 <= status < 500 and status != 429:
+            # server ปฏิเสธถาวร - เก็บไว้ตรวจสอบ ไม่ส่งซ้ำ
+            self.outbox.mark_batch_failed(batch_key, result.get('error', ''), dead=True)
+        else:
+            self.outbox.mark_batch_failed(batch_key, result.get('error', ''))
+            return False
+
+        for row in rows:
+            self.submitted.emit(row['user_id'], row['item_type'], row['points'], result)
+        return True
@@ -0,0 +1,110 @@
+# ===================================================================
+# Sorting Machine - Pricing Cache
+# แต้มต่อชิ้นจาก /api/pricing (ให้ยอดบนจอตรงกับที่ server บวกจริง)
+# ===================================================================
+
+import json
+import os
+import threading
+import time
+import logging
+from typing import Dict, Optional
+
+from config import POINTS_CONFIG, PRICING_PATH, PRICING_REFRESH
+from background import PeriodicRefresher
+
+logger = logging.getLogger(__name__)
+
+
+class PricingCache(PeriodicRefresher):
+    """
+    สำเนา pricing ของ server ในเครื่อง
+    - refresh() ใช้ conditional GET (If-None-Match) - ไม่เปลี่ยนได้ 304 ไม่มี body
+    - บันทึกลงไฟล์ ใช้ได้ทันทีตอนบูตแม้ยังออฟไลน์
+    - ยังไม่เคยดึงได้ จะใช้ค่าใน POINTS_CONFIG
+    """
+
+    refresh_interval = PRICING_REFRESH
+    refresh_name = 'Pricing refresh'
+
+    def __init__(self, path: str = PRICING_PATH):
+        super().__init__()
+        self.path = path
+        self.lock = threading.Lock()
+        self.points = {item: config['points'] for item, config in POINTS_CONFIG.items()}
+        self.etag = None
+        self.updated_at = 0
+        self._load_file()
+
+    # ---------- query ----------
+
+    def points_for(self, item_type: str) -> int:
+        """แต้มต่อชิ้นของประเภทนี้"""
+        with self.lock:
+            return self.points.get(item_type, 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.points)
+
+    # ---------- load / refresh ----------
+
+    def _apply(self, pricing: dict, etag: Optional[str]) -> bool:
+        """อัพเดทแต้มจาก pricing ของ server - คืน True ถ้ามีค่าเปลี่ยน"""
+        points = {}
+        for item in POINTS_CONFIG:
+            value = (pricing.get(item) or {}).get('points')
+            if isinstance(value, int) and value > 0:
+                points[item] = value
+        with self.lock:
+            changed = any(self.points.get(item) != value for item, value in points.items())
+            self.points.update(points)
+            self.etag = etag
+            self.updated_at = time.time()
+        return changed
+
+    def _load_file(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            self._apply(saved['pricing'], saved.get('etag'))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️ Pricing file ignored: {e}")
+
+    def _save_file(self, pricing: dict, etag: Optional[str]):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'etag': etag, 'pricing': pricing}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def refresh(self, api) -> bool:
+        """ดึง pricing ถ้าเปลี่ยน - คืน False ถ้าไม่สำเร็จ"""
+        result = api.get_pricing(self.etag)
+        if not result.get('success'):
+            logger.warning(f"⚠️ Pricing refresh failed: {result.get('error')}")
+            return False
+        if result.get('not_modified'):
+            with self.lock:
+                self.updated_at = time.time()
+            return True
+
+        pricing = result['data'].get('pricing') or {}
+        if self._apply(pricing, result.get('etag')):
+            logger.info(f"💰 Pricing updated: {self.snapshot()}")
+        try:
+            self._save_file(pricing, result.get('etag'))
+        except OSError as e:
+            logger.error(f"❌ Pricing save error: {e}")
+        return True
+
+    def check_version(self, version: Optional[str]):
+        """
+        เทียบ pricing_version จาก /api/loginPhone กับ ETag ที่มี
+        ไม่ตรง = pricing บน server เปลี่ยนแล้ว - ดึงใหม่ทันที
+        """
+        with self.lock:
+            current = (self.etag or '').strip('"')
+        if version and version != current:
+            self.refresh_soon()
@@ -56,6 +56,9 @@ LIMIT_END  = 7    # สุดทาง (จุดทิ้ง CAN)
 # --- Door IR ---
 IR_DOOR = 22
 
+# --- Fault LED (Watchdog lockout) ---
+LED_RED = 12
+
 # Map slots
 SLOT_IR = {
     "glass_bottle": IR_GLASS,
@@ -71,7 +74,7 @@ LABEL_TO_TYPE = {
 }
 
 if USE_HARDWARE:
-    OUTPUT_PINS = [TRIG_PIN, CON_R1, CON_R2, PUSH_R1, PUSH_R2]
+    OUTPUT_PINS = [TRIG_PIN, CON_R1, CON_R2, PUSH_R1, PUSH_R2, LED_RED]
     INPUT_PINS  = [ECHO_PIN, IR_GLASS, IR_PLASTIC, IR_CAN,
                    LIMIT_HOME, LIMIT_END, IR_DOOR]
 
@@ -92,6 +95,7 @@ def all_off():
 
 if USE_HARDWARE:
     all_off()
+    GPIO.output(LED_RED, GPIO.LOW)
 
 def conveyor_forward():
     if not USE_HARDWARE:
@@ -172,11 +176,16 @@ def measure_distance():
 # CAMERA + YOLO
 # ============================================================
 model = None
+model_lock = threading.Lock()  # โหลด model ครั้งเดียว แม้หลาย thread เรียกพร้อมกัน
 cap = None
 
 def init_model():
     global model
-    if USE_HARDWARE and model is None:
+    if not USE_HARDWARE:
+        return
+    with model_lock:
+        if model is not None:
+            return
         try:
             model = YOLO("best.pt")
             print("[YOLO] Model loaded")
@@ -213,11 +222,106 @@ def detect_label(frame):
         print(f"[YOLO ERROR] {e}")
         return None
 
+# ============================================================
+# BURST RE-CAPTURE (ตรวจจับไม่ได้ → ถ่ายใหม่ทันที ไม่ต้องรอเปิดประตู)
+# ============================================================
+RECAPTURE_ATTEMPTS = 3       # จำนวนเฟรมที่ถ่ายซ้ำ
+RECAPTURE_EXPOSURE_STEP = 1  # เพิ่ม exposure ทีละ step ต่อครั้ง
+RECAPTURE_NUDGE_TIME = 0.15  # เขย่าสายพาน (เดินหน้า-ถอยหลัง) ในรอบสุดท้าย
+RECAPTURE_FLUSH_FRAMES = 2   # ทิ้งเฟรมเก่าใน buffer ของกล้อง
+
+
+class DetectionStats:
+    """สถิติการตรวจจับ - miss rate และเวลาที่ใช้กู้คืน"""
+
+    def __init__(self):
+        self.total = 0
+        self.first_pass = 0
+        self.recovered = 0
+        self.missed = 0
+        self.recovery_times = []
+
+    def record(self, label, attempts, elapsed):
+        self.total += 1
+        if label is None:
+            self.missed += 1
+        elif attempts == 0:
+            self.first_pass += 1
+        else:
+            self.recovered += 1
+            self.recovery_times.append(elapsed)
+            # เก็บเฉพาะ 100 ครั้งล่าสุด
+            del self.recovery_times[:-100]
+
+    def miss_rate(self):
+        if self.total == 0:
+            return 0.0
+        return (self.total - self.first_pass) / self.total
+
+    def summary(self):
+        avg_ms = 0.0
+        if self.recovery_times:
+            avg_ms = sum(self.recovery_times) / len(self.recovery_times) * 1000
+        return (f"total={self.total} first_pass={self.first_pass} "
+                f"recovered={self.recovered} missed={self.missed} "
+                f"miss_rate={self.miss_rate():.1%} recovery_avg={avg_ms:.0f}ms")
+
+
+def _nudge_conveyor():
+    """ขยับสายพานไป-กลับเล็กน้อยให้ขวดเปลี่ยนมุม (กลับตำแหน่งเดิม)"""
+    if not USE_HARDWARE:
+        return
+    conveyor_forward()
+    time.sleep(RECAPTURE_NUDGE_TIME)
+    conveyor_reverse()
+    time.sleep(RECAPTURE_NUDGE_TIME)
+    conveyor_stop()
+
+
+def _fresh_frame(cap):
+    """อ่านเฟรมใหม่ (ทิ้งเฟรมที่ค้างใน buffer ก่อน)"""
+    for _ in range(RECAPTURE_FLUSH_FRAMES):
+        cap.grab()
+    return cap.read()
+
+
+def recapture_label(cap, attempts=RECAPTURE_ATTEMPTS):
+    """
+    ถ่ายภาพซ้ำสูงสุด `attempts` ครั้ง โดยเพิ่ม exposure ทีละขั้น
+    และเขย่าสายพานในรอบสุดท้าย
+    Returns: (label หรือ None, จำนวนครั้งที่ถ่ายซ้ำ)
+    """
+    if not USE_HARDWARE or cap is None:
+        return None, 0
+
+    base_exposure = cap.get(cv2.CAP_PROP_EXPOSURE)
+    try:
+        for attempt in range(1, attempts + 1):
+            if attempt == attempts:
+                _nudge_conveyor()
+            else:
+                cap.set(cv2.CAP_PROP_EXPOSURE,
+                        base_exposure + attempt * RECAPTURE_EXPOSURE_STEP)
+
+            ret, frame = _fresh_frame(cap)
+            if not ret:
+                return None, attempt
+
+            label = detect_label(frame)
+            if label is not None:
+                return label, attempt
+        return None, attempts
+    finally:
+        cap.set(cv2.CAP_PROP_EXPOSURE, base_exposure)
+
 # ============================================================
 # ROTATE TO SLOT (CAN ใช้ LIMIT_END เป็นตำแหน่ง)
 # ============================================================
 CHECK_DELAY = 0.05
 MIN_RUN_TIME = 0.3
+CAN_TIMEOUT = 12
+ROTATE_ATTEMPTS = 3           # plastic: ลองหาช่องกี่รอบ
+ROTATE_ATTEMPT_TIMEOUT = 12   # วินาทีต่อรอบ
 
 def rotate_to_slot(label):
     if not USE_HARDWARE:
@@ -231,6 +335,7 @@ def rotate_to_slot(label):
 
     # CAN → ใช้ LIMIT_END เป็น fallback
     if label == "can":
+        start = time.time()
         while True:
             conveyor_forward()
 
@@ -244,12 +349,17 @@ def rotate_to_slot(label):
                 conveyor_stop()
                 return True
 
+            # timeout (sensor/limit ไม่ทำงาน)
+            if time.time() - start > CAN_TIMEOUT:
+                conveyor_stop()
+                return False
+
             time.sleep(0.03)
 
     # PLASTIC
     target = SLOT_IR[label]
 
-    for attempt in range(3):
+    for attempt in range(ROTATE_ATTEMPTS):
         start = time.time()
         last_run = time.time()
 
@@ -270,8 +380,8 @@ def rotate_to_slot(label):
                 conveyor_stop()
                 return False
 
-            # timeout
-            if time.time() - start > 12:
+            # timeout ของรอบนี้ - ลองรอบถัดไป
+            if time.time() - start > ROTATE_ATTEMPT_TIMEOUT:
                 conveyor_stop()
                 break
 
@@ -284,7 +394,11 @@ def rotate_to_slot(label):
 # ============================================================
 # RETURN HOME
 # ============================================================
-def go_home():
+def go_home(timeout=15, run_time=MIN_RUN_TIME, pause=CHECK_DELAY):
+    """
+    กลับตำแหน่ง Home
+    run_time/pause: ลด run_time + เพิ่ม pause = เดินช้าลง (pulse relay)
+    """
     if not USE_HARDWARE:
         time.sleep(0.3)
         return True
@@ -293,8 +407,8 @@ def go_home():
     last_run = start
 
     while True:
-        if time.time() - last_run < MIN_RUN_TIME:
-            time.sleep(CHECK_DELAY)
+        if time.time() - last_run < run_time:
+            time.sleep(pause)
         else:
             # เดินกลับหลัง
             if GPIO.input(LIMIT_HOME) == 0:
@@ -310,12 +424,123 @@ def go_home():
             return True
 
         # timeout
-        if time.time() - start > 15:
+        if time.time() - start > timeout:
             conveyor_stop()
             return False
 
         time.sleep(0.05)
 
+# ============================================================
+# WATCHDOG (งบเวลาต่อ phase + กู้คืนอัตโนมัติ)
+# ============================================================
+# งบเวลา (วินาที) ของแต่ละ phase
+# rotate ต้องไม่น้อยกว่ากรณีช้าสุดของตัวเอง (plastic ลองครบทุกรอบ + พักระหว่างรอบ)
+# ไม่งั้นหมุนสำเร็จในรอบหลังๆ จะถูกนับเป็น fault และขวดไม่ถูกดัน/ไม่ได้แต้ม
+PHASE_BUDGETS = {
+    "detect": 5.0,
+    "rotate": ROTATE_ATTEMPTS * (ROTATE_ATTEMPT_TIMEOUT + 0.5) + 1.0,
+    "push": 4.0,
+    "home": 16.0,
+}
+DEGRADE_RATIO = 0.7        # เตือนเมื่อเวลาเฉลี่ยเกิน 70% ของงบ
+SLOW_HOME_RUN_TIME = 0.15  # re-home แบบช้า: เดินสั้นลง
+SLOW_HOME_PAUSE = 0.25     # ...และหยุดนานขึ้นระหว่าง pulse
+SLOW_HOME_TIMEOUT = 30
+
+
+def set_fault_led(on):
+    if not USE_HARDWARE:
+        return
+    GPIO.output(LED_RED, GPIO.HIGH if on else GPIO.LOW)
+
+
+class PhaseWatchdog:
+    """
+    จับเวลาแต่ละ phase เทียบกับงบเวลา
+    เมื่อผิดพลาด: re-home → re-home ช้า → lockout (ไฟแดง)
+    """
+
+    def __init__(self, budgets=None):
+        self.budgets = dict(PHASE_BUDGETS, **(budgets or {}))
+        self.avg_time = {}     # EWMA เวลาที่ใช้ต่อ phase
+        self.faults = {}       # จำนวน fault ต่อ phase
+        self.lost_time = 0.0   # เวลาที่เสียไปกับ fault + การกู้คืน
+        self.locked_out = False
+        self.log = print
+
+    def run(self, phase, fn, *args, **kwargs):
+        """
+        เรียก fn แล้วตรวจผล/เวลา
+        Returns: (ok, elapsed) - ok=False ถ้า fn ล้มเหลวหรือเกินงบ
+        """
+        start = time.time()
+        result = fn(*args, **kwargs)
+        elapsed = time.time() - start
+        self.observe(phase, elapsed)
+
+        ok = result is not False and elapsed <= self.budgets.get(phase, float("inf"))
+        if not ok:
+            self.faults[phase] = self.faults.get(phase, 0) + 1
+            self.lost_time += elapsed
+            self.log(f"[WATCHDOG] {phase} fault ({elapsed:.1f}s, result={result})")
+        return ok, elapsed
+
+    def observe(self, phase, elapsed):
+        """บันทึกเวลาของ phase (ค่าเฉลี่ยแบบ EWMA) และเตือนเมื่อช้าลง"""
+        prev = self.avg_time.get(phase)
+        avg = elapsed if prev is None else prev * 0.8 + elapsed * 0.2
+        self.avg_time[phase] = avg
+
+        budget = self.budgets.get(phase)
+        if budget and avg > budget * DEGRADE_RATIO:
+            self.log(f"[WATCHDOG] {phase} degrading: avg {avg:.1f}s / budget {budget:.1f}s")
+
+    def recover(self, phase):
+        """
+        กู้คืนตำแหน่ง carousel ให้กลับ Home
+        Returns: True ถ้ากู้ได้, False ถ้า lockout
+        """
+        start = time.time()
+        try:
+            conveyor_stop()
+
+            self.log(f"[WATCHDOG] {phase}: re-home")
+            if go_home():
+                return True
+
+            self.log(f"[WATCHDOG] {phase}: re-home (slow)")
+            if go_home(timeout=SLOW_HOME_TIMEOUT,
+                       run_time=SLOW_HOME_RUN_TIME, pause=SLOW_HOME_PAUSE):
+                return True
+
+            self.lockout(phase)
+            return False
+        finally:
+            self.lost_time += time.time() - start
+
+    def lockout(self, phase):
+        all_off()
+        set_fault_led(True)
+        self.locked_out = True
+        self.log(f"[WATCHDOG] LOCKOUT after {phase} - {self.summary()}")
+
+    def reset(self):
+        """ปลด lockout (หลังเจ้าหน้าที่ซ่อม - Ctrl+Shift+R บนหน้าจอ)"""
+        if not self.locked_out:
+            return
+        self.locked_out = False
+        set_fault_led(False)
+        self.log(f"[WATCHDOG] lockout cleared - {self.summary()}")
+
+    def summary(self):
+        faults = ", ".join(f"{k}={v}" for k, v in self.faults.items()) or "none"
+        avgs = ", ".join(f"{k}={v:.1f}s" for k, v in self.avg_time.items())
+        return f"faults: {faults} | lost: {self.lost_time:.1f}s | avg: {avgs}"
+
+
+# ใช้ร่วมกันทุก session - lockout ค้างจนกว่าจะ reset()
+watchdog = PhaseWatchdog()
+
 # ============================================================
 # AUTO START (รอเปิด-ปิดประตู + ตรวจจับขวด)
 # ============================================================
@@ -380,33 +605,52 @@ class SortingController:
     
     def __init__(self):
         self.cap = None
+        self.cap_lock = threading.Lock()
+        self.closed = False
         self.is_running = False
+        self.detection_stats = DetectionStats()
         self.on_status = None      # callback: (msg) -> None
         self.on_item_sorted = None  # callback: (item_type) -> None  "glass", "plastic", "can"
-        
-        if USE_HARDWARE:
-            init_model()
+        self.on_detected = None     # callback: (label หรือ None, elapsed วินาที) -> None
+        # ไม่โหลด model ที่นี่ - สร้างจาก GUI thread ได้โดยไม่ค้าง (โหลดใน open())
     
+    def open(self):
+        """
+        โหลด model + เปิดกล้อง (ช้า - เรียกจาก background thread เท่านั้น)
+        เรียกซ้ำได้: model โหลดครั้งเดียว, กล้องเปิดแล้วไม่เปิดซ้ำ
+        """
+        if not USE_HARDWARE:
+            return
+        init_model()
+        with self.cap_lock:
+            if self.cap is not None or self.closed:
+                return
+            cap = open_camera()
+            if cap:
+                cap.set(3, 640)
+                cap.set(4, 480)
+            if self.closed:
+                # stop() ระหว่างกำลังเปิดกล้อง
+                if cap:
+                    cap.release()
+                return
+            self.cap = cap
+
     def start(self):
-        """เริ่มการทำงาน"""
+        """เริ่มการทำงาน (โหลด model + เปิดกล้องใน loop thread ถ้ายังไม่ได้เตรียมไว้ - ไม่บล็อก GUI)"""
         self.is_running = True
         
-        if USE_HARDWARE:
-            self.cap = open_camera()
-            if self.cap:
-                self.cap.set(3, 640)
-                self.cap.set(4, 480)
-        
         # Start auto loop in thread
         threading.Thread(target=self._auto_loop, daemon=True).start()
     
     def stop(self):
         """หยุดการทำงาน"""
         self.is_running = False
+        self.closed = True
         all_off()
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        cap, self.cap = self.cap, None
+        if cap:
+            cap.release()
     
     def _update_status(self, msg):
         """อัพเดทสถานะ"""
@@ -416,10 +660,16 @@ class SortingController:
     
     def _auto_loop(self):
         """Loop หลักการทำงาน"""
+        self.open()
         camera_retry_count = 0
         MAX_RETRY = 5
 
         while self.is_running:
+            if watchdog.locked_out:
+                self._update_status("เครื่องขัดข้อง - กรุณาติดต่อเจ้าหน้าที่")
+                time.sleep(2)
+                continue
+
             if USE_HARDWARE and self.cap is None:
                 camera_retry_count += 1
                 if camera_retry_count >= MAX_RETRY:
@@ -461,7 +711,19 @@ class SortingController:
                     time.sleep(1)
                     continue
 
+                started = time.time()
                 label = detect_label(frame)
+                attempts = 0
+                if label is None:
+                    self._update_status("ตรวจจับไม่ได้ - กำลังถ่ายใหม่...")
+                    label, attempts = recapture_label(self.cap)
+                elapsed = time.time() - started
+                self.detection_stats.record(label, attempts, elapsed)
+                watchdog.observe("detect", elapsed)
+                if self.on_detected:
+                    self.on_detected(label, elapsed)
+                if attempts:
+                    print(f"[DETECT] {self.detection_stats.summary()}")
             else:
                 label = None
 
@@ -479,14 +741,15 @@ class SortingController:
             self._update_status(f"พบ: {label}")
 
             # หมุนไปยังช่อง
-            ok = rotate_to_slot(label)
+            ok, _ = watchdog.run("rotate", rotate_to_slot, label)
             if not ok:
-                self._update_status("หมุนไม่สำเร็จ")
+                self._update_status("หมุนไม่สำเร็จ - กำลังกลับตำแหน่ง...")
+                watchdog.recover("rotate")
                 continue
 
             # ดัน
             self._update_status("กำลังทิ้ง...")
-            pusher_push()
+            watchdog.run("push", pusher_push)
 
             # เพิ่มแต้ม (ส่งไป GUI)
             if self.on_item_sorted and item_type:
@@ -495,7 +758,9 @@ class SortingController:
             # กลับ Home (ถ้าไม่ใช่ Glass)
             if label != "glass_bottle":
                 self._update_status("กลับตำแหน่ง...")
-                go_home()
+                ok, _ = watchdog.run("home", go_home)
+                if not ok and not watchdog.recover("home"):
+                    continue
 
             self._update_status("พร้อมรับขยะ")
 
@@ -0,0 +1,172 @@
+# ===================================================================
+# Sorting Machine - User Directory
+# รายชื่อผู้ใช้ใน SQLite ของเครื่อง (login ได้ทันที แม้เน็ตหลุด)
+# ===================================================================
+
+import sqlite3
+import threading
+import time
+import logging
+from typing import Dict, List, Optional
+
+from config import USER_DIRECTORY_PATH, USER_SYNC_INTERVAL, USER_SYNC_PAGE_SIZE
+from background import PeriodicRefresher
+
+logger = logging.getLogger(__name__)
+
+
+class UserDirectory(PeriodicRefresher):
+    """
+    สำเนารายชื่อผู้ใช้ (phone, user_id, username, แต้มล่าสุดที่รู้)
+    - sync แบบ incremental จาก /api/userDirectory ตาม cursor (updated_at, user_id)
+    - lookup() ตอบจากเครื่องทันที ไม่ต้องรอ network
+    แต้มในนี้เป็นยอดที่ server ยืนยันแล้วเท่านั้น
+    (แต้มที่ยังค้างใน outbox ต้องบวกเพิ่มเอง)
+    """
+
+    refresh_interval = USER_SYNC_INTERVAL
+    refresh_name = 'User directory sync'
+
+    def __init__(self, path: str = USER_DIRECTORY_PATH):
+        super().__init__()
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                user_id TEXT PRIMARY KEY,
+                phone TEXT NOT NULL,
+                username TEXT,
+                points INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT,
+                synced_at REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_users_phone ON users(phone)')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS sync_state (
+                name TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+
+    # ---------- lookup ----------
+
+    def lookup(self, phone: str) -> Optional[Dict]:
+        """หาผู้ใช้จากเบอร์โทร - คืน {'id', 'phone', 'username', 'points'} หรือ None"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT user_id, phone, username, points FROM users WHERE phone = ?',
+                (phone,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row['user_id'],
+            'phone': row['phone'],
+            'username': row['username'],
+            'points': row['points'],
+        }
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+
+    # ---------- update ----------
+
+    def upsert(self, users: List[Dict]):
+        """เพิ่ม/แก้ไขผู้ใช้ (รูปแบบเดียวกับผลของ /api/userDirectory)"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute('BEGIN')
+            try:
+                for user in users:
+                    # เบอร์เดียวต้องมีผู้ใช้คนเดียว - ลบแถวเก่าที่ใช้เบอร์นี้
+                    self.conn.execute(
+                        'DELETE FROM users WHERE phone = ? AND user_id != ?',
+                        (user['phone'], user['id'])
+                    )
+                    self.conn.execute(
+                        'INSERT INTO users (user_id, phone, username, points, updated_at, synced_at) '
+                        'VALUES (?, ?, ?, ?, ?, ?) '
+                        'ON CONFLICT(user_id) DO UPDATE SET '
+                        '  phone = excluded.phone, username = excluded.username, '
+                        '  points = excluded.points, '
+                        '  updated_at = COALESCE(excluded.updated_at, users.updated_at), '
+                        '  synced_at = excluded.synced_at',
+                        (user['id'], user['phone'], user.get('username'),
+                         user.get('points', 0), user.get('updated_at'), now)
+                    )
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+
+    def update_points(self, user_id: str, points: int):
+        """บันทึกยอดแต้มล่าสุดที่ server ยืนยัน"""
+        with self.lock:
+            self.conn.execute(
+                'UPDATE users SET points = ?, synced_at = ? WHERE user_id = ?',
+                (points, time.time(), user_id)
+            )
+
+    def remove(self, phone: str):
+        """ลบผู้ใช้ที่ server แจ้งว่าไม่มีแล้ว"""
+        with self.lock:
+            self.conn.execute('DELETE FROM users WHERE phone = ?', (phone,))
+
+    # ---------- sync ----------
+
+    def _get_cursor(self) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value FROM sync_state WHERE name = 'cursor'"
+            ).fetchone()
+        return row['value'] if row else None
+
+    def _set_cursor(self, cursor: str):
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO sync_state (name, value) VALUES ('cursor', ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+                (cursor,)
+            )
+
+    def sync(self, api) -> int:
+        """ดึงผู้ใช้ที่เปลี่ยนตั้งแต่ sync ครั้งก่อน - คืนจำนวนที่อัพเดท (-1 = ไม่สำเร็จ)"""
+        total = 0
+        cursor = self._get_cursor()
+        while True:
+            result = api.get_user_directory(cursor, USER_SYNC_PAGE_SIZE)
+            if not result.get('success'):
+                logger.warning(f"⚠️ User directory sync failed: {result.get('error')}")
+                return -1
+
+            data = result['data']
+            users = data.get('users', [])
+            if users:
+                self.upsert(users)
+                total += len(users)
+
+            next_cursor = data.get('cursor')
+            if not next_cursor or next_cursor == cursor:
+                break
+            self._set_cursor(next_cursor)
+            cursor = next_cursor
+            if not data.get('has_more'):
+                break
+
+        if total:
+            logger.info(f"📒 User directory synced: {total} user(s), {self.count()} total")
+        return total
+
+    def refresh(self, api):
+        return self.sync(api)
+
+    def close(self):
+        self.stop()
+        with self.lock:
+            self.conn.close()
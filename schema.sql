@@ -42,7 +42,7 @@ CREATE TABLE point_history (
 );
 
 -- สร้าง Index สำหรับ user_id
-CREATE INDEX idx_point_history_user_id ON point_history(user_id);
+CREATE INDEX idx_point_history_user_created ON point_history(user_id, created_at DESC, id DESC);
 
 -- =====================================================
 